@@ -0,0 +1,65 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import gzip
+import io
+import json
+
+import pytest
+import requests
+from urllib3 import HTTPResponse
+
+from benchmarks.payloads import device_list_payload
+from rapyuta_io.utils.rest_client import ContentEncoding, compress_body
+
+
+def _paramserver_file_payload(size):
+    """A paramserver create_file body whose YAML data is roughly ``size`` bytes once JSON encoded."""
+    data = {}
+    i = 0
+    while len(json.dumps(data)) < size:
+        data['joint_{}'.format(i)] = {'p': 10.0 + i % 7, 'i': 0.01 * (i % 13), 'd': 0.5, 'limits': [-3.14, 3.14]}
+        i += 1
+    return json.dumps({'type': 'FileNode', 'data': data, 'contentType': 'text/yaml'}).encode('utf-8')
+
+
+REQUEST_BODIES = {
+    'paramserver_file_16k': _paramserver_file_payload(16 * 1024),
+    'paramserver_file_128k': _paramserver_file_payload(128 * 1024),
+    'apply_parameters_5000': json.dumps({
+        'device_list': ['{:08x}-4f1c-4b0e-9c5e-7a0d3c2b1e9f'.format(i) for i in range(5000)],
+        'tree_names': ['navigation', 'perception'],
+    }).encode('utf-8'),
+}
+
+
+@pytest.mark.parametrize('level', [1, 6, 9])
+@pytest.mark.parametrize('encoding', list(ContentEncoding))
+@pytest.mark.parametrize('body_name', sorted(REQUEST_BODIES))
+def test_compress_request(benchmark, body_name, encoding, level):
+    body = REQUEST_BODIES[body_name]
+    benchmark.group = 'compress:' + body_name
+    compressed = benchmark(compress_body, body, encoding, level)
+    benchmark.extra_info['raw_bytes'] = len(body)
+    benchmark.extra_info['wire_bytes'] = len(compressed)
+    benchmark.extra_info['ratio'] = round(len(body) / float(len(compressed)), 2)
+
+
+def _read_response(raw_body, headers):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = HTTPResponse(body=io.BytesIO(raw_body), headers=headers, status=200,
+                                preload_content=False, decode_content=True)
+    return response.content
+
+
+@pytest.mark.parametrize('content_encoding', ['identity', 'gzip'])
+def test_read_response(benchmark, content_encoding):
+    """Cost of reading a large device list through requests, with and without gzip on the wire."""
+    body = device_list_payload(2000)
+    raw_body = gzip.compress(body) if content_encoding == 'gzip' else body
+    headers = {'Content-Encoding': content_encoding} if content_encoding == 'gzip' else {}
+    benchmark.group = 'response:device_list_2000'
+    content = benchmark(_read_response, raw_body, headers)
+    assert content == body
+    benchmark.extra_info['wire_bytes'] = len(raw_body)
@@ -0,0 +1,13 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import rapyuta_io
+from rapyuta_io.utils import json_codec
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # Stored with every saved run so that results are only compared between like environments.
+    machine_info['rapyuta_io'] = {
+        'version': rapyuta_io.__version__,
+        'json_codecs': json_codec.available_json_codecs(),
+    }
@@ -0,0 +1,43 @@
+# encoding: utf-8
+"""
+Import time of the package, measured in a fresh interpreter with ``python -X importtime``.
+"""
+from __future__ import absolute_import
+
+import subprocess
+import sys
+
+import pytest
+
+STATEMENTS = {
+    'package': 'import rapyuta_io',
+    'client': 'from rapyuta_io import Client',
+    'paramserver': 'import rapyuta_io.clients.paramserver, yaml',
+}
+
+
+def _import_times(statement):
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], check=True,
+                            stderr=subprocess.PIPE).stderr.decode()
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Top level entries only, the nested ones are included in their parent's cumulative time.
+        if not name.startswith('  '):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def _import_time(statement):
+    """Cumulative import time in microseconds of the modules imported by ``statement``, not by the interpreter."""
+    startup = _import_times('pass')
+    return sum(t for name, t in _import_times(statement).items() if name not in startup)
+
+
+@pytest.mark.parametrize('name', sorted(STATEMENTS))
+def test_import_time(benchmark, name):
+    benchmark.group = 'import_time'
+    benchmark.extra_info['import_time_us'] = _import_time(STATEMENTS[name])
+    benchmark.pedantic(subprocess.check_call, ([sys.executable, '-c', STATEMENTS[name]],), rounds=5, iterations=1)
@@ -0,0 +1,41 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+
+import pytest
+
+from benchmarks.payloads import FIXTURE_PAYLOADS, device_list_payload, query_metrics_payload
+from rapyuta_io.utils import json_codec
+
+CODECS = json_codec.available_json_codecs()
+
+PAYLOADS = {name: payload.encode('utf-8') for name, payload in FIXTURE_PAYLOADS.items()}
+PAYLOADS['device_list_5000'] = device_list_payload(5000)
+PAYLOADS['query_metrics_200x1000'] = query_metrics_payload(200, 1000)
+
+
+@pytest.mark.parametrize('payload_name', sorted(PAYLOADS))
+def test_decode_text_baseline(benchmark, payload_name):
+    """The previous path: decode the body to str, then parse with the stdlib."""
+    body = PAYLOADS[payload_name]
+    benchmark.group = 'decode:' + payload_name
+    benchmark(lambda: json.loads(body.decode('utf-8')))
+
+
+@pytest.mark.parametrize('codec_name', CODECS)
+@pytest.mark.parametrize('payload_name', sorted(PAYLOADS))
+def test_decode_bytes(benchmark, payload_name, codec_name):
+    body = PAYLOADS[payload_name]
+    codec = json_codec.new_json_codec(codec_name)
+    benchmark.group = 'decode:' + payload_name
+    benchmark(codec.loads, body)
+
+
+@pytest.mark.parametrize('codec_name', CODECS)
+@pytest.mark.parametrize('payload_name', ['device_list_5000', 'query_metrics_200x1000'])
+def test_encode(benchmark, payload_name, codec_name):
+    data = json.loads(PAYLOADS[payload_name])
+    codec = json_codec.new_json_codec(codec_name)
+    benchmark.group = 'encode:' + payload_name
+    benchmark(codec.dumps, data)
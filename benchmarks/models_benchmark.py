@@ -0,0 +1,133 @@
+# encoding: utf-8
+"""
+Benchmarks of the model layer: response deserialization, ObjDict conversions and ObjBase (de)serialization.
+"""
+from __future__ import absolute_import
+
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.payloads import device_list_data, query_metrics_data, user_data
+from rapyuta_io.clients.compact import CompactDevice
+from rapyuta_io.clients.device import Device
+from rapyuta_io.clients.metrics import MetricFunction, MetricOperation, QueryMetricsRequest, QueryMetricsResponse, \
+    StepInterval
+from rapyuta_io.clients.model import Command
+from rapyuta_io.clients.project import User
+from rapyuta_io.utils.objdict import to_dict, to_objdict
+
+DEVICE_COUNTS = [100, 1000, 5000]
+DEVICE_LISTS = {count: device_list_data(count) for count in DEVICE_COUNTS}
+
+
+@pytest.mark.parametrize('count', DEVICE_COUNTS)
+def test_device_deserialize(benchmark, count):
+    devices = DEVICE_LISTS[count]
+    benchmark.group = 'device_deserialize'
+    result = benchmark(lambda: [Device._deserialize(d) for d in devices])
+    assert len(result) == count
+
+
+@pytest.mark.parametrize('count', DEVICE_COUNTS)
+def test_compact_device_deserialize(benchmark, count):
+    devices = DEVICE_LISTS[count]
+    benchmark.group = 'device_deserialize'
+    result = benchmark(lambda: [CompactDevice.from_dict(d) for d in devices])
+    assert len(result) == count
+
+
+@pytest.mark.parametrize('compact', [False, True], ids=['device', 'compact'])
+def test_device_inventory_memory(benchmark, compact):
+    """
+    Records the memory retained by 5000 deserialized devices in ``extra_info``, on top of the timing.
+    """
+    devices = DEVICE_LISTS[5000]
+    deserialize = CompactDevice.from_dict if compact else Device._deserialize
+    tracemalloc.start()
+    try:
+        inventory = [deserialize(d) for d in devices]
+        benchmark.extra_info['retained_bytes'] = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del inventory
+    benchmark.group = 'device_inventory_memory'
+    benchmark.pedantic(lambda: [deserialize(d) for d in devices], rounds=5, iterations=1)
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['eager', 'lazy'])
+@pytest.mark.parametrize('count', DEVICE_COUNTS)
+def test_to_objdict(benchmark, count, lazy):
+    devices = DEVICE_LISTS[count]
+    benchmark.group = 'to_objdict'
+    benchmark(to_objdict, devices, lazy)
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['eager', 'lazy'])
+@pytest.mark.parametrize('count', DEVICE_COUNTS)
+def test_to_objdict_partial_read(benchmark, count, lazy):
+    devices = DEVICE_LISTS[count]
+    benchmark.group = 'to_objdict_partial_read'
+    benchmark(lambda: [(device.uuid, device.status) for device in to_objdict(devices, lazy)])
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['eager', 'lazy'])
+@pytest.mark.parametrize('count', DEVICE_COUNTS)
+def test_to_dict(benchmark, count, lazy):
+    devices = to_objdict(DEVICE_LISTS[count], lazy)
+    benchmark.group = 'to_dict'
+    benchmark(to_dict, devices)
+
+
+@pytest.mark.parametrize('count', DEVICE_COUNTS)
+def test_device_attribute_reads(benchmark, count):
+    devices = [Device._deserialize(d) for d in DEVICE_LISTS[count]]
+    benchmark.group = 'device_attribute_reads'
+
+    def read():
+        for device in devices:
+            device.uuid, device.name, device.status, device.labels
+
+    benchmark(read)
+
+
+QUERY_METRICS = {
+    '10x1000': query_metrics_data(10, 1000),
+    '200x1000': query_metrics_data(200, 1000),
+    '2000x10': query_metrics_data(2000, 10),
+}
+
+
+@pytest.mark.parametrize('shape', sorted(QUERY_METRICS))
+def test_query_metrics_deserialize(benchmark, shape):
+    data = QUERY_METRICS[shape]
+    benchmark.group = 'query_metrics_deserialize'
+    benchmark(QueryMetricsResponse.deserialize, data)
+
+
+@pytest.mark.parametrize('metric_count', [10, 1000])
+def test_query_metrics_request_serialize(benchmark, metric_count):
+    now = datetime.now()
+    metrics = [MetricOperation(MetricFunction.AVG, 'cpu.usage_{}'.format(i)) for i in range(metric_count)]
+    tags = {'tenant_id': {'operator': 'eq', 'value': 'project-id'}}
+    request = QueryMetricsRequest(now - timedelta(hours=1), now, StepInterval.ONE_MINUTE, metrics, tags=tags,
+                                  groupby=['device_id'])
+    benchmark.group = 'query_metrics_request_serialize'
+    result = benchmark(request.serialize)
+    assert len(result['metrics']) == metric_count
+
+
+@pytest.mark.parametrize('project_count', [10, 1000])
+def test_user_deserialize(benchmark, project_count):
+    data = user_data(project_count)
+    benchmark.group = 'user_deserialize'
+    user = benchmark(User.deserialize, data)
+    assert len(user.projects) == project_count
+
+
+def test_command_to_json(benchmark):
+    command = Command('ls -la /var/log', shell='/bin/bash', env={'ROS_DOMAIN_ID': '10', 'LANG': 'C'},
+                      bg=False, runas='root', cwd='/home/rapyuta', timeout=60)
+    benchmark.group = 'command_to_json'
+    benchmark(command.to_json)
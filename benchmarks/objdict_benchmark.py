@@ -0,0 +1,84 @@
+# encoding: utf-8
+"""
+Micro-benchmarks of ObjDict attribute access against the previous exception-driven implementation.
+"""
+from __future__ import absolute_import
+
+import pytest
+
+from benchmarks.payloads import device_list_data
+from rapyuta_io.clients.device import Device
+from rapyuta_io.utils.objdict import ObjDict
+
+
+class LegacyObjDict(dict):
+    """ObjDict as it was before attribute access stopped relying on AttributeError."""
+
+    def __contains__(self, k):
+        try:
+            return hasattr(self, k) or dict.__contains__(self, k)
+        except:
+            return False
+
+    def __getattr__(self, k):
+        try:
+            return object.__getattribute__(self, k)
+        except AttributeError:
+            try:
+                return self[k]
+            except KeyError:
+                raise AttributeError(k)
+
+    def __setattr__(self, k, v):
+        try:
+            object.__getattribute__(self, k)
+        except AttributeError:
+            self[k] = v
+        else:
+            object.__setattr__(self, k, v)
+
+
+IMPLEMENTATIONS = {'legacy': LegacyObjDict, 'current': ObjDict}
+FIELDS = ['uuid', 'name', 'status', 'username', 'saltversion', 'description', 'host', 'ip_interfaces',
+          'config_variables', 'labels', 'deployments', 'last_online', 'created_at', 'updated_at']
+
+
+@pytest.mark.parametrize('impl', sorted(IMPLEMENTATIONS))
+def test_setattr(benchmark, impl):
+    cls = IMPLEMENTATIONS[impl]
+    benchmark.group = 'objdict:setattr'
+
+    def fill():
+        obj = cls()
+        for field in FIELDS:
+            setattr(obj, field, None)
+        return obj
+
+    benchmark(fill)
+
+
+@pytest.mark.parametrize('impl', sorted(IMPLEMENTATIONS))
+def test_getattr(benchmark, impl):
+    obj = IMPLEMENTATIONS[impl]((field, field) for field in FIELDS)
+    benchmark.group = 'objdict:getattr'
+    benchmark(lambda: [getattr(obj, field) for field in FIELDS])
+
+
+@pytest.mark.parametrize('impl', sorted(IMPLEMENTATIONS))
+def test_getattr_missing(benchmark, impl):
+    obj = IMPLEMENTATIONS[impl]()
+    benchmark.group = 'objdict:getattr_missing'
+    benchmark(lambda: [getattr(obj, field, None) for field in FIELDS])
+
+
+@pytest.mark.parametrize('impl', sorted(IMPLEMENTATIONS))
+def test_contains(benchmark, impl):
+    obj = IMPLEMENTATIONS[impl]((field, field) for field in FIELDS[::2])
+    benchmark.group = 'objdict:contains'
+    benchmark(lambda: [field in obj for field in FIELDS])
+
+
+def test_device_deserialize_5000(benchmark):
+    devices = device_list_data(5000)
+    benchmark.group = 'objdict:device_deserialize'
+    benchmark(lambda: [Device._deserialize(d) for d in devices])
@@ -0,0 +1,111 @@
+# encoding: utf-8
+"""
+Benchmarks of the client side work done by configuration uploads and device selection queries.
+"""
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+from concurrent import futures
+
+import pytest
+
+from rapyuta_io.clients.paramserver import _ParamserverClient
+from rapyuta_io.clients.compact import CompactDevice
+from rapyuta_io.utils.label_index import LabelIndex
+from rapyuta_io.utils.query_builder import build_device_selection_payload, compile_device_selection
+
+FILE_COUNT = 10000
+
+
+class _InlineExecutor(object):
+    """Records submitted calls without running them, so only the directory walk and parsing is measured."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        future = futures.Future()
+        future.set_result(None)
+        return future
+
+
+@pytest.fixture(scope='module')
+def config_tree():
+    rootdir = tempfile.mkdtemp()
+    directory = os.path.join(rootdir, 'navigation', 'robots')
+    os.makedirs(directory)
+    for i in range(FILE_COUNT):
+        extension = ('yaml', 'json', 'txt')[i % 3]
+        with open(os.path.join(directory, 'robot-{:05d}.{}'.format(i, extension)), 'w') as f:
+            if extension == 'json':
+                f.write('{{"speed": {}, "zone": "zone-{}"}}'.format(i % 5, i % 7))
+            else:
+                f.write('speed: {}\nzone: zone-{}\n'.format(i % 5, i % 7))
+    yield rootdir
+    shutil.rmtree(rootdir)
+
+
+def _client():
+    return _ParamserverClient('auth_token', 'project-id', 'http://127.0.0.1')
+
+
+def test_process_dir(benchmark, config_tree):
+    client = _client()
+    benchmark.group = 'paramserver:process_dir'
+
+    def process():
+        executor = _InlineExecutor()
+        client.process_dir(executor, config_tree, os.path.join('navigation', 'robots'), 1, {}, {})
+        return executor.submitted
+
+    assert benchmark.pedantic(process, rounds=3, iterations=1) == FILE_COUNT
+
+
+def test_process_folder(benchmark, config_tree):
+    client = _client()
+    benchmark.group = 'paramserver:process_dir'
+
+    def process():
+        executor = _InlineExecutor()
+        client.process_folder(executor, config_tree, os.path.join('navigation', 'robots'), 1, {}, {})
+        return executor.submitted
+
+    assert benchmark.pedantic(process, rounds=3, iterations=1) == FILE_COUNT
+
+
+@pytest.mark.parametrize('size', [1024, 100 * 1024])
+def test_should_upload_as_binary(benchmark, size):
+    data = {'joint_{}'.format(i): {'p': 1.0, 'i': 0.1, 'd': 0.01} for i in range(size // 40)}
+    benchmark.group = 'paramserver:should_upload_as_binary'
+    benchmark(_client().should_upload_as_binary, data, _ParamserverClient.yaml_content_type)
+
+
+@pytest.mark.parametrize('criteria_count', [1, 20])
+def test_build_device_selection_payload(benchmark, criteria_count):
+    query = ', '.join('label.zone{}=a{}'.format(i, i) if i % 2 else 'measurement.cpu.usage>{}'.format(i)
+                      for i in range(criteria_count))
+    benchmark.group = 'build_device_selection_payload'
+    benchmark(build_device_selection_payload, query)
+
+
+@pytest.fixture(scope='module')
+def inventory():
+    return [CompactDevice.from_dict({'uuid': 'device-{:05d}'.format(i), 'status': ('ONLINE', 'OFFLINE')[i % 2],
+                                     'labels': [{'id': 1, 'key': 'site', 'value': 'site-{}'.format(i % 10)},
+                                                {'id': 2, 'key': 'zone', 'value': 'zone-{}'.format(i % 100)}]})
+            for i in range(10000)]
+
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_local_device_selection(benchmark, inventory, indexed):
+    selection = compile_device_selection('label.site=site-2, label.zone=zone-12, status=ONLINE')
+    index = LabelIndex(inventory)
+    benchmark.group = 'local_device_selection'
+    if indexed:
+        selected = benchmark(selection.select, index=index)
+    else:
+        selected = benchmark(selection.select, inventory)
+    assert len(selected) == 100
@@ -0,0 +1,85 @@
+# encoding: utf-8
+"""
+Synthetic API payloads for the benchmarks, scaled up from the unit test fixtures in ``tests/utils``.
+"""
+from __future__ import absolute_import
+
+import copy
+import json
+
+from tests.utils.device_respones import DEVICE_LIST, DEVICE_INFO, DEVICE_LABELS_LIST_OK, CONFIG_VARIABLES
+from tests.utils.query_metrics_responses import QUERY_METRICS_SUCCESS_WITH_GROUPBY
+from tests.utils.user_group_responses import USER_GROUP_LIST_SUCCESS
+from tests.utils.user_response import GET_USER_RESPONSE
+
+FIXTURE_PAYLOADS = {
+    'device_list': DEVICE_LIST,
+    'device_info': DEVICE_INFO,
+    'device_labels': DEVICE_LABELS_LIST_OK,
+    'config_variables': CONFIG_VARIABLES,
+    'query_metrics': QUERY_METRICS_SUCCESS_WITH_GROUPBY,
+    'user': GET_USER_RESPONSE,
+    'usergroup_list': USER_GROUP_LIST_SUCCESS,
+}
+
+
+def _wrap(data):
+    return {'status': 'success', 'response': {'data': data}}
+
+
+def device_list_data(count):
+    """
+    List of ``count`` full device objects (labels, config variables and deployments included), with unique uuids.
+    """
+    template = json.loads(DEVICE_INFO)['response']['data']
+    devices = []
+    for i in range(count):
+        device = copy.deepcopy(template)
+        device['uuid'] = 'device-{:06d}'.format(i)
+        device['name'] = 'device-{}'.format(i)
+        device['status'] = 'ONLINE' if i % 3 else 'OFFLINE'
+        for j, label in enumerate(device['labels']):
+            label['id'] = i * 10 + j
+            label['value'] = 'zone-{}'.format(i % 7)
+        devices.append(device)
+    return devices
+
+
+def device_list_payload(count):
+    return json.dumps(_wrap(device_list_data(count))).encode('utf-8')
+
+
+def query_metrics_data(column_count, row_count):
+    """
+    Query metrics response with one timestamp column, ``column_count`` metric columns and ``row_count`` points.
+    """
+    template = json.loads(QUERY_METRICS_SUCCESS_WITH_GROUPBY)['response']['data']['columns'][1]
+    columns = [{'name': 'timestamp'}]
+    for i in range(column_count):
+        column = copy.deepcopy(template)
+        column['tag_values'] = ['value-{}'.format(i)] * len(column.get('tag_names') or [])
+        columns.append(column)
+    rows = [[1612814880000000000 + j for j in range(row_count)]]
+    rows.extend([[0.5 + (i * j) % 100 / 100.0 for j in range(row_count)] for i in range(column_count)])
+    return {'columns': columns, 'rows': rows}
+
+
+def query_metrics_payload(column_count, row_count):
+    return json.dumps(_wrap(query_metrics_data(column_count, row_count))).encode('utf-8')
+
+
+def user_data(project_count):
+    """
+    Authenticated user response with ``project_count`` projects, each with its organization.
+    """
+    user = json.loads(GET_USER_RESPONSE)
+    template = user['projects'][0]
+    projects = []
+    for i in range(project_count):
+        project = copy.deepcopy(template)
+        project['guid'] = 'project-{:06d}'.format(i)
+        project['name'] = 'project-{}'.format(i)
+        project['organization']['guid'] = 'org-{}'.format(i % 10)
+        projects.append(project)
+    user['projects'] = projects
+    return user
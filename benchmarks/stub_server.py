@@ -0,0 +1,295 @@
+# encoding: utf-8
+"""
+Local HTTP server emulating the device-manager, paramserver, metrics and blob endpoints used by the SDK.
+
+It serves the fixture-shaped payloads from :py:mod:`benchmarks.payloads`, answers conditional GETs with
+``304 Not Modified``, accepts gzip compressed request bodies and can inject latency and errors::
+
+    with StubServer(device_count=500, latency=0.02, error_rate=0.01) as server:
+        with server.client_config():
+            client = Client('auth_token', 'project-id')
+            client.get_all_devices()
+
+Run ``python -m benchmarks.stub_server`` to keep a server running in the foreground.
+"""
+from __future__ import absolute_import
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.payloads import device_list_data, query_metrics_data
+from tests.utils.device_respones import CONFIG_VARIABLES, DEVICE_LABELS_LIST_OK, TOPIC_LIST
+
+
+def _data(fixture):
+    return json.loads(fixture)['response']['data']
+
+
+def _wrap(data):
+    return {'status': 'success', 'response': {'data': data}}
+
+
+class StubServer(object):
+    """
+    :param device_count: Number of devices in the emulated project
+    :param latency: Seconds added to every response
+    :param error_rate: Fraction of requests answered with ``500 Internal Server Error``
+    :param errors: Map of path regex to a status code returned for every matching request
+    :param seed: Seed for the error injection
+    """
+
+    def __init__(self, device_count=100, latency=0.0, error_rate=0.0, errors=None, seed=0, port=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.errors = [(re.compile(pattern), status) for pattern, status in (errors or {}).items()]
+        self.request_count = 0
+        self.requests = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.devices = {device['uuid']: device for device in device_list_data(device_count)}
+        self.trees = {}
+        self.blobs = {}
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-server')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextlib.contextmanager
+    def client_config(self):
+        """
+        Points :py:class:`~rapyuta_io.Client` instances created inside the block at this server through
+        ``RIO_CONFIG``.
+        """
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'core_api_host': self.url, 'catalog_host': self.url, 'rip_host': self.url}, f)
+        previous = os.environ.get('RIO_CONFIG')
+        os.environ['RIO_CONFIG'] = path
+        try:
+            yield path
+        finally:
+            if previous is None:
+                os.environ.pop('RIO_CONFIG', None)
+            else:
+                os.environ['RIO_CONFIG'] = previous
+            os.remove(path)
+
+    def _record(self, method, path):
+        with self._lock:
+            self.request_count += 1
+            self.requests.append((method, path))
+            inject = self.error_rate and self._random.random() < self.error_rate
+        for pattern, status in self.errors:
+            if pattern.search(path):
+                return status
+        return 500 if inject else None
+
+    # Routes return (status, body). ``body`` is JSON serialized by the handler.
+
+    def route(self, method, path, query, body):
+        for route_method, pattern, handler in self._routes():
+            match = re.match(pattern + '$', path)
+            if route_method == method and match:
+                return handler(query, body, *match.groups())
+        return 404, {'error': 'not found: {} {}'.format(method, path)}
+
+    def _routes(self):
+        dm = '/api/device-manager/v0/'
+        ps = '/api/paramserver/'
+        return (
+            ('GET', dm + 'devices/', self._list_devices),
+            ('GET', dm + 'devices/([^/]+)', self._get_device),
+            ('PATCH', dm + 'devices/([^/]+)', self._update_device),
+            ('POST', dm + 'selection/query/', self._select_devices),
+            ('GET', dm + 'labels/([^/]+)', self._get_labels),
+            ('GET', dm + 'config_variables/device/([^/]+)', self._get_config_variables),
+            ('GET', dm + 'topics/([^/]+)', self._get_topics),
+            ('POST', dm + 'parameters/', self._apply_parameters),
+            ('GET', ps + 'tree', self._list_trees),
+            ('PUT', ps + 'tree/(.+)', self._put_node),
+            ('DELETE', ps + 'tree/(.+)', self._delete_tree),
+            ('GET', ps + 'tree/([^/]+)', self._get_tree),
+            ('GET', ps + 'treeblobs', self._tree_blobs),
+            ('POST', '/api/metrics/v0/query/', self._query_metrics),
+            ('PUT', '/blob/([^/]+)', self._put_blob),
+            ('GET', '/blob/([^/]+)', self._get_blob),
+        )
+
+    def _list_devices(self, query, body):
+        devices = list(self.devices.values())
+        if 'name' in query:
+            devices = [d for d in devices if d['name'] == query['name'][0]]
+        return 200, _wrap(devices)
+
+    def _get_device(self, query, body, device_id):
+        device = self.devices.get(device_id)
+        if device is None:
+            return 404, {'error': 'device not found'}
+        return 200, _wrap(device)
+
+    def _update_device(self, query, body, device_id):
+        device = self.devices.get(device_id)
+        if device is None:
+            return 404, {'error': 'device not found'}
+        device.update(body or {})
+        return 200, _wrap(device)
+
+    def _select_devices(self, query, body):
+        return 200, _wrap([{'uuid': uuid} for uuid in self.devices])
+
+    def _get_labels(self, query, body, device_id):
+        return 200, _wrap(self.devices.get(device_id, {}).get('labels', _data(DEVICE_LABELS_LIST_OK)))
+
+    def _get_config_variables(self, query, body, device_id):
+        return 200, _wrap(_data(CONFIG_VARIABLES))
+
+    def _get_topics(self, query, body, device_id):
+        return 200, json.loads(TOPIC_LIST)
+
+    def _apply_parameters(self, query, body):
+        device_ids = body.get('device_list', [])
+        return 200, _wrap([{'device_id': d, 'success': d in self.devices} for d in device_ids])
+
+    def _list_trees(self, query, body):
+        return 200, {'data': sorted(self.trees)}
+
+    def _put_node(self, query, body, tree_path):
+        parts = tree_path.split('/')
+        with self._lock:
+            node = self.trees.setdefault(parts[0], {'name': parts[0], 'type': 'ValueNode', 'children': {}})
+            for name in parts[1:]:
+                node = node['children'].setdefault(name, {'name': name, 'children': {}})
+            node.update({k: v for k, v in (body or {}).items() if k != 'children'})
+        return 200, {'data': {'path': tree_path}}
+
+    def _delete_tree(self, query, body, tree_path):
+        self.trees.pop(tree_path.split('/')[0], None)
+        return 200, {'data': {}}
+
+    @staticmethod
+    def _export(node):
+        exported = {k: v for k, v in node.items() if k != 'children'}
+        if isinstance(exported.get('data'), (dict, list)):
+            exported['data'] = json.dumps(exported['data'])
+        exported['children'] = [StubServer._export(child) for child in node['children'].values()]
+        return exported
+
+    def _get_tree(self, query, body, tree_name):
+        tree = self.trees.get(tree_name)
+        if tree is None:
+            return 404, {'error': 'tree not found'}
+        return 200, {'data': self._export(tree)}
+
+    def _tree_blobs(self, query, body):
+        return 200, {'data': {'blobRefs': []}}
+
+    def _query_metrics(self, query, body):
+        return 200, _wrap(query_metrics_data(8, 500))
+
+    def _put_blob(self, query, body, blob_id):
+        self.blobs[blob_id] = body
+        return 201, {}
+
+    def _get_blob(self, query, body, blob_id):
+        if blob_id not in self.blobs:
+            return 404, {'error': 'blob not found'}
+        return 200, self.blobs[blob_id]
+
+
+def _make_handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _read_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            if self.headers.get('Content-Encoding') == 'gzip':
+                raw = gzip.decompress(raw)
+            if not raw:
+                return None
+            try:
+                return json.loads(raw)
+            except ValueError:
+                return raw.decode('utf-8', 'replace')
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8') if status != 304 else b''
+            etag = '"{}"'.format(hashlib.sha1(payload).hexdigest())
+            if self.command == 'GET' and status == 200 and self.headers.get('If-None-Match') == etag:
+                status, payload = 304, b''
+            use_gzip = len(payload) > 1024 and 'gzip' in (self.headers.get('Accept-Encoding') or '')
+            if use_gzip:
+                payload = gzip.compress(payload)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            if self.command == 'GET' and status in (200, 304):
+                self.send_header('ETag', etag)
+            if use_gzip:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _handle(self):
+            url = urlparse(self.path)
+            body = self._read_body()
+            injected = server._record(self.command, url.path)
+            if server.latency:
+                time.sleep(server.latency)
+            if injected:
+                self._send(injected, {'error': 'injected error'})
+                return
+            status, response = server.route(self.command, url.path, parse_qs(url.query), body)
+            self._send(status, response)
+
+        do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = _handle
+
+    return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    stub = StubServer(device_count=args.devices, latency=args.latency, error_rate=args.error_rate, port=args.port)
+    print('Serving on {}'.format(stub.url))
+    stub.start()._thread.join()
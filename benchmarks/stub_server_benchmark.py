@@ -0,0 +1,131 @@
+# encoding: utf-8
+"""
+End-to-end benchmarks of SDK workflows against the local stub server and against recorded traffic.
+"""
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+from concurrent import futures
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from rapyuta_io import Client
+from rapyuta_io.utils.recording import RecordingTransport, ReplayTransport
+from rapyuta_io.utils.response_cache import CachingTransport, ResponseCache
+from rapyuta_io.utils.transport import CoalescingTransport, Transport, set_default_transport
+
+DEVICE_COUNT = 500
+LATENCY = 0.005
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StubServer(device_count=DEVICE_COUNT, latency=LATENCY) as stub:
+        yield stub
+
+
+@pytest.fixture
+def client(server):
+    with server.client_config():
+        yield Client('auth_token', 'project-id')
+
+
+@pytest.fixture(params=['plain', 'cached'])
+def transport(request):
+    transport = Transport() if request.param == 'plain' else CachingTransport(ResponseCache())
+    previous = set_default_transport(transport)
+    yield transport
+    set_default_transport(previous)
+
+
+def test_get_all_devices(benchmark, client):
+    benchmark.group = 'e2e:get_all_devices'
+    devices = benchmark(client.get_all_devices)
+    assert len(devices) == DEVICE_COUNT
+
+
+def test_device_reads(benchmark, client, transport):
+    device = client.get_device('device-000001')
+    benchmark.group = 'e2e:device_reads'
+
+    def reads():
+        device.refresh()
+        device.get_labels()
+        device.get_config_variables()
+        device.topics()
+
+    benchmark(reads)
+
+
+@pytest.mark.parametrize('coalesce', [False, True], ids=['plain', 'coalesced'])
+def test_concurrent_get_device(benchmark, server, client, coalesce):
+    previous = set_default_transport(CoalescingTransport() if coalesce else Transport())
+    benchmark.group = 'e2e:concurrent_get_device'
+
+    def herd():
+        with futures.ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda _: client.get_device('device-000002'), range(64)))
+
+    try:
+        benchmark(herd)
+    finally:
+        set_default_transport(previous)
+
+
+@pytest.mark.parametrize('mode', ['sequential', 'refresh_devices'])
+def test_refresh_devices(benchmark, client, mode):
+    devices = client.get_all_devices()[:100]
+    benchmark.group = 'e2e:refresh_devices'
+
+    def refresh():
+        if mode == 'sequential':
+            for device in devices:
+                device.refresh()
+        else:
+            assert all(r.ok for r in client.refresh_devices(devices))
+
+    benchmark(refresh)
+
+
+def test_apply_parameters(benchmark, client):
+    device_ids = ['device-{:06d}'.format(i) for i in range(DEVICE_COUNT)]
+    benchmark.group = 'e2e:apply_parameters'
+    result = benchmark(client.apply_parameters, device_ids, ['navigation'])
+    assert len(result) == DEVICE_COUNT
+
+
+def test_upload_download_configurations(benchmark, client):
+    workdir = tempfile.mkdtemp()
+    src = os.path.join(workdir, 'src')
+    dst = os.path.join(workdir, 'dst')
+    for i in range(20):
+        path = os.path.join(src, 'navigation', 'zone-{}'.format(i % 4), 'robot-{}'.format(i))
+        os.makedirs(path)
+        with open(os.path.join(path, 'pid.yaml'), 'w') as f:
+            f.write('\n'.join('joint_{}: {{p: 1.0, i: 0.1, d: 0.01}}'.format(j) for j in range(50)))
+    benchmark.group = 'e2e:configurations'
+
+    def round_trip():
+        client.upload_configurations(src, delete_existing_trees=True)
+        client.download_configurations(dst, delete_existing_trees=True)
+
+    try:
+        benchmark(round_trip)
+    finally:
+        shutil.rmtree(workdir)
+
+
+def test_replay_get_all_devices(benchmark, client):
+    recorder = RecordingTransport()
+    previous = set_default_transport(recorder)
+    try:
+        client.get_all_devices()
+        set_default_transport(ReplayTransport(recorder.entries))
+        benchmark.group = 'e2e:get_all_devices'
+        devices = benchmark(client.get_all_devices)
+    finally:
+        set_default_transport(previous)
+    assert len(devices) == DEVICE_COUNT
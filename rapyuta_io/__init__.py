@@ -1,9 +1,58 @@
 from __future__ import absolute_import
-from .clients.device import TopicKind, DeviceStatus, TopicQOS, QoS, DeploymentPhaseConstants, ROSDistro
-from .clients.model import Label, Command, DeviceConfig, TopicsStatus
-from rapyuta_io.utils import error
-from .rio_client import Client
-from .clients.device_manager import DeviceArch
-from .clients.user_group import UserGroup
+
+import importlib
 
 __version__ = "3.1.0"
+
+# Public names of the package and the modules defining them. The modules are imported on first access (PEP 562),
+# so that ``import rapyuta_io`` stays cheap for tools that only need part of the SDK.
+_LAZY_ATTRIBUTES = {
+    'TopicKind': '.clients.device',
+    'DeviceStatus': '.clients.device',
+    'TopicQOS': '.clients.device',
+    'QoS': '.clients.device',
+    'DeploymentPhaseConstants': '.clients.device',
+    'ROSDistro': '.clients.device',
+    'Label': '.clients.model',
+    'Command': '.clients.model',
+    'DeviceConfig': '.clients.model',
+    'TopicsStatus': '.clients.model',
+    'Client': '.rio_client',
+    'MultiProjectClient': '.multi_project_client',
+    'DeviceArch': '.clients.device_manager',
+    'UserGroup': '.clients.user_group',
+}
+_LAZY_MODULES = {
+    'error': '.utils.error',
+}
+
+__all__ = sorted(list(_LAZY_ATTRIBUTES) + list(_LAZY_MODULES))
+
+
+def _submodule(package, name):
+    if name.startswith('_'):
+        return None
+    try:
+        return importlib.import_module('.' + name, package)
+    except ModuleNotFoundError as err:
+        if err.name != '{}.{}'.format(package, name):
+            raise
+        return None
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        value = importlib.import_module(_LAZY_MODULES[name], __name__)
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        # Subpackages such as ``rapyuta_io.utils`` were attributes of the package when it imported them eagerly.
+        value = _submodule(__name__, name)
+        if value is None:
+            raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,5 +1,31 @@
-from .device_manager import DeviceManagerClient, DeviceArch
-from .model import *
-from .paramserver import _ParamserverClient
-from .device import Device, ROSDistro
-from .user_group import UserGroup
+import importlib
+
+from rapyuta_io import _submodule
+
+# Names and the modules defining them, imported on first access (PEP 562). Other public names of the model module
+# are resolved from it, as they were exported with ``from .model import *``.
+_LAZY_ATTRIBUTES = {
+    'DeviceManagerClient': '.device_manager',
+    'DeviceArch': '.device_manager',
+    '_ParamserverClient': '.paramserver',
+    'Device': '.device',
+    'ROSDistro': '.device',
+    'UserGroup': '.user_group',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+    else:
+        # Submodules were attributes of the package when it imported them eagerly.
+        submodule = _submodule(__name__, name)
+        if submodule is not None:
+            globals()[name] = submodule
+            return submodule
+        module = importlib.import_module('.model', __name__) if not name.startswith('_') else None
+    if module is None or not hasattr(module, name):
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,229 @@
+# encoding: utf-8
+"""
+Compact, read-only variants of the model classes for large inventories.
+
+The regular models are dictionaries (:py:class:`~rapyuta_io.utils.ObjDict`) or carry a per-instance ``__dict__``.
+The classes below store their fields in ``__slots__`` and cannot be modified. Every class can be converted back to
+its mutable counterpart, e.g. :py:meth:`CompactDevice.to_device`. The metric models are imported on first use.
+"""
+from __future__ import absolute_import
+
+from rapyuta_io.clients.device import Device, DevicePythonVersion, DeviceStatus
+from rapyuta_io.clients.model import DeviceConfig, Label
+
+_MISSING = object()
+
+
+class _CompactModel(object):
+    """
+    Base of the compact models. Fields missing from the source data are left unset, reading them raises
+    AttributeError like it does on the mutable models.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls.__new__(cls)
+        for field in cls._fields:
+            value = data.get(field, _MISSING)
+            if value is not _MISSING:
+                object.__setattr__(obj, field, value)
+        return obj
+
+    def to_dict(self):
+        data = {}
+        for field in self._fields:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                data[field] = value
+        return data
+
+    def __setattr__(self, key, value):
+        raise AttributeError('{} is read-only'.format(type(self).__name__))
+
+    def __delattr__(self, key):
+        raise AttributeError('{} is read-only'.format(type(self).__name__))
+
+    def __reduce__(self):
+        return type(self).from_dict, (self.to_dict(),)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join('{}={!r}'.format(k, v) for k, v in self.to_dict().items())
+        return '{}({})'.format(type(self).__name__, fields)
+
+
+class CompactLabel(_CompactModel):
+    """
+    Read-only :py:class:`~rapyuta_io.clients.model.Label`.
+
+    :ivar id: Integer represents the id of the label
+    :ivar key: Key or label name
+    :ivar value: Value of the label
+    """
+    _fields = ('id', 'key', 'value')
+    __slots__ = _fields
+
+    def to_label(self):
+        return Label(self.to_dict())
+
+
+class CompactDeviceConfig(_CompactModel):
+    """
+    Read-only :py:class:`~rapyuta_io.clients.model.DeviceConfig`.
+
+    :ivar id: Id of the configuration.
+    :ivar key: Configuration key.
+    :ivar value: Value of the configuration key.
+    """
+    _fields = ('id', 'key', 'value')
+    __slots__ = _fields
+
+    def to_device_config(self):
+        return DeviceConfig(self.to_dict())
+
+
+class CompactDevice(_CompactModel):
+    """
+    Read-only :py:class:`~rapyuta_io.clients.device.Device`, returned by
+    :py:meth:`~rapyuta_io.Client.get_all_devices` and :py:meth:`~rapyuta_io.Client.iter_devices` when ``compact``
+    is set. Labels and configuration variables are tuples of :py:class:`CompactLabel` and
+    :py:class:`CompactDeviceConfig`. Fields without a dedicated slot are kept in ``extra`` and can be read as
+    attributes too.
+
+    Use :py:meth:`to_device` to get a full :py:class:`~rapyuta_io.clients.device.Device` that can call the APIs.
+    """
+    _fields = ('uuid', 'name', 'status', 'description', 'username', 'saltversion', 'host', 'registration_time',
+               'last_online', 'created_by', 'lsb_distrib_description', 'ip_interfaces', 'device_version',
+               'fingerprint', 'error_code', 'error_message', 'labels', 'config_variables')
+    __slots__ = _fields + ('extra', '_context')
+    # Device._deserialize discards the deployments of the listing as well.
+    _ignored = frozenset(_fields + ('deployments',))
+
+    @classmethod
+    def from_dict(cls, data, context=None):
+        """
+        :param data: Device as returned by the API.
+        :param context: Tuple of (device api host, auth token, project) given to the devices by :py:meth:`to_device`.
+        """
+        obj = super(CompactDevice, cls).from_dict(data)
+        labels = data.get('labels')
+        if labels:
+            object.__setattr__(obj, 'labels', tuple(CompactLabel.from_dict(label) for label in labels))
+        config_variables = data.get('config_variables')
+        if config_variables:
+            object.__setattr__(obj, 'config_variables',
+                               tuple(CompactDeviceConfig.from_dict(config) for config in config_variables))
+        extra = None
+        for key in data:
+            if key not in cls._ignored:
+                if extra is None:
+                    extra = {}
+                extra[key] = data[key]
+        object.__setattr__(obj, 'extra', extra)
+        object.__setattr__(obj, '_context', context)
+        return obj
+
+    def __getattr__(self, key):
+        # Only called for unset slots and names without a slot.
+        if key == 'extra' or not self.extra or key not in self.extra:
+            raise AttributeError(key)
+        return self.extra[key]
+
+    @property
+    def deviceId(self):
+        return self.uuid
+
+    @property
+    def python_version(self):
+        return DevicePythonVersion(self.device_version)
+
+    def is_online(self):
+        return self.status == DeviceStatus.ONLINE.value
+
+    def to_dict(self):
+        data = super(CompactDevice, self).to_dict()
+        for field in ('labels', 'config_variables'):
+            if isinstance(data.get(field), tuple):
+                data[field] = [item.to_dict() for item in data[field]]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_device(self):
+        """
+        Converts the record to a mutable :py:class:`~rapyuta_io.clients.device.Device`.
+        """
+        device = Device._deserialize(self.to_dict())
+        if self._context is not None:
+            device_api_host, auth_token, project = self._context
+            setattr(device, '_device_api_host', device_api_host)
+            setattr(device, '_auth_token', auth_token)
+            setattr(device, '_project', project)
+        return device
+
+
+class CompactColumn(_CompactModel):
+    """
+    Read-only :py:class:`~rapyuta_io.clients.metrics.Column`.
+    """
+    _fields = ('name', 'function', 'metric_group', 'tag_names', 'tag_values')
+    __slots__ = _fields
+    _functions = None
+
+    @classmethod
+    def from_dict(cls, data):
+        if cls._functions is None:
+            from rapyuta_io.clients.metrics import MetricFunction
+            cls._functions = {function.value: function for function in MetricFunction}
+        obj = super(CompactColumn, cls).from_dict(data)
+        function = cls._functions.get(data.get('function'))
+        if function is not None:
+            object.__setattr__(obj, 'function', function)
+        return obj
+
+    @classmethod
+    def from_column(cls, column):
+        return cls.from_dict(vars(column))
+
+    def to_column(self):
+        from rapyuta_io.clients.metrics import Column
+        return Column.deserialize(self.to_dict())
+
+    def __str__(self):
+        return str(self.to_column())
+
+
+class CompactMetric(_CompactModel):
+    """
+    Read-only :py:class:`~rapyuta_io.clients.metrics.Metric`.
+    """
+    _fields = ('metric_group', 'metric_names')
+    __slots__ = _fields
+
+    def to_metric(self):
+        from rapyuta_io.clients.metrics import Metric
+        return Metric.deserialize(self.to_dict())
+
+
+class CompactTags(_CompactModel):
+    """
+    Read-only :py:class:`~rapyuta_io.clients.metrics.Tags`.
+    """
+    _fields = ('metric_group', 'tags')
+    __slots__ = _fields
+
+    def to_tags(self):
+        from rapyuta_io.clients.metrics import Tags
+        return Tags.deserialize(self.to_dict())
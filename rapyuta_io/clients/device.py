@@ -2,6 +2,8 @@
 from __future__ import absolute_import
 import json
 import subprocess
+import threading
+from collections import OrderedDict
 
 from six.moves.urllib.parse import urlencode
 from time import sleep
@@ -30,6 +32,35 @@ DEVICE_API_ERRORS = {
     404: DeviceNotFoundException
 }
 
+# Number of listings whose device count is kept by a client.
+LISTED_COUNTS_MAX_ENTRIES = 64
+
+
+class _ListedCounts(object):
+    """
+    Number of devices of the last list call of :py:meth:`Device._refresh_many`, keyed by the device api host, auth
+    token and project of the call. The least recently used listings are dropped past ``max_entries``.
+    """
+
+    def __init__(self, max_entries=LISTED_COUNTS_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def set(self, key, count):
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self._max_entries:
+                self._counts.popitem(last=False)
+
 
 class TopicQOS(enum.IntEnum):
     """
@@ -336,12 +367,44 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
 
         setattr(obj, 'deviceId', obj.uuid)
         obj.deployments = []
-        if obj.config_variables:
-            obj.config_variables = [DeviceConfig(to_objdict(config)) for config in obj.config_variables]
-        if obj.labels:
-            obj.labels = [Label(to_objdict(label)) for label in obj.labels]
+        # config_variables and labels are kept as returned by the API and hydrated by _hydrate on first access.
         return obj
 
+    _HYDRATED_FIELDS = {'config_variables': DeviceConfig, 'labels': Label}
+    # LabelIndex of the client the device was fetched by, the label methods and refreshes keep the indexed devices
+    # up to date.
+    _label_index = None
+    # _ListedCounts of the client the device was fetched by.
+    _listed_counts = None
+
+    def __getstate__(self):
+        # The label index and listed counts are shared by the devices of a client, they are not part of the device.
+        state = dict(self.__dict__)
+        state.pop('_label_index', None)
+        state.pop('_listed_counts', None)
+        return state
+
+    def _update_label_index(self):
+        if self._label_index is not None:
+            self._label_index.update_device(self)
+
+    def _hydrate(self, k, value):
+        # A list of plain dictionaries is a collection that has not been accessed yet.
+        if type(value) is list and value and type(value[0]) is dict and k in self._HYDRATED_FIELDS:
+            cls = self._HYDRATED_FIELDS[k]
+            value = [cls(to_objdict(item)) for item in value]
+            dict.__setitem__(self, k, value)
+        return value
+
+    def __getattr__(self, k):
+        return self._hydrate(k, super(Device, self).__getattr__(k))
+
+    def __getitem__(self, k):
+        return self._hydrate(k, dict.__getitem__(self, k))
+
+    def get(self, k, default=None):
+        return self._hydrate(k, dict.get(self, k, default))
+
     def is_online(self):
         if self.status == DeviceStatus.ONLINE.value:
             return True
@@ -475,11 +538,54 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
         """
         url = self._device_api_host + DEVICE_API_PATH + self.uuid
         response = self._execute_api(url, HttpMethod.GET, retry_limit=retry_limit)
-        device_data = get_api_response_data(response)
+        self._refresh_from(get_api_response_data(response))
+
+    @staticmethod
+    def _listing_key(device):
+        return device._device_api_host, device._auth_token, device._project
+
+    @classmethod
+    def _refresh_many_size(cls, devices):
+        listings = {}
+        for device in devices:
+            listings.setdefault(cls._listing_key(device), device._listed_counts)
+        counts = [None if listed_counts is None else listed_counts.get(key)
+                  for key, listed_counts in listings.items()]
+        return None if None in counts else sum(counts)
+
+    @classmethod
+    def _refresh_many(cls, devices):
+        """
+        Updates the devices from one device list call per project. The list API returns partial devices, the
+        fields only available on full devices are kept.
+        """
+        groups = {}
+        for device in devices:
+            groups.setdefault(cls._listing_key(device), []).append(device)
+        errors = {}
+        for key, group in groups.items():
+            url = key[0] + DEVICE_API_PATH
+            response = group[0]._execute_api(url, HttpMethod.GET)
+            listed = {data['uuid']: data for data in get_api_response_data(response)}
+            if group[0]._listed_counts is not None:
+                group[0]._listed_counts.set(key, len(listed))
+            for device in group:
+                data = listed.get(device.uuid)
+                if data is None:
+                    errors[id(device)] = DeviceNotFoundException('device {} not found'.format(device.uuid))
+                    continue
+                partial = cls._deserialize(data)
+                for attr in partial.keys():
+                    device.__setattr__(attr, partial.__getattr__(attr))
+                device._update_label_index()
+        return errors
+
+    def _refresh_from(self, device_data):
         device = Device._deserialize(device_data)
         for attr in device.keys():
             self.__setattr__(attr, device.__getattr__(attr))
         self.is_partial = False
+        self._update_label_index()
 
     def reject_device(self, retry_limit=0):
         self.status = DeviceStatus.REJECTED
@@ -526,6 +632,8 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
             raise DeploymentRunningException()
         delete_status = get_api_response_data(response, True)
         if delete_status[STATUS] == SUCCESS:
+            if self._label_index is not None:
+                self._label_index.remove_device(self.uuid)
             self.clear()
             return True
         return False
@@ -765,7 +873,7 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
             raise DeviceNotFoundException(get_error(response.text))
         device_resp = get_api_response_data(response)
         deployment_list = device_resp['deployments']
-        self.deployments = [to_objdict(dep) for dep in deployment_list]
+        self.deployments = [to_objdict(dep, lazy=True) for dep in deployment_list]
         return self.deployments
 
     def get_labels(self):
@@ -788,6 +896,7 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
         if response.status_code == requests.codes.NOT_FOUND:
             raise DeviceNotFoundException(get_error(response.text))
         self.labels = [Label(to_objdict(label)) for label in get_api_response_data(response)]
+        self._update_label_index()
         return self.labels
 
     def add_label(self, key, value, retry_limit=0):
@@ -816,17 +925,42 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
 
         """
 
-        request_data = dict()
         if not key or not value:
             raise ParameterMissingException()
-        request_data[key] = value
+        return self.add_labels({key: value}, retry_limit)[0]
+
+    def add_labels(self, labels, retry_limit=0):
+        """
+        Add multiple labels to the device in a single API call
+
+        :param labels: label keys mapped to their values
+        :type labels: dict
+        :param retry_limit: Optional parameter to specify the number of retry attempts to be carried out if any failures occur during the API call.
+        :type retry_limit: int
+        :return: list of instances of the class :py:class:`~clients.model.Label`.
+        :raises: :py:class:`~utils.error. DeviceNotFoundException`: If the device is not found.
+        :raises: :py:class:`~utils.error.ParameterMissingException`: If any parameters are missing in the request.
+        :raises: :py:class:`~utils.error.APIError`: If the API call returns an error, the status code
+            is anything other than 200/201
+
+        Following example demonstrates how to add device labels
+
+         >>> from rapyuta_io import Client
+         >>> client = Client(auth_token='auth_token', project="project_guid")
+         >>> device = client.get_device('test_device_id')
+         >>> device.add_labels({'zone': 'warehouse-1', 'fleet': 'amr'})
+
+        """
+        if not labels or not all(key and value for key, value in labels.items()):
+            raise ParameterMissingException()
         url = self._device_api_host + DEVICE_LABEL_API_PATH + self.uuid
-        response = self._execute_api(url, HttpMethod.POST, request_data, retry_limit)
+        response = self._execute_api(url, HttpMethod.POST, dict(labels), retry_limit)
         if response.status_code == requests.codes.BAD_REQUEST:
             raise ParameterMissingException(get_error(response.text))
-        label = Label(to_objdict(get_api_response_data(response)[0]))
-        self.labels.append(label)
-        return label
+        added = [Label(to_objdict(label)) for label in get_api_response_data(response)]
+        self.labels.extend(added)
+        self._update_label_index()
+        return added
 
     def update_label(self, label, retry_limit=0):
         """
@@ -862,6 +996,7 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
             if _label.id == label.id:
                 _label.key = label.key
                 _label.value = label.value
+                self._update_label_index()
                 return _label
         return label
 
@@ -898,6 +1033,7 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
                 if label.id == label_id:
                     self.labels.remove(label)
                     break
+            self._update_label_index()
             return True
         return False
 
@@ -966,7 +1102,7 @@ class Device(PartialMixin, RefreshPollerMixin, ObjDict):
         if not isinstance(topics_info, dict):
             topics_info = json.loads(topics_info)
 
-        topic_status = TopicsStatus(to_objdict(topics_info[TOPICS]))
+        topic_status = TopicsStatus(topics_info[TOPICS])
         topic_status.master_up = topics_info['master_up']
         return topic_status
 
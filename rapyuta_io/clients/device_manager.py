@@ -1,22 +1,36 @@
 # encoding: utf-8
 from __future__ import absolute_import
 
+import contextlib
+import json
 import time
 import typing
+from concurrent import futures
 from enum import Enum
 
 import requests
 
-from rapyuta_io.clients.device import Device, DeviceStatus
-from rapyuta_io.clients.model import Command
+from rapyuta_io.clients.compact import CompactDevice
+from rapyuta_io.clients.device import Device, DeviceStatus, _ListedCounts
+from rapyuta_io.clients.model import BulkItemResult, Command, DeviceConfig, DeviceEvent, Label
 from rapyuta_io.utils import RestClient
-from rapyuta_io.utils.error import ParameterMissingException
-from rapyuta_io.utils.rest_client import HttpMethod
+from rapyuta_io.utils.error import InvalidParameterException, ParameterMissingException
+from rapyuta_io.utils.label_index import LabelIndex
+from rapyuta_io.utils.request_context import ContextThreadPoolExecutor, resolve_auth_token, resolve_project
+from rapyuta_io.utils.rest_client import HttpMethod, get_request_compression
+from rapyuta_io.utils.transport import SessionTransport, Transport, get_transport
 from rapyuta_io.utils.settings import DAEMONS_PATH, DEVICE_API_ADD_DEVICE_PATH, DEVICE_API_PATH, \
     DEVICE_COMMAND_API_PATH, DEVICE_SELECTION_API_PATH, PARAMETERS_API_PATH
 from rapyuta_io.utils.utils import create_auth_header, get_api_response_data, get_error, prepend_bearer_to_auth_token, \
     validate_list_of_strings
 
+BULK_MAX_WORKERS = 15
+
+
+def validate_list_of_devices(devices):
+    if not isinstance(devices, list) or not all(isinstance(device, Device) for device in devices):
+        raise InvalidParameterException('devices must be a list of rapyuta_io.clients.device.Device')
+
 
 class DeviceArch(str, Enum):
     """
@@ -31,20 +45,91 @@ class DeviceArch(str, Enum):
     AMD64 = 'amd64'
 
 
+class _DeviceWatch(object):
+    """
+    Snapshot of the device list kept by :py:meth:`DeviceManagerClient.watch_devices`. Devices are compared by uuid
+    on their status, labels and a hash of the other watched ``fields``. Compact devices are only built for the
+    devices that changed.
+    """
+
+    def __init__(self, context, fields=None):
+        self._context = context
+        self._fields = sorted(set(fields or ()) - {'uuid', 'status', 'labels'})
+        self._snapshot = {}
+        self.initialized = False
+
+    def _fingerprint(self, data):
+        labels = frozenset((label.get('key'), label.get('value')) for label in data.get('labels') or ())
+        others = None
+        if self._fields:
+            others = json.dumps([data.get(field) for field in self._fields], sort_keys=True, default=str)
+        return data.get('status'), labels, others
+
+    def _device(self, data):
+        return CompactDevice.from_dict(data, self._context)
+
+    def diff(self, device_list):
+        events = []
+        snapshot = {}
+        for data in device_list:
+            uuid = data['uuid']
+            fingerprint = self._fingerprint(data)
+            snapshot[uuid] = (fingerprint, data)
+            seen = self._snapshot.get(uuid)
+            if seen is None:
+                events.append(DeviceEvent(DeviceEvent.ADDED, uuid, self._device(data)))
+                continue
+            previous_fingerprint, previous_data = seen
+            if fingerprint == previous_fingerprint:
+                continue
+            device, previous = self._device(data), self._device(previous_data)
+            for event_type, old, new in zip((DeviceEvent.STATUS_CHANGED, DeviceEvent.LABELS_CHANGED,
+                                             DeviceEvent.UPDATED), previous_fingerprint, fingerprint):
+                if old != new:
+                    events.append(DeviceEvent(event_type, uuid, device, previous))
+        for uuid, (_, data) in self._snapshot.items():
+            if uuid not in snapshot:
+                events.append(DeviceEvent(DeviceEvent.REMOVED, uuid, self._device(data), self._device(data)))
+        self._snapshot = snapshot
+        self.initialized = True
+        return events
+
+
 class DeviceManagerClient:
 
     def __init__(self, auth_token, project, device_api_host):
         self._device_api_host = device_api_host
         self._auth_token = prepend_bearer_to_auth_token(auth_token)
         self._project = project
-
-    def _add_auth_token_to_devices(self, devices):
+        self._label_index = LabelIndex()
+        self._label_index_loaded = False
+        self._listed_counts = _ListedCounts()
+
+    def _context(self):
+        # Host, auth token and project of the requests, following the request context.
+        return self._device_api_host, resolve_auth_token(self._auth_token), resolve_project(self._project)
+
+    def _owns_context(self):
+        # The label index only holds the devices of the project and token of the client.
+        return self._context() == (self._device_api_host, self._auth_token, self._project)
+
+    def _auth_header(self):
+        _, auth_token, project = self._context()
+        return create_auth_header(auth_token, project)
+
+    def _add_auth_token_to_devices(self, devices, label_index=None):
+        device_api_host, auth_token, project = self._context()
+        if label_index is None:
+            label_index = self._label_index if self._owns_context() else None
         for device in devices:
-            setattr(device, '_device_api_host', self._device_api_host)
-            setattr(device, '_auth_token', self._auth_token)
-            setattr(device, '_project', self._project)
-
-    def _get_device(self, device_id=None, retry_limit=0, device_name=None):
+            setattr(device, '_device_api_host', device_api_host)
+            setattr(device, '_auth_token', auth_token)
+            setattr(device, '_project', project)
+            if isinstance(device, Device):
+                setattr(device, '_label_index', label_index)
+                setattr(device, '_listed_counts', self._listed_counts)
+
+    def _get_device(self, device_id=None, retry_limit=0, device_name=None, transport=None):
         url = self._device_api_host + DEVICE_API_PATH
         if device_id:
             url = url + device_id
@@ -53,8 +138,9 @@ class DeviceManagerClient:
         if device_name is not None:
             query = {"name": device_name}
 
-        headers = create_auth_header(self._auth_token, self._project)
-        response = RestClient(url).retry(retry_limit).headers(headers).query_param(query_param=query).execute()
+        headers = self._auth_header()
+        response = RestClient(url).retry(retry_limit).headers(headers).query_param(query_param=query) \
+            .transport(transport).execute()
         return get_api_response_data(response)
 
     @staticmethod
@@ -71,7 +157,7 @@ class DeviceManagerClient:
 
     def _device_selection_by_arch(self, arch_list, retry_limit):
         url = self._device_api_host + DEVICE_SELECTION_API_PATH
-        headers = create_auth_header(self._auth_token, self._project)
+        headers = self._auth_header()
         payload = self._get_specs_cpuarch_query(arch_list)
         response = RestClient(url).method(HttpMethod.POST).retry(retry_limit) \
             .headers(headers).execute(payload=payload)
@@ -79,8 +165,31 @@ class DeviceManagerClient:
 
     def set_project(self, project):
         self._project = project
+        self._label_index = LabelIndex()
+        self._label_index_loaded = False
 
-    def device_list(self, online_device=False, arch_list=None, retry_limit=0, device_name=None):
+    @staticmethod
+    def _projected_fields(fields, online_device):
+        validate_list_of_strings(fields, 'fields')
+        # uuid is needed to build a Device, status to filter the online ones.
+        projected = {'uuid'}
+        if online_device:
+            projected.add('status')
+        for field in fields:
+            projected.add('device_version' if field == 'python_version' else field)
+        return projected
+
+    def device_list(self, online_device=False, arch_list=None, retry_limit=0, device_name=None, compact=False,
+                    fields=None):
+        return list(self.iter_devices(online_device, arch_list, retry_limit, device_name, compact, fields))
+
+    def iter_devices(self, online_device=False, arch_list=None, retry_limit=0, device_name=None, compact=False,
+                     fields=None):
+        if fields is not None:
+            fields = self._projected_fields(fields, online_device)
+        return self._iter_devices(online_device, arch_list, retry_limit, device_name, compact, fields)
+
+    def _iter_devices(self, online_device, arch_list, retry_limit, device_name, compact, fields):
         arch_filtered_uuids = set()
         if arch_list:
             for device in self._device_selection_by_arch(arch_list, retry_limit):
@@ -88,17 +197,22 @@ class DeviceManagerClient:
 
         # TODO(shivam): if arch_list is set there's no need for _get_device all
         device_list = self._get_device(retry_limit=retry_limit, device_name=device_name)
-        devices = []
+        context = self._context()
         # todo: add a generic filter like status, name etc
         for device in device_list:
-            device = Device._deserialize(device)
+            if fields is not None:
+                device = {k: v for k, v in device.items() if k in fields}
+            if compact:
+                device = CompactDevice.from_dict(device, context)
+            else:
+                device = Device._deserialize(device)
             if online_device and device.status != DeviceStatus.ONLINE.value:
                 continue
             if arch_list and device.uuid not in arch_filtered_uuids:
                 continue
-            devices.append(device)
-        self._add_auth_token_to_devices(devices)
-        return devices
+            if not compact:
+                self._add_auth_token_to_devices([device])
+            yield device
 
     def get_device(self, device_id, retry_limit):
         device_data = self._get_device(device_id, retry_limit)
@@ -111,30 +225,350 @@ class DeviceManagerClient:
         validate_list_of_strings(device_list, 'device_list')
         if tree_names:
             validate_list_of_strings(tree_names, 'tree_names')
+        return self._apply_parameters(device_list, tree_names, retry_limit)
 
+    def _apply_parameters(self, device_list, tree_names, retry_limit, transport=None):
         url = self._device_api_host + PARAMETERS_API_PATH
-        headers = create_auth_header(self._auth_token, self._project)
+        headers = self._auth_header()
         payload = {'device_list': device_list}
         if tree_names:
             payload['tree_names'] = tree_names
         response = RestClient(url).method(HttpMethod.POST).retry(retry_limit) \
-            .headers(headers).execute(payload=payload)
+            .headers(headers).compress(get_request_compression()).transport(transport).execute(payload=payload)
         return get_api_response_data(response)
 
+    @staticmethod
+    def _validate_apply_parameters(device_list, tree_names, batch_size, max_workers, retries):
+        validate_list_of_strings(device_list, 'device_list')
+        if tree_names:
+            validate_list_of_strings(tree_names, 'tree_names')
+        for name, value, minimum in (('batch_size', batch_size, 1), ('max_workers', max_workers, 1),
+                                     ('retries', retries, 0)):
+            if not isinstance(value, int) or value < minimum:
+                raise InvalidParameterException('{} must be an integer of at least {}'.format(name, minimum))
+        # Duplicates would be applied twice and reported once.
+        return list(dict.fromkeys(device_list))
+
+    @staticmethod
+    def _batches(device_list, batch_size):
+        return [device_list[i:i + batch_size] for i in range(0, len(device_list), batch_size)]
+
+    @staticmethod
+    def _batch_results(batch, data, error):
+        # Every device of a failed call failed, devices missing from the response are reported as failed.
+        if error is not None:
+            return [{'device_id': device_id, 'success': False, 'error': str(error)} for device_id in batch]
+        by_id = {result.get('device_id'): result for result in data or ()}
+        results = []
+        for device_id in batch:
+            result = by_id.get(device_id)
+            if result is None:
+                result = {'device_id': device_id, 'success': False, 'error': 'device missing from the response'}
+            else:
+                result = dict(result, success=bool(result.get('success')))
+                result.setdefault('error', None)
+            results.append(result)
+        return results
+
+    def iter_apply_parameters(self, device_list, tree_names=None, retry_limit=0, batch_size=50, max_workers=4,
+                              retries=1):
+        device_list = self._validate_apply_parameters(device_list, tree_names, batch_size, max_workers, retries)
+        return self._iter_apply_parameters(device_list, tree_names, retry_limit, batch_size, max_workers, retries)
+
+    def _iter_apply_parameters(self, device_list, tree_names, retry_limit, batch_size, max_workers, retries):
+        pending = device_list
+        with self._pooled_transport(max_workers) as transport, self._detached_executor(max_workers) as executor:
+            for attempt in range(retries + 1):
+                batches = {executor.submit(self._apply_parameters, batch, tree_names, retry_limit, transport): batch
+                           for batch in self._batches(pending, batch_size)}
+                failed = []
+                for future in futures.as_completed(batches):
+                    try:
+                        data, error = future.result(), None
+                    except Exception as err:
+                        data, error = None, err
+                    for result in self._batch_results(batches[future], data, error):
+                        if result['success'] or attempt == retries:
+                            yield result
+                        else:
+                            failed.append(result['device_id'])
+                if not failed:
+                    return
+                pending = failed
+
+    def iter_apply_parameters_async(self, device_list, tree_names=None, retry_limit=0, batch_size=50,
+                                    max_workers=4, retries=1):
+        device_list = self._validate_apply_parameters(device_list, tree_names, batch_size, max_workers, retries)
+        return self._iter_apply_parameters_async(device_list, tree_names, retry_limit, batch_size, max_workers,
+                                                 retries)
+
+    async def _iter_apply_parameters_async(self, device_list, tree_names, retry_limit, batch_size, max_workers,
+                                           retries):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        pending = device_list
+        with self._pooled_transport(max_workers) as transport, self._detached_executor(max_workers) as executor:
+
+            async def apply(batch):
+                try:
+                    data = await loop.run_in_executor(executor, self._apply_parameters, batch, tree_names,
+                                                      retry_limit, transport)
+                    return batch, data, None
+                except Exception as err:
+                    return batch, None, err
+
+            for attempt in range(retries + 1):
+                failed = []
+                for done in asyncio.as_completed([apply(batch) for batch in self._batches(pending, batch_size)]):
+                    for result in self._batch_results(*(await done)):
+                        if result['success'] or attempt == retries:
+                            yield result
+                        else:
+                            failed.append(result['device_id'])
+                if not failed:
+                    return
+                pending = failed
+
+    @staticmethod
+    def _validate_bulk_request(devices, items, parameter_name):
+        validate_list_of_devices(devices)
+        if not isinstance(items, dict) or not items:
+            raise InvalidParameterException('{} must be a non-empty dict'.format(parameter_name))
+        for key, value in items.items():
+            if not key or not isinstance(key, str) or not (value is None or isinstance(value, str)):
+                raise InvalidParameterException('{} must map non-empty strings to strings or None'.format(
+                    parameter_name))
+
+    @staticmethod
+    def _bulk_call(device, key, operation, fn, *args):
+        try:
+            return BulkItemResult(device.uuid, key, operation, result=fn(*args))
+        except Exception as err:
+            return BulkItemResult(device.uuid, key, operation, error=err)
+
+    @staticmethod
+    def _run_bulk(devices, fn, max_workers):
+        results = []
+        with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+            for device_results in executor.map(fn, devices):
+                results.extend(device_results)
+        return results
+
+    def _update_device_labels(self, device, labels, retry_limit):
+        try:
+            current = device.get('labels')
+            if current is None:
+                current = device.get_labels()
+        except Exception as err:
+            return [BulkItemResult(device.uuid, key, None, error=err) for key in labels]
+        existing = {label.key: label for label in current}
+        results = {}
+        to_add = {}
+        for key, value in labels.items():
+            label = existing.get(key)
+            if label is None and value is None:
+                results[key] = BulkItemResult(device.uuid, key, BulkItemResult.UNCHANGED)
+            elif label is None:
+                to_add[key] = value
+            elif value is None:
+                results[key] = self._bulk_call(device, key, BulkItemResult.DELETE, device.delete_label, label.id,
+                                               retry_limit)
+            elif label.value == value:
+                results[key] = BulkItemResult(device.uuid, key, BulkItemResult.UNCHANGED, result=label)
+            else:
+                updated = Label(label)
+                updated.value = value
+                results[key] = self._bulk_call(device, key, BulkItemResult.UPDATE, device.update_label, updated,
+                                               retry_limit)
+        if to_add:
+            # The labels API creates all the labels of a device in one call.
+            try:
+                added = {label.key: label for label in device.add_labels(to_add, retry_limit)}
+                for key in to_add:
+                    results[key] = BulkItemResult(device.uuid, key, BulkItemResult.ADD, result=added.get(key))
+            except Exception as err:
+                for key in to_add:
+                    results[key] = BulkItemResult(device.uuid, key, BulkItemResult.ADD, error=err)
+        return [results[key] for key in labels]
+
+    def _set_device_config_variables(self, device, config_variables, retry_limit):
+        try:
+            current = device.get('config_variables')
+            if current is None:
+                current = device.get_config_variables()
+        except Exception as err:
+            return [BulkItemResult(device.uuid, key, None, error=err) for key in config_variables]
+        existing = {config.key: config for config in current}
+        results = []
+        for key, value in config_variables.items():
+            config = existing.get(key)
+            if config is None and value is None:
+                results.append(BulkItemResult(device.uuid, key, BulkItemResult.UNCHANGED))
+            elif config is None:
+                results.append(self._bulk_call(device, key, BulkItemResult.ADD, device.add_config_variable, key,
+                                               value))
+            elif value is None:
+                results.append(self._bulk_call(device, key, BulkItemResult.DELETE, device.delete_config_variable,
+                                               config.id, retry_limit))
+            elif config.value == value:
+                results.append(BulkItemResult(device.uuid, key, BulkItemResult.UNCHANGED, result=config))
+            else:
+                updated = DeviceConfig(config)
+                updated.value = value
+                results.append(self._bulk_call(device, key, BulkItemResult.UPDATE, device.update_config_variable,
+                                               updated))
+        return results
+
+    def bulk_update_labels(self, devices, labels, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        self._validate_bulk_request(devices, labels, 'labels')
+        return self._run_bulk(devices, lambda device: self._update_device_labels(device, labels, retry_limit),
+                              max_workers)
+
+    def bulk_set_config_variables(self, devices, config_variables, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        self._validate_bulk_request(devices, config_variables, 'config_variables')
+        return self._run_bulk(
+            devices, lambda device: self._set_device_config_variables(device, config_variables, retry_limit),
+            max_workers)
+
+    @staticmethod
+    def _refresh_device(device, transport, retry_limit):
+        url = device._device_api_host + DEVICE_API_PATH + device.uuid
+        headers = create_auth_header(device._auth_token, device._project)
+        try:
+            response = RestClient(url).retry(retry_limit).headers(headers).transport(transport).execute()
+            device._refresh_from(get_api_response_data(response))
+        except Exception as err:
+            return BulkItemResult(device.uuid, None, BulkItemResult.REFRESH, error=err)
+        return BulkItemResult(device.uuid, None, BulkItemResult.REFRESH, result=device)
+
+    @contextlib.contextmanager
+    def _pooled_transport(self, max_workers):
+        # A configured transport (cache, coalescing, ...) is kept, the plain one is replaced by a session so that
+        # the workers reuse their connections.
+        transport = get_transport()
+        if type(transport) is not Transport:
+            yield transport
+            return
+        transport = SessionTransport(pool_maxsize=max_workers)
+        try:
+            yield transport
+        finally:
+            transport.close()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _detached_executor(max_workers):
+        # Leaving the block does not wait for the workers, that would block the caller closing a generator early, or
+        # the event loop when a coroutine is cancelled. The calls that have not started are cancelled instead.
+        executor = ContextThreadPoolExecutor(max_workers=max_workers)
+        try:
+            yield executor
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def refresh_devices(self, devices, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        validate_list_of_devices(devices)
+        with self._pooled_transport(max_workers) as transport, \
+                ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda device: self._refresh_device(device, transport, retry_limit), devices))
+
+    async def refresh_devices_async(self, devices, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        validate_list_of_devices(devices)
+        import asyncio
+        loop = asyncio.get_running_loop()
+        with self._pooled_transport(max_workers) as transport, self._detached_executor(max_workers) as executor:
+            return await asyncio.gather(*[
+                loop.run_in_executor(executor, self._refresh_device, device, transport, retry_limit)
+                for device in devices])
+
+    def load_inventory(self, devices):
+        # The devices stand for the whole inventory until find_devices is asked to refresh it. They are indexed
+        # aside and the index is swapped in at once, lookups running meanwhile use the previous one. Devices of
+        # another project or token get their own index, the one of the client is left as it is.
+        owned = self._owns_context()
+        label_index = LabelIndex()
+        self._add_auth_token_to_devices(devices, label_index if owned else None)
+        label_index.replace(devices)
+        if owned:
+            self._label_index = label_index
+            self._label_index_loaded = True
+        return label_index
+
+    def find_devices(self, labels, match_all=True, refresh=False, retry_limit=0):
+        if not isinstance(labels, dict) or not labels:
+            raise InvalidParameterException('labels must be a non-empty dictionary')
+        if not self._owns_context():
+            # Devices of another project or token are looked up in a listing, they are not kept.
+            index = LabelIndex(self._iter_devices(False, None, retry_limit, None, False, None))
+            return index.find(labels, match_all)
+        if refresh or not self._label_index_loaded:
+            self.load_inventory(list(self._iter_devices(False, None, retry_limit, None, False, None)))
+        return self._label_index.find(labels, match_all)
+
+    def _device_watch(self, interval, max_interval, backoff, fields):
+        if fields is not None:
+            validate_list_of_strings(fields, 'fields')
+        if interval <= 0 or max_interval < interval or backoff < 1:
+            raise InvalidParameterException('interval must be positive, max_interval at least interval and '
+                                            'backoff at least 1')
+        return _DeviceWatch(self._context(), fields)
+
+    @staticmethod
+    def _next_interval(watch_interval, events, interval, max_interval, backoff):
+        return interval if events else min(watch_interval * backoff, max_interval)
+
+    def watch_devices(self, interval=10, max_interval=60, backoff=2, fields=None, initial_events=True,
+                      retry_limit=0):
+        watch = self._device_watch(interval, max_interval, backoff, fields)
+        return self._watch_devices(watch, interval, max_interval, backoff, initial_events, retry_limit)
+
+    def _watch_devices(self, watch, interval, max_interval, backoff, initial_events, retry_limit):
+        watch_interval = interval
+        with self._pooled_transport(1) as transport:
+            while True:
+                initialized = watch.initialized
+                events = watch.diff(self._get_device(retry_limit=retry_limit, transport=transport))
+                if initialized or initial_events:
+                    for event in events:
+                        yield event
+                watch_interval = self._next_interval(watch_interval, events, interval, max_interval, backoff)
+                time.sleep(watch_interval)
+
+    def watch_devices_async(self, interval=10, max_interval=60, backoff=2, fields=None, initial_events=True,
+                            retry_limit=0):
+        watch = self._device_watch(interval, max_interval, backoff, fields)
+        return self._watch_devices_async(watch, interval, max_interval, backoff, initial_events, retry_limit)
+
+    async def _watch_devices_async(self, watch, interval, max_interval, backoff, initial_events, retry_limit):
+        import asyncio
+        watch_interval = interval
+        with self._pooled_transport(1) as transport:
+            while True:
+                initialized = watch.initialized
+                # to_thread runs the call in the context of the task.
+                device_list = await asyncio.to_thread(self._get_device, retry_limit=retry_limit,
+                                                      transport=transport)
+                events = watch.diff(device_list)
+                if initialized or initial_events:
+                    for event in events:
+                        yield event
+                watch_interval = self._next_interval(watch_interval, events, interval, max_interval, backoff)
+                await asyncio.sleep(watch_interval)
+
     def create_device(self, device):
         url = self._device_api_host + DEVICE_API_ADD_DEVICE_PATH
-        headers = create_auth_header(self._auth_token, self._project)
+        headers = self._auth_header()
         response = RestClient(url).method(HttpMethod.POST).headers(headers).execute(payload=device._serialize())
         return get_api_response_data(response, parse_full=True)
 
     def delete_device(self, device_id):
         url = self._device_api_host + DEVICE_API_PATH + device_id
-        headers = create_auth_header(self._auth_token, self._project)
+        headers = self._auth_header()
         return RestClient(url).method(HttpMethod.DELETE).headers(headers).execute()
 
     def patch_daemons(self, device_id, payload):
         url = self._device_api_host + DEVICE_API_PATH + device_id + DAEMONS_PATH
-        headers = create_auth_header(self._auth_token, self._project)
+        headers = self._auth_header()
         response = RestClient(url).method(HttpMethod.PATCH).headers(headers).execute(payload=payload)
         return get_api_response_data(response, parse_full=True)
 
@@ -173,7 +607,7 @@ class DeviceManagerClient:
         rc = (
             RestClient(url)
             .method(HttpMethod.POST)
-            .headers(create_auth_header(self._auth_token, self._project))
+            .headers(self._auth_header())
         )
         response = rc.retry(retry_limit).execute(payload=command.to_json())
         if response.status_code == requests.codes.BAD_REQUEST:
@@ -198,7 +632,7 @@ class DeviceManagerClient:
             response = (
                 RestClient(url)
                 .method(HttpMethod.GET)
-                .headers(create_auth_header(self._auth_token, self._project))
+                .headers(self._auth_header())
                 .query_param(query_param=query)
                 .execute()
             )
@@ -3,7 +3,6 @@ from datetime import datetime, timedelta
 
 import enum
 import six
-import pytz
 
 from rapyuta_io.utils.error import InvalidParameterException
 from rapyuta_io.utils.object_converter import ObjBase, enum_field, list_field
@@ -13,6 +12,7 @@ from rapyuta_io.utils.utils import valid_list_elements
 def _use_clickhouse(start_datetime):
     use_clickhouse_window = timedelta(days=7)
     if start_datetime.tzinfo:
+        import pytz
         interval = datetime.now(tz=pytz.UTC) - start_datetime.astimezone(tz=pytz.UTC)
     else:
         interval = datetime.now() - start_datetime
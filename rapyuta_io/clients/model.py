@@ -5,9 +5,8 @@ import re
 import six
 from time import mktime
 from datetime import datetime
-from dateutil.parser import parse
 
-from rapyuta_io.utils import ObjDict, InvalidCommandException, InvalidParameterException
+from rapyuta_io.utils import ObjDict, LazyObjDict, InvalidCommandException, InvalidParameterException
 from rapyuta_io.utils.object_converter import ObjBase
 from rapyuta_io.utils.settings import ENV_VAR_REGEX_PATTERN, SHARED_URL_PATH
 from rapyuta_io.utils.utils import is_empty
@@ -15,6 +14,14 @@ from rapyuta_io.utils.utils import is_empty
 DEFAULT_LOG_UPLOAD_BANDWIDTH = 1 * 1024 * 1024
 
 
+def _parse_datetime(data):
+    if data is None:
+        return None
+    # dateutil is imported on first use, it is only needed by a few responses.
+    from dateutil.parser import parse
+    return parse(data)
+
+
 class DeviceConfig(ObjDict):
     """
     DeviceConfig class represents configuration of a device. Member variables of the class
@@ -110,7 +117,7 @@ class Command(ObjDict):
         return ret
 
 
-class TopicsStatus(ObjDict):
+class TopicsStatus(LazyObjDict):
     """
     Topic class represents the status - subscribed and unsubscribed - for logs and metrics
 
@@ -121,7 +128,7 @@ class TopicsStatus(ObjDict):
      """
 
     def __init__(self, *args, **kwargs):
-        super(ObjDict, self).__init__(*args, **kwargs)
+        super(TopicsStatus, self).__init__(*args, **kwargs)
 
 
 class Label(ObjDict):
@@ -137,6 +144,118 @@ class Label(ObjDict):
         super(ObjDict, self).__init__(*args, **kwargs)
 
 
+class BulkItemResult(ObjDict):
+    """
+    Outcome of one item of a bulk device operation, e.g. :py:meth:`~rapyuta_io.Client.bulk_update_labels`.
+
+    :ivar device_id: Id of the device.
+    :ivar key: Label or configuration variable key, None for refreshes.
+    :ivar operation: One of `add`, `update`, `delete`, `unchanged` or `refresh`.
+    :ivar result: The resulting :py:class:`Label`/:py:class:`DeviceConfig`, or the return value of the delete call.
+    :ivar error: Exception raised by the operation, None if it succeeded.
+    """
+    ADD = 'add'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    UNCHANGED = 'unchanged'
+    REFRESH = 'refresh'
+
+    def __init__(self, device_id, key, operation, result=None, error=None):
+        super(ObjDict, self).__init__()
+        self.device_id = device_id
+        self.key = key
+        self.operation = operation
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None and self.result is not False
+
+
+class ProjectResult(ObjDict):
+    """
+    Outcome of an operation in one project of a :py:class:`~rapyuta_io.multi_project_client.MultiProjectClient`.
+
+    :ivar project: GUID of the project.
+    :ivar result: Return value of the operation.
+    :ivar error: Exception raised by the operation, None if it succeeded.
+    """
+
+    def __init__(self, project, result=None, error=None):
+        super(ObjDict, self).__init__()
+        self.project = project
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class DeviceEvent(ObjDict):
+    """
+    Change of a device seen by :py:meth:`~rapyuta_io.Client.watch_devices`.
+
+    :ivar type: One of `added`, `removed`, `status_changed`, `labels_changed` or `updated`.
+    :ivar device_id: Id of the device.
+    :ivar device: The device as :py:class:`~rapyuta_io.clients.compact.CompactDevice`, the last seen one for
+        `removed` events.
+    :ivar previous: The device before the change, None for `added` events.
+    """
+    ADDED = 'added'
+    REMOVED = 'removed'
+    STATUS_CHANGED = 'status_changed'
+    LABELS_CHANGED = 'labels_changed'
+    UPDATED = 'updated'
+
+    def __init__(self, type, device_id, device, previous=None):
+        super(ObjDict, self).__init__()
+        self.type = type
+        self.device_id = device_id
+        self.device = device
+        self.previous = previous
+
+
+class RolloutEvent(ObjDict):
+    """
+    Progress of a configuration rollout, see :py:meth:`~rapyuta_io.Client.rollout_configurations`.
+
+    :ivar stage: One of `upload`, `apply`, `verify` or `rollout`, the last event of a rollout being a `rollout`
+        one.
+    :ivar status: One of `started`, `succeeded`, `failed` or `aborted`.
+    :ivar device_id: Id of the device for per-device events, None otherwise.
+    :ivar wave: Index of the device wave, None for the upload and rollout events.
+    :ivar duration: Seconds the stage took for the device, wave or whole rollout, None for `started` events.
+    :ivar error: Error of a `failed` event.
+    :ivar result: Return value of the verification, or the summary of the rollout with the applied, verified and
+        failed device ids and the time spent in each stage.
+    """
+    UPLOAD = 'upload'
+    APPLY = 'apply'
+    VERIFY = 'verify'
+    ROLLOUT = 'rollout'
+
+    STARTED = 'started'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    ABORTED = 'aborted'
+
+    def __init__(self, stage, status, device_id=None, wave=None, duration=None, error=None, result=None):
+        super(ObjDict, self).__init__()
+        self.stage = stage
+        self.status = status
+        self.device_id = device_id
+        self.wave = wave
+        self.duration = duration
+        self.error = error
+        self.result = result
+
+    @property
+    def ok(self):
+        return self.status not in (self.FAILED, self.ABORTED)
+
+
 class Metric(ObjDict):
     """
     Class represents current status of subscription of the metric
@@ -273,7 +392,7 @@ class SharedURL(ObjBase):
 
     def get_deserialize_map(self):
         return {
-            'expiry_time': ('expiry_time', lambda data: parse(data) if data is not None else None),
+            'expiry_time': ('expiry_time', _parse_datetime),
             'created_at': 'created_at',
             'creator': 'creator',
             'url_uuid': 'url_uuid'
@@ -16,7 +16,8 @@ import six
 
 from rapyuta_io.utils import RestClient, InvalidParameterException, ConfigNotFoundException
 from rapyuta_io.utils.error import InvalidJSONError, InvalidYAMLError, UploadError
-from rapyuta_io.utils.rest_client import HttpMethod
+from rapyuta_io.utils.request_context import ContextThreadPoolExecutor, resolve_auth_token, resolve_project
+from rapyuta_io.utils.rest_client import HttpMethod, get_request_compression
 from rapyuta_io.utils.settings import PARAMSERVER_API_TREE_PATH, PARAMSERVER_API_TREEBLOBS_PATH, \
     PARAMSERVER_API_BINARYFILENODE_PATH
 from rapyuta_io.utils.storage import UploadOptions, new_anonymous_azure
@@ -51,12 +52,17 @@ class _ParamserverClient:
     max_non_binary_size = 128 * 1024
 
     def __init__(self, auth_token, project, core_api_host):
-        self._auth_token = auth_token
-        self._headers = create_auth_header(prepend_bearer_to_auth_token(auth_token), project)
+        self._auth_token = prepend_bearer_to_auth_token(auth_token)
+        self._project = project
         self._core_api_host = core_api_host
 
+    @property
+    def _headers(self):
+        # Built per request, so that they follow the request context.
+        return create_auth_header(resolve_auth_token(self._auth_token), resolve_project(self._project))
+
     def set_project(self, project_guid):
-        self._headers = create_auth_header(prepend_bearer_to_auth_token(self._auth_token), project_guid)
+        self._project = project_guid
 
     @staticmethod
     def get_md5_checksum(data):
@@ -68,7 +74,8 @@ class _ParamserverClient:
         content_type = content_type if content_type else self.yaml_content_type
         url = self._core_api_host + PARAMSERVER_API_TREE_PATH + tree_path
         payload = {'type': _Node.File, 'data': filedata, 'contentType': content_type}
-        response = RestClient(url).method(HttpMethod.PUT).headers(self._headers).retry(retry_limit).execute(payload)
+        response = RestClient(url).method(HttpMethod.PUT).headers(self._headers).retry(retry_limit) \
+            .compress(get_request_compression()).execute(payload)
         return get_api_response_data(response, parse_full=True)
 
     def create_binary_file(self, tree_path, file_path, retry_limit=0):
@@ -275,7 +282,7 @@ class _ParamserverClient:
 
     def upload_configurations(self, rootdir, tree_names, delete_existing_trees, as_folder=False):
         self.validate_args(rootdir, tree_names, delete_existing_trees, as_folder)
-        with futures.ThreadPoolExecutor(max_workers=15) as executor:
+        with ContextThreadPoolExecutor(max_workers=15) as executor:
             dir_futures = self.process_root_dir(executor, rootdir, tree_names, delete_existing_trees)
             file_futures = {}
             done = futures.wait(dir_futures, return_when=futures.FIRST_COMPLETED).done
@@ -383,7 +390,7 @@ class _ParamserverClient:
         blob_temp_dir = tempfile.mkdtemp()
 
         blob_files = self.get_blob_data(api_tree_names)
-        with futures.ThreadPoolExecutor(max_workers=15) as executor:
+        with ContextThreadPoolExecutor(max_workers=15) as executor:
             blobs = blob_files.pop('blobRefs')
             blob_futures = {}
             for blob in blobs:
@@ -399,7 +406,7 @@ class _ParamserverClient:
                     exc.tree_path = None
                     raise exc
 
-        with futures.ThreadPoolExecutor(max_workers=15) as executor:
+        with ContextThreadPoolExecutor(max_workers=15) as executor:
             tree_futures = {}
             for tree_name in api_tree_names:
                 future = executor.submit(self.download_tree, tree_name, rootdir, delete_existing_trees, blob_temp_dir)
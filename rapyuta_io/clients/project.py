@@ -30,6 +30,7 @@ class Project(ObjBase):
     :vartype creator: str
     :ivar users: Users that have access to the Project
     """
+    _dynamic_serialize_map = True
 
     def __init__(self, name, organization_guid=None):
         self.validate(name, organization_guid)
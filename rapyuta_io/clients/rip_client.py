@@ -16,6 +16,14 @@ class AuthTokenLevel(str, enum.Enum):
     HIGH = "high"
 
 
+# Validity of the tokens of each level, in seconds.
+TOKEN_LIFETIMES = {
+    AuthTokenLevel.LOW: 24 * 60 * 60,
+    AuthTokenLevel.MED: 7 * 24 * 60 * 60,
+    AuthTokenLevel.HIGH: 90 * 24 * 60 * 60,
+}
+
+
 class RIPClient:
     AUTH_TOKEN_PATH = '/user/login'
 
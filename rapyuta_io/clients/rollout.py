@@ -0,0 +1,189 @@
+# encoding: utf-8
+"""
+Configuration rollouts, see :py:meth:`~rapyuta_io.Client.rollout_configurations`.
+
+A rollout uploads the configuration trees, then applies them to the devices wave after wave. Every device is
+verified as soon as its parameters are applied, while the next devices are being applied, so that the stages
+overlap instead of each one waiting for the previous one to finish for the whole fleet.
+"""
+from __future__ import absolute_import
+
+import copy
+import time
+from concurrent import futures
+
+from rapyuta_io.clients.model import Command, RolloutEvent
+from rapyuta_io.utils.error import InvalidParameterException
+from rapyuta_io.utils.request_context import ContextThreadPoolExecutor
+
+
+def _verifier(device_manager, verify):
+    if verify is None or callable(verify):
+        return verify
+    if isinstance(verify, Command):
+        verify.validate()
+        if verify.bg:
+            raise InvalidParameterException('verify must not be a background Command, it returns before running')
+
+        def execute(device_id):
+            # execute_command sets the device ids on the command, every device gets its own copy.
+            command = copy.deepcopy(verify)
+            result = device_manager.execute_command([device_id], command)
+            if command.run_async and isinstance(result, dict) and result.get('jid'):
+                result = device_manager.fetch_cmd_result(result['jid'], [device_id], timeout=command.timeout)
+            # The output of the command is the result of the device, a device without one was not verified.
+            if not isinstance(result, dict) or device_id not in result:
+                return False
+            return result[device_id]
+
+        return execute
+    raise InvalidParameterException('verify must be a Command or a callable taking a device id')
+
+
+def _verify(verify, device_id):
+    start = time.monotonic()
+    try:
+        result = verify(device_id)
+    except Exception as err:
+        return RolloutEvent.FAILED, time.monotonic() - start, err, None
+    if result is False:
+        return RolloutEvent.FAILED, time.monotonic() - start, 'verification failed', result
+    return RolloutEvent.SUCCEEDED, time.monotonic() - start, None, result
+
+
+def rollout_configurations(paramserver_client, device_manager, rootdir, device_list, tree_names=None,
+                           delete_existing_trees=False, as_folder=False, wave_size=50, batch_size=25,
+                           max_workers=4, retries=1, verify=None, max_failures=None):
+    if rootdir is not None:
+        paramserver_client.validate_args(rootdir, tree_names, delete_existing_trees, as_folder)
+    device_list = device_manager._validate_apply_parameters(device_list, tree_names, batch_size, max_workers,
+                                                            retries)
+    if not isinstance(wave_size, int) or wave_size < 1:
+        raise InvalidParameterException('wave_size must be an integer of at least 1')
+    if max_failures is not None and (not isinstance(max_failures, int) or max_failures < 0):
+        raise InvalidParameterException('max_failures must be a non-negative integer')
+    verify = _verifier(device_manager, verify)
+    return _Rollout(paramserver_client, device_manager, rootdir, device_list, tree_names, delete_existing_trees,
+                    as_folder, wave_size, batch_size, max_workers, retries, verify, max_failures).run()
+
+
+class _Rollout(object):
+
+    def __init__(self, paramserver_client, device_manager, rootdir, device_list, tree_names, delete_existing_trees,
+                 as_folder, wave_size, batch_size, max_workers, retries, verify, max_failures):
+        self._paramserver_client = paramserver_client
+        self._device_manager = device_manager
+        self._rootdir = rootdir
+        self._device_list = device_list
+        self._tree_names = tree_names
+        self._delete_existing_trees = delete_existing_trees
+        self._as_folder = as_folder
+        self._wave_size = wave_size
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+        self._retries = retries
+        self._verify = verify
+        self._max_failures = max_failures
+        self._applied = []
+        self._verified = []
+        self._failed = []
+        # Wall time of each stage, verifications overlap the apply stage.
+        self._timings = {RolloutEvent.UPLOAD: 0.0, RolloutEvent.APPLY: 0.0, RolloutEvent.VERIFY: 0.0}
+        self._verify_started = None
+        self._verify_ended = None
+
+    def _summary(self, start):
+        if self._verify_started is not None:
+            self._timings[RolloutEvent.VERIFY] = self._verify_ended - self._verify_started
+        timings = dict(self._timings, total=time.monotonic() - start)
+        return {'applied': list(self._applied), 'verified': list(self._verified), 'failed': list(self._failed),
+                'timings': timings}
+
+    def _aborted(self):
+        return self._max_failures is not None and len(self._failed) > self._max_failures
+
+    def _upload(self):
+        yield RolloutEvent(RolloutEvent.UPLOAD, RolloutEvent.STARTED)
+        start = time.monotonic()
+        try:
+            self._paramserver_client.upload_configurations(self._rootdir, self._tree_names,
+                                                           self._delete_existing_trees, self._as_folder)
+        except Exception as err:
+            self._timings[RolloutEvent.UPLOAD] = time.monotonic() - start
+            yield RolloutEvent(RolloutEvent.UPLOAD, RolloutEvent.FAILED, duration=self._timings[RolloutEvent.UPLOAD],
+                               error=err)
+            return
+        self._timings[RolloutEvent.UPLOAD] = time.monotonic() - start
+        yield RolloutEvent(RolloutEvent.UPLOAD, RolloutEvent.SUCCEEDED, duration=self._timings[RolloutEvent.UPLOAD])
+
+    def _submit_verification(self, executor, pending, device_id, wave):
+        if self._verify_started is None:
+            self._verify_started = time.monotonic()
+        pending[executor.submit(_verify, self._verify, device_id)] = (device_id, wave)
+
+    def _verification_events(self, pending, wait=False):
+        done = futures.as_completed(list(pending)) if wait else [f for f in pending if f.done()]
+        for future in done:
+            device_id, wave = pending.pop(future)
+            status, duration, error, result = future.result()
+            self._verify_ended = time.monotonic()
+            if status == RolloutEvent.SUCCEEDED:
+                self._verified.append(device_id)
+            else:
+                self._failed.append(device_id)
+            yield RolloutEvent(RolloutEvent.VERIFY, status, device_id, wave, duration, error, result)
+
+    def _apply_wave(self, wave, device_ids, executor, pending):
+        yield RolloutEvent(RolloutEvent.APPLY, RolloutEvent.STARTED, wave=wave, result=device_ids)
+        start = time.monotonic()
+        failed = 0
+        for result in self._device_manager.iter_apply_parameters(device_ids, self._tree_names, 0, self._batch_size,
+                                                                 self._max_workers, self._retries):
+            device_id = result['device_id']
+            duration = time.monotonic() - start
+            if result['success']:
+                self._applied.append(device_id)
+                yield RolloutEvent(RolloutEvent.APPLY, RolloutEvent.SUCCEEDED, device_id, wave, duration)
+                if self._verify is not None:
+                    self._submit_verification(executor, pending, device_id, wave)
+            else:
+                failed += 1
+                self._failed.append(device_id)
+                yield RolloutEvent(RolloutEvent.APPLY, RolloutEvent.FAILED, device_id, wave, duration,
+                                   result['error'])
+            for event in self._verification_events(pending):
+                yield event
+        duration = time.monotonic() - start
+        self._timings[RolloutEvent.APPLY] += duration
+        status = RolloutEvent.FAILED if failed else RolloutEvent.SUCCEEDED
+        yield RolloutEvent(RolloutEvent.APPLY, status, wave=wave, duration=duration, result=device_ids)
+
+    def run(self):
+        start = time.monotonic()
+        if self._rootdir is not None:
+            for event in self._upload():
+                yield event
+                if event.status == RolloutEvent.FAILED:
+                    yield RolloutEvent(RolloutEvent.ROLLOUT, RolloutEvent.FAILED, duration=time.monotonic() - start,
+                                       error=event.error, result=self._summary(start))
+                    return
+
+        pending = {}
+        status = None
+        with ContextThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            waves = [self._device_list[i:i + self._wave_size]
+                     for i in range(0, len(self._device_list), self._wave_size)]
+            for wave, device_ids in enumerate(waves):
+                if self._aborted():
+                    status = RolloutEvent.ABORTED
+                    break
+                for event in self._apply_wave(wave, device_ids, executor, pending):
+                    yield event
+            for event in self._verification_events(pending, wait=True):
+                yield event
+
+        if status is None:
+            status = RolloutEvent.FAILED if self._failed else RolloutEvent.SUCCEEDED
+        error = 'more than {} devices failed'.format(self._max_failures) if status == RolloutEvent.ABORTED else None
+        yield RolloutEvent(RolloutEvent.ROLLOUT, status, duration=time.monotonic() - start, error=error,
+                           result=self._summary(start))
@@ -0,0 +1,106 @@
+# encoding: utf-8
+"""
+Persisted inventory snapshots, see :py:meth:`~rapyuta_io.Client.save_snapshot` and
+:py:meth:`~rapyuta_io.Client.load_snapshot`.
+
+A snapshot file starts with :py:data:`MAGIC` and the format version, followed by the zlib compressed JSON encoding
+of the metadata, the authenticated user as returned by the API and the device inventory.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+from rapyuta_io.utils import json_codec
+from rapyuta_io.utils.error import InvalidParameterException
+
+MAGIC = b'RIOSNAP'
+VERSION = 1
+_HEADER = struct.Struct('>7sB')
+
+
+def token_fingerprint(auth_token):
+    """Identifies the token a snapshot was taken with, without storing it."""
+    return hashlib.sha256(auth_token.encode('utf-8')).hexdigest()[:16]
+
+
+class InventorySnapshot(object):
+    """
+    Device inventory and authenticated user of a project at a point in time.
+
+    :ivar devices: List of :py:class:`~rapyuta_io.clients.device.Device`.
+    :ivar user: The authenticated :py:class:`~rapyuta_io.clients.project.User`.
+    :ivar created_at: Unix time the snapshot was taken at.
+    :ivar project: Project guid of the devices.
+    :ivar revalidation: :py:class:`concurrent.futures.Future` resolving to the fresh snapshot when the snapshot is
+        being revalidated in the background, None otherwise.
+    """
+
+    def __init__(self, devices, user, user_data, created_at, project, api_host, token):
+        self.devices = devices
+        self.user = user
+        self.created_at = created_at
+        self.project = project
+        self.revalidation = None
+        self._user_data = user_data
+        self._api_host = api_host
+        self._token = token
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+    def _metadata(self):
+        return {'created_at': self.created_at, 'project': self.project, 'api_host': self._api_host,
+                'token': self._token}
+
+    def to_bytes(self, label_index):
+        payload = {'metadata': self._metadata(), 'user': self._user_data, 'inventory': label_index.to_dict()}
+        return _HEADER.pack(MAGIC, VERSION) + zlib.compress(json_codec.dumps(payload))
+
+    def save(self, path, label_index):
+        """Writes the snapshot to ``path`` atomically, readers never see a partially written file."""
+        data = self.to_bytes(label_index)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+def read_snapshot(path):
+    """
+    Reads the metadata, user data and inventory of a snapshot file.
+
+    :raises: :py:class:`~rapyuta_io.utils.error.InvalidParameterException`: If the file is not a snapshot of a
+        supported version.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise InvalidParameterException('{} is not a snapshot'.format(path))
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise InvalidParameterException('{} is not a snapshot'.format(path))
+    if version != VERSION:
+        raise InvalidParameterException('unsupported snapshot version {}'.format(version))
+    try:
+        payload = json_codec.loads(zlib.decompress(data[_HEADER.size:]))
+    except (zlib.error, ValueError) as err:
+        raise InvalidParameterException('corrupted snapshot {}: {}'.format(path, err))
+    return payload['metadata'], payload['user'], payload['inventory']
+
+
+def validate_metadata(metadata, project, api_host, token, max_age):
+    if (metadata['project'], metadata['api_host'], metadata['token']) != (project, api_host, token):
+        raise InvalidParameterException('snapshot was taken for another project, host or auth token')
+    if max_age is not None and time.time() - metadata['created_at'] > max_age:
+        raise InvalidParameterException('snapshot is older than {} seconds'.format(max_age))
@@ -0,0 +1,198 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import copy
+import threading
+
+import six
+
+from rapyuta_io.clients.model import ProjectResult
+from rapyuta_io.rio_client import Client
+from rapyuta_io.utils import InvalidParameterException
+from rapyuta_io.utils.endpoint_config import get_endpoint_config
+from rapyuta_io.utils.request_context import ContextThreadPoolExecutor, request_context
+from rapyuta_io.utils.transport import SessionTransport, Transport, get_transport, use_transport
+
+DEFAULT_MAX_WORKERS = 15
+
+# Client methods map accepts by name. They only read, the clients stay bound to their project and a repeated
+# operation has no effect on the projects.
+READ_OPERATIONS = frozenset([
+    'fetch_cmd_result', 'find_devices', 'get_all_devices', 'get_authenticated_user', 'get_device',
+    'get_user_organizations', 'get_usergroup', 'list_metrics', 'list_tag_keys', 'list_tag_values', 'list_usergroups',
+    'query_metrics',
+])
+
+
+class MultiProjectClient(object):
+    """
+    Runs client operations in many projects at once.
+
+    Every project gets its own :py:class:`~rapyuta_io.Client`, bound to it for its whole life, so that requests
+    always carry the project they are made for. The clients share one connection pool and the authenticated user,
+    and the operations of the different projects run concurrently.
+
+    :param auth_token: Authentication token
+    :type auth_token: str
+    :param projects: GUIDs of the projects
+    :type projects: list(str)
+    :param endpoint_config: API hosts to use instead of the shared configuration, see
+        :py:mod:`~rapyuta_io.utils.endpoint_config`.
+    :type endpoint_config: :py:class:`~rapyuta_io.utils.endpoint_config.EndpointConfig`
+    :param max_workers: Maximum number of projects processed in parallel, and size of the connection pool.
+    :type max_workers: int
+    :raises: :py:class:`~rapyuta_io.utils.error.InvalidParameterException`: If ``projects`` is not a non-empty list
+        of strings.
+
+    Following example demonstrates how to list the devices of several projects
+
+        >>> from rapyuta_io.multi_project_client import MultiProjectClient
+        >>> with MultiProjectClient('auth_token', ['project-1', 'project-2']) as client:
+        ...     for project, result in client.get_all_devices(online_device=True).items():
+        ...         print(project, len(result.result) if result.ok else result.error)
+
+    """
+
+    def __init__(self, auth_token, projects, endpoint_config=None, max_workers=DEFAULT_MAX_WORKERS):
+        Client._validate_auth_token(auth_token)
+        self._projects = self._validate_projects(projects)
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise InvalidParameterException('max_workers must be a positive integer')
+        self._auth_token = auth_token
+        self._endpoint_config = endpoint_config if endpoint_config is not None else get_endpoint_config()
+        self._max_workers = max_workers
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._user = None
+        self._user_lock = threading.Lock()
+        # A configured transport (cache, coalescing, ...) is kept, the plain one is replaced by a session shared by
+        # the projects.
+        transport = get_transport()
+        self._owns_transport = type(transport) is Transport
+        self._transport = SessionTransport(pool_maxsize=max_workers) if self._owns_transport else transport
+
+    @staticmethod
+    def _validate_projects(projects):
+        if isinstance(projects, six.string_types) or not isinstance(projects, (list, tuple)) or not projects:
+            raise InvalidParameterException('projects must be a non-empty list of project guids')
+        unique = []
+        for project in projects:
+            if not isinstance(project, six.string_types) or not project:
+                raise InvalidParameterException('projects must be a non-empty list of project guids')
+            if project not in unique:
+                unique.append(project)
+        return tuple(unique)
+
+    @property
+    def projects(self):
+        return self._projects
+
+    def client(self, project):
+        """
+        Returns the client bound to ``project``. Its project must not be changed with
+        :py:meth:`~rapyuta_io.Client.set_project`.
+
+        :rtype: :py:class:`~rapyuta_io.Client`
+        """
+        with self._lock:
+            client = self._clients.get(project)
+            if client is None:
+                client = Client(self._auth_token, project, endpoint_config=self._endpoint_config)
+                self._clients[project] = client
+            return client
+
+    def _run(self, project, operation, args, kwargs):
+        # The project is also set on the context, for the requests of callable operations made with other clients.
+        with use_transport(self._transport), request_context(project=project):
+            try:
+                client = self.client(project)
+                if callable(operation):
+                    result = operation(client, *args, **kwargs)
+                else:
+                    result = getattr(client, operation)(*args, **kwargs)
+            except Exception as err:
+                return ProjectResult(project, error=err)
+        return ProjectResult(project, result=result)
+
+    def map(self, operation, *args, projects=None, **kwargs):
+        """
+        Runs ``operation`` in every project concurrently. A failure in one project does not stop the others.
+
+        :param operation: Name of a :py:class:`~rapyuta_io.Client` method of :py:data:`READ_OPERATIONS`, or a
+            callable receiving the client of the project followed by ``args`` and ``kwargs``. Operations changing
+            the projects are only run with a callable.
+        :type operation: str or callable
+        :param projects: Subset of the projects to run the operation in, defaults to all of them.
+        :type projects: list(str)
+        :return: :py:class:`~rapyuta_io.clients.model.ProjectResult` of every project, keyed by project guid in
+            the order of the projects.
+        :rtype: dict
+        :raises: :py:class:`~rapyuta_io.utils.error.InvalidParameterException`: If ``operation`` is the name of a
+            method that is not in :py:data:`READ_OPERATIONS`.
+
+        >>> results = client.map(lambda c: len(c.find_devices({'zone': 'a'})))
+        """
+        projects = self._projects if projects is None else self._validate_projects(projects)
+        if not callable(operation) and operation not in READ_OPERATIONS:
+            raise InvalidParameterException('{} is not a read-only client operation'.format(operation))
+        if len(projects) == 1:
+            return {projects[0]: self._run(projects[0], operation, args, kwargs)}
+        with ContextThreadPoolExecutor(max_workers=min(self._max_workers, len(projects))) as executor:
+            results = executor.map(lambda project: self._run(project, operation, args, kwargs), projects)
+            return {result.project: result for result in results}
+
+    def get_authenticated_user(self):
+        """
+        Returns the authenticated user, fetched once and shared by the projects.
+
+        :rtype: :py:class:`~rapyuta_io.clients.project.User`
+        """
+        with self._user_lock:
+            if self._user is None:
+                with use_transport(self._transport):
+                    self._user = self.client(self._projects[0]).get_authenticated_user()
+            return self._user
+
+    def get_all_devices(self, projects=None, **kwargs):
+        """
+        Runs :py:meth:`~rapyuta_io.Client.get_all_devices` with ``kwargs`` in every project.
+
+        :rtype: dict
+        """
+        return self.map('get_all_devices', projects=projects, **kwargs)
+
+    def query_metrics(self, query_metrics_request, projects=None):
+        """
+        Runs :py:meth:`~rapyuta_io.Client.query_metrics` in every project, with the organization of the shared
+        authenticated user.
+
+        :rtype: dict
+        """
+        from rapyuta_io.clients.metrics import QueryMetricsRequest
+        organization = None
+        if isinstance(query_metrics_request, QueryMetricsRequest) and \
+                not query_metrics_request.tags.get(query_metrics_request.ORGANIZATION_ID_TAG):
+            organization = self.get_authenticated_user().organization.guid
+        with request_context(organization=organization):
+            # Every project gets its own request, the client adds the tags of its project to it.
+            return self.map(lambda client: client.query_metrics(copy.deepcopy(query_metrics_request)),
+                            projects=projects)
+
+    def list_usergroups(self, org_guid, projects=None):
+        """
+        Runs :py:meth:`~rapyuta_io.Client.list_usergroups` in every project.
+
+        :rtype: dict
+        """
+        return self.map('list_usergroups', org_guid, projects=projects)
+
+    def close(self):
+        """Closes the connection pool, if the client created it."""
+        if self._owns_transport:
+            self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,23 +1,28 @@
 # encoding: utf-8
 from __future__ import absolute_import
 
-import json
-import os
+import contextvars
+import threading
+import time
 import typing
+from concurrent import futures
 
 import six
 
 from rapyuta_io.clients import DeviceManagerClient, _ParamserverClient
 from rapyuta_io.clients.core_api_client import CoreAPIClient
+from rapyuta_io.clients.device_manager import BULK_MAX_WORKERS
 from rapyuta_io.clients.device import Device
-from rapyuta_io.clients.metrics import ListMetricsRequest, ListTagKeysRequest, ListTagValuesRequest, Metric, \
-    MetricFunction, MetricOperation, QueryMetricsRequest, QueryMetricsResponse, Tags
 from rapyuta_io.clients.model import Command
+from rapyuta_io.clients.project import User
 from rapyuta_io.clients.rip_client import AuthTokenLevel, RIPClient
+from rapyuta_io.clients.snapshot import InventorySnapshot, read_snapshot, token_fingerprint, validate_metadata
 from rapyuta_io.clients.user_group import UserGroup
 from rapyuta_io.utils import InvalidAuthTokenException, \
     InvalidParameterException
-from rapyuta_io.utils.settings import default_host_config
+from rapyuta_io.utils.credentials import install_credentials
+from rapyuta_io.utils.endpoint_config import EndpointConfig, get_endpoint_config
+from rapyuta_io.utils.request_context import get_request_context, resolve_project
 from rapyuta_io.utils.utils import valid_list_elements
 
 
@@ -27,7 +32,7 @@ class Client(object):
 
     """
 
-    def __init__(self, auth_token, project=None):
+    def __init__(self, auth_token, project=None, endpoint_config=None):
         """
         Get new client object
 
@@ -36,15 +41,23 @@ class Client(object):
 
         :param project: project_guid of the user
         :type project: string
+
+        :param endpoint_config: API hosts to use instead of the shared configuration, see
+            :py:mod:`~rapyuta_io.utils.endpoint_config`.
+        :type endpoint_config: :py:class:`~rapyuta_io.utils.endpoint_config.EndpointConfig`
+        :raises: :py:class:`~utils.error.InvalidParameterException`: If the ``RIO_CONFIG`` file is invalid.
         """
 
         super(Client, self).__init__()
         self._validate_auth_token(auth_token)
-        self._core_api_client = CoreAPIClient(auth_token, project,
-                                              core_api_host=self._get_api_endpoints('core_api_host'))
-        self._dmClient = DeviceManagerClient(auth_token, project,
-                                             device_api_host=self._get_api_endpoints('core_api_host'))
-        self._paramserver_client = _ParamserverClient(auth_token, project, self._get_api_endpoints('core_api_host'))
+        if endpoint_config is None:
+            endpoint_config = get_endpoint_config()
+        elif not isinstance(endpoint_config, EndpointConfig):
+            raise InvalidParameterException('endpoint_config must be an instance of EndpointConfig')
+        core_api_host = endpoint_config.core_api_host
+        self._core_api_client = CoreAPIClient(auth_token, project, core_api_host=core_api_host)
+        self._dmClient = DeviceManagerClient(auth_token, project, device_api_host=core_api_host)
+        self._paramserver_client = _ParamserverClient(auth_token, project, core_api_host)
 
     @staticmethod
     def _validate_auth_token(auth_token):
@@ -53,13 +66,7 @@ class Client(object):
 
     @staticmethod
     def _get_api_endpoints(host_type):
-        try:
-            config_file = os.environ["RIO_CONFIG"]
-            with open(config_file, 'r') as f:
-                configuration = json.load(f)
-            return configuration[host_type]
-        except Exception:
-            return default_host_config[host_type]
+        return get_endpoint_config().get(host_type)
 
     @staticmethod
     def get_auth_token(email, password, token_level=AuthTokenLevel.LOW):
@@ -84,10 +91,39 @@ class Client(object):
         rip_client = RIPClient(rip_host=Client._get_api_endpoints('rip_host'))
         return rip_client.get_auth_token(email, password, token_level)
 
+    @classmethod
+    def from_credentials(cls, credentials, project=None, endpoint_config=None):
+        """
+        Get a new client object using the tokens of a credential provider, which are renewed before they expire.
+
+        The provider is installed in front of the default transport with
+        :py:func:`~rapyuta_io.utils.credentials.install_credentials`, a caching or coalescing default transport keeps
+        being used.
+
+        :param credentials: Provider of the tokens
+        :type credentials: :py:class:`~rapyuta_io.utils.credentials.CredentialProvider`
+        :param project: project_guid of the user
+        :type project: string
+        :param endpoint_config: API hosts to use instead of the shared configuration
+        :type endpoint_config: :py:class:`~rapyuta_io.utils.endpoint_config.EndpointConfig`
+        :rtype: :py:class:`Client`
+
+        Following example demonstrates how to get a client renewing its token
+
+            >>> from rapyuta_io import Client
+            >>> from rapyuta_io.utils.credentials import PasswordCredentials
+            >>> client = Client.from_credentials(PasswordCredentials('email@example.com', 'password'), 'project-id')
+        """
+        install_credentials(credentials)
+        return cls(credentials.auth_token(), project, endpoint_config)
+
     def set_project(self, project_guid):
         """
         Sets the current Project for the Client.
 
+        The project is changed for every thread using the client. To work on another project in one thread or
+        asyncio task only, use :py:func:`~rapyuta_io.utils.request_context.request_context` instead.
+
         :param project_guid: GUID of the Project
 
         """
@@ -110,6 +146,95 @@ class Client(object):
         """
         return self._core_api_client.get_user()
 
+    def _snapshot_identity(self):
+        # Project and token of the requests, following the request context.
+        api_host, auth_token, project = self._dmClient._context()
+        return project, api_host, token_fingerprint(auth_token)
+
+    def save_snapshot(self, path):
+        """
+        Save the device inventory and the authenticated user to a file, for :py:meth:`load_snapshot`.
+
+        The devices are listed again, which also rebuilds the label index of :py:meth:`find_devices`. The file is
+        replaced atomically. The auth token itself is not stored, only a fingerprint of it. Inside a
+        :py:func:`~rapyuta_io.utils.request_context.request_context` for another project or token, the snapshot is
+        taken for them and the label index of the client is left as it is.
+
+        :param path: Path of the snapshot file.
+        :type path: str
+        :rtype: :py:class:`~rapyuta_io.clients.snapshot.InventorySnapshot`
+
+        Following example demonstrates how to save a snapshot.
+
+        >>> from rapyuta_io import Client
+        >>> client = Client(auth_token='auth_token', project='project_guid')
+        >>> client.save_snapshot('/var/cache/robots/inventory.snapshot')
+
+        """
+        user_data = self._core_api_client._get_user_data()
+        devices = self.get_all_devices()
+        label_index = self._dmClient.load_inventory(devices)
+        project, api_host, token = self._snapshot_identity()
+        snapshot = InventorySnapshot(devices, User.deserialize(user_data), user_data, time.time(), project,
+                                     api_host, token)
+        snapshot.save(path, label_index)
+        return snapshot
+
+    def load_snapshot(self, path, max_age=None, revalidate=True):
+        """
+        Load a snapshot saved by :py:meth:`save_snapshot`, without any API call.
+
+        The devices of the snapshot are usable right away and make up the label index of :py:meth:`find_devices`.
+        With `revalidate`, a background thread takes a fresh snapshot and saves it to `path`. Its devices are
+        indexed aside and replace the label index at once when the listing is done: lookups made meanwhile return
+        the devices of the snapshot, and later ones the fresh devices.
+
+        :param path: Path of the snapshot file.
+        :type path: str
+        :param max_age: Maximum age of the snapshot in seconds, None for no limit.
+        :type max_age: float
+        :param revalidate: Refresh the inventory and the snapshot file in the background.
+        :type revalidate: bool
+        :rtype: :py:class:`~rapyuta_io.clients.snapshot.InventorySnapshot`
+        :raises: :py:class:`~utils.error.InvalidParameterException`: If the file is not a valid snapshot, was taken
+            for another project, host or auth token, or is older than `max_age`.
+
+        Following example demonstrates how to start from a snapshot when there is one
+
+        >>> from rapyuta_io import Client
+        >>> from rapyuta_io.utils import InvalidParameterException
+        >>> client = Client(auth_token='auth_token', project='project_guid')
+        >>> try:
+        ...     devices = client.load_snapshot('/var/cache/robots/inventory.snapshot', max_age=3600).devices
+        ... except (IOError, InvalidParameterException):
+        ...     devices = client.save_snapshot('/var/cache/robots/inventory.snapshot').devices
+
+        """
+        metadata, user_data, inventory = read_snapshot(path)
+        project, api_host, token = self._snapshot_identity()
+        validate_metadata(metadata, project, api_host, token, max_age)
+        devices = [Device._deserialize(device) for device in inventory['devices']]
+        self._dmClient.load_inventory(devices)
+        snapshot = InventorySnapshot(devices, User.deserialize(user_data), user_data, metadata['created_at'],
+                                     project, api_host, token)
+        if revalidate:
+            snapshot.revalidation = self._revalidate_snapshot(path)
+        return snapshot
+
+    def _revalidate_snapshot(self, path):
+        future = futures.Future()
+
+        def revalidate():
+            try:
+                future.set_result(self.save_snapshot(path))
+            except Exception as err:
+                future.set_exception(err)
+
+        # The thread runs in a copy of the current context, so that it lists the same project with the same token.
+        threading.Thread(target=contextvars.copy_context().run, args=(revalidate,), name='snapshot-revalidation',
+                         daemon=True).start()
+        return future
+
     def get_user_organizations(self):
         """
         Get list of organizations that a user is part of.
@@ -125,7 +250,8 @@ class Client(object):
         """
         return self._core_api_client.get_user_organizations()
 
-    def get_all_devices(self, online_device=False, arch_list=None, retry_limit=0, device_name=None):
+    def get_all_devices(self, online_device=False, arch_list=None, retry_limit=0, device_name=None, compact=False,
+                        fields=None):
         """
         Get all the devices
 
@@ -142,6 +268,12 @@ class Client(object):
         :type retry_limit: int
         :param device_name: Optional parameter to filter the devices based on the device name.
         :type device_name: str
+        :param compact: If set, read-only :py:class:`~rapyuta_io.clients.compact.CompactDevice` records are returned
+            instead, which take a fraction of the memory. Use `to_device()` to get the full object.
+        :type compact: bool
+        :param fields: If set, only these fields of the devices are kept, e.g. ``['name', 'status', 'labels']``.
+            The uuid is always included. Use `refresh()` on a device to fetch all of its fields.
+        :type fields: list
         :return: List of instances of :py:class:`~Device` class
         :raises: :py:class:`APIError`: If the API returns an error, a status code
             of anything other than 200/201 is returned
@@ -156,7 +288,23 @@ class Client(object):
             >>>     DeviceArch.ARM32V7, DeviceArch.ARM64V8, DeviceArch.AMD64])
 
         """
-        return self._dmClient.device_list(online_device, arch_list, retry_limit, device_name=device_name)
+        return self._dmClient.device_list(online_device, arch_list, retry_limit, device_name=device_name,
+                                          compact=compact, fields=fields)
+
+    def iter_devices(self, online_device=False, arch_list=None, retry_limit=0, device_name=None, compact=False,
+                     fields=None):
+        """
+        Same as :py:meth:`get_all_devices`, but yields the devices one at a time instead of building a list.
+
+        Following example demonstrates how to find the offline devices of a large fleet
+
+            >>> from rapyuta_io import Client
+            >>> client = Client(auth_token='auth_token', project='project_guid')
+            >>> offline = [d.uuid for d in client.iter_devices(compact=True) if not d.is_online()]
+
+        """
+        return self._dmClient.iter_devices(online_device, arch_list, retry_limit, device_name=device_name,
+                                           compact=compact, fields=fields)
 
     def get_device(self, device_id, retry_limit=0):
         """
@@ -181,6 +329,121 @@ class Client(object):
         """
         return self._dmClient.get_device(device_id, retry_limit)
 
+    def refresh_devices(self, devices, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        """
+        Refresh many partial devices, e.g. from :py:meth:`get_all_devices`, into full objects.
+
+        The devices are fetched concurrently over kept-alive connections and updated in place, like
+        :py:meth:`~Device.refresh` does. A failure of one device does not stop the others.
+
+        :param devices: Devices to refresh.
+        :type devices: list(:py:class:`~Device`)
+        :param retry_limit: No of retry attempts to be carried out if any failures occurs during the API calls.
+        :type retry_limit: int
+        :param max_workers: Maximum number of devices fetched in parallel.
+        :type max_workers: int
+        :return: One :py:class:`~rapyuta_io.clients.model.BulkItemResult` per device, in the order of `devices`,
+            holding the device or the error.
+        :rtype: list(:py:class:`~rapyuta_io.clients.model.BulkItemResult`)
+
+        Following example demonstrates how to get full objects of the online devices.
+
+        >>> from rapyuta_io import Client
+        >>> client = Client(auth_token='auth_token', project='project_guid')
+        >>> devices = client.get_all_devices(online_device=True)
+        >>> failed = [r for r in client.refresh_devices(devices) if not r.ok]
+        """
+        return self._dmClient.refresh_devices(devices, retry_limit, max_workers)
+
+    async def refresh_devices_async(self, devices, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        """
+        Coroutine version of :py:meth:`refresh_devices`, for use in asyncio applications. The API calls run in a
+        thread pool and do not block the event loop.
+
+        >>> import asyncio
+        >>> from rapyuta_io import Client
+        >>> client = Client(auth_token='auth_token', project='project_guid')
+        >>> results = asyncio.run(client.refresh_devices_async(client.get_all_devices()))
+        """
+        return await self._dmClient.refresh_devices_async(devices, retry_limit, max_workers)
+
+    def find_devices(self, labels, match_all=True, refresh=False, retry_limit=0):
+        """
+        Find devices by label, without scanning every device.
+
+        The devices are looked up in an index of labels kept by the client. The index is built by the first call,
+        and again with `refresh` or :py:meth:`save_snapshot`. It follows the label changes made with the
+        :py:class:`~Device` label methods and refreshes of the indexed devices.
+
+        :param labels: Label keys mapped to a value, or to a list of values any of which matches.
+        :type labels: dict
+        :param match_all: True to find the devices matching all the `labels`, False for the ones matching any.
+        :type match_all: bool
+        :param refresh: List the devices again before the lookup.
+        :type refresh: bool
+        :param retry_limit: No of retry attempts to be carried out if any failures occurs during the API call.
+        :type retry_limit: int
+        :return: List of :py:class:`~Device`, sorted by uuid.
+        :raises: :py:class:`~utils.error.InvalidParameterException`: If `labels` is not a non-empty dictionary.
+
+        Following example demonstrates how to find the devices of two zones of a site
+
+            >>> from rapyuta_io import Client
+            >>> client = Client(auth_token='auth_token', project='project_guid')
+            >>> devices = client.find_devices({'site': 'tokyo', 'zone': ['a', 'b']})
+
+        """
+        return self._dmClient.find_devices(labels, match_all, refresh, retry_limit)
+
+    def watch_devices(self, interval=10, max_interval=60, backoff=2, fields=None, initial_events=True,
+                      retry_limit=0):
+        """
+        Watch the devices of the project and yield their changes.
+
+        The device list is polled with one API call over a kept-alive connection and compared, by uuid, with the
+        previous poll. Only the changed devices are converted into
+        :py:class:`~rapyuta_io.clients.compact.CompactDevice` objects. The interval between polls grows by
+        `backoff` while nothing changes, up to `max_interval`, and goes back to `interval` after a change.
+
+        :param interval: Seconds between polls.
+        :type interval: float
+        :param max_interval: Maximum seconds between polls.
+        :type max_interval: float
+        :param backoff: Factor the interval grows by after a poll without changes.
+        :type backoff: float
+        :param fields: Device fields, besides status and labels, whose changes emit `updated` events.
+        :type fields: list(str)
+        :param initial_events: Emit an `added` event for every device of the first poll.
+        :type initial_events: bool
+        :param retry_limit: No of retry attempts to be carried out if any failures occurs during the API calls.
+        :type retry_limit: int
+        :return: Endless generator of :py:class:`~rapyuta_io.clients.model.DeviceEvent`.
+        :raises: :py:class:`APIError`: If a poll fails.
+
+        Following example demonstrates how to follow the devices going offline
+
+            >>> from rapyuta_io import Client
+            >>> from rapyuta_io.clients.model import DeviceEvent
+            >>> client = Client(auth_token='auth_token', project='project_guid')
+            >>> for event in client.watch_devices(initial_events=False):
+            ...     if event.type == DeviceEvent.STATUS_CHANGED and not event.device.is_online():
+            ...         print(event.device.name, 'went offline')
+
+        """
+        return self._dmClient.watch_devices(interval, max_interval, backoff, fields, initial_events, retry_limit)
+
+    def watch_devices_async(self, interval=10, max_interval=60, backoff=2, fields=None, initial_events=True,
+                            retry_limit=0):
+        """
+        Async generator version of :py:meth:`watch_devices`, for use in asyncio applications.
+
+            >>> async def follow(client):
+            ...     async for event in client.watch_devices_async():
+            ...         print(event.type, event.device_id)
+        """
+        return self._dmClient.watch_devices_async(interval, max_interval, backoff, fields, initial_events,
+                                                  retry_limit)
+
     def create_device(self, device):
         """
         Create a device on rapyuta.io platform.
@@ -223,6 +486,61 @@ class Client(object):
             raise InvalidParameterException('device_id needs to be a non empty string')
         return self._dmClient.delete_device(device_id)
 
+    def bulk_update_labels(self, devices, labels, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        """
+        Add, update or delete labels on many devices.
+
+        Labels missing on a device are created with one API call per device, existing labels with a different
+        value are updated and labels set to None are deleted. Devices are processed concurrently, and the `labels`
+        of the given :py:class:`~Device` objects are updated with the changes that succeeded.
+
+        :param devices: Devices to label, e.g. from :py:meth:`get_all_devices`.
+        :type devices: list(:py:class:`~Device`)
+        :param labels: label keys mapped to their value, or to None to delete the label.
+        :type labels: dict
+        :param retry_limit: No of retry attempts to be carried out if any failures occurs during the API calls.
+        :type retry_limit: int
+        :param max_workers: Maximum number of devices processed in parallel.
+        :type max_workers: int
+        :return: One :py:class:`~rapyuta_io.clients.model.BulkItemResult` per device and label, failures are reported
+            in its `error` instead of being raised.
+        :rtype: list(:py:class:`~rapyuta_io.clients.model.BulkItemResult`)
+
+        Following example demonstrates how to label a fleet and report the failures.
+
+        >>> from rapyuta_io import Client
+        >>> client = Client(auth_token='auth_token', project='project_guid')
+        >>> devices = client.get_all_devices()
+        >>> results = client.bulk_update_labels(devices, {'zone': 'warehouse-1', 'legacy': None})
+        >>> failed = [(r.device_id, r.key, r.error) for r in results if not r.ok]
+        """
+        return self._dmClient.bulk_update_labels(devices, labels, retry_limit, max_workers)
+
+    def bulk_set_config_variables(self, devices, config_variables, retry_limit=0, max_workers=BULK_MAX_WORKERS):
+        """
+        Add, update or delete configuration variables on many devices.
+
+        Works like :py:meth:`bulk_update_labels`. The configuration variables API has no bulk endpoint, so every
+        change is a separate API call; the calls of different devices run concurrently. Default configuration
+        variables that cannot be updated or deleted are reported as errors.
+
+        :param devices: Devices to configure, e.g. from :py:meth:`get_all_devices`.
+        :type devices: list(:py:class:`~Device`)
+        :param config_variables: configuration keys mapped to their value, or to None to delete the variable.
+        :type config_variables: dict
+        :param retry_limit: No of retry attempts to be carried out if any failures occurs during the API calls.
+        :type retry_limit: int
+        :param max_workers: Maximum number of devices processed in parallel.
+        :type max_workers: int
+        :return: One :py:class:`~rapyuta_io.clients.model.BulkItemResult` per device and configuration variable.
+        :rtype: list(:py:class:`~rapyuta_io.clients.model.BulkItemResult`)
+
+        >>> from rapyuta_io import Client
+        >>> client = Client(auth_token='auth_token', project='project_guid')
+        >>> results = client.bulk_set_config_variables(client.get_all_devices(), {'log_level': 'debug'})
+        """
+        return self._dmClient.bulk_set_config_variables(devices, config_variables, retry_limit, max_workers)
+
     def execute_command(
             self,
             device_ids: typing.List[str],
@@ -392,6 +710,113 @@ class Client(object):
         """
         return self._dmClient.apply_parameters(device_list, tree_names, retry_limit)
 
+    def iter_apply_parameters(self, device_list, tree_names=None, retry_limit=0, batch_size=50, max_workers=4,
+                              retries=1):
+        """
+        Applies configuration parameters like :py:meth:`apply_parameters`, in batches of ``batch_size`` devices sent
+        concurrently. Results are yielded per device as their batch completes, so large fleets are not bound by the
+        time the server takes for all of them. The devices that failed are applied again, in new batches, up to
+        ``retries`` times.
+
+        :param device_list: List of device IDs
+        :type device_list: list[str]
+        :param tree_names: List of configuration tree names
+        :type tree_names: list[str]
+        :param retry_limit: Number of retry attempts of each API call if it fails.
+        :type retry_limit: int
+        :param batch_size: Maximum number of devices per API call.
+        :type batch_size: int
+        :param max_workers: Maximum number of API calls in parallel.
+        :type max_workers: int
+        :param retries: Number of times the failed devices are applied again.
+        :type retries: int
+        :return: Generator of dictionaries with device_id, bool success status and error, one per device. Devices
+            of a failed API call get its error.
+        :rtype: generator(dict)
+
+        Following example demonstrates how to apply the parameters to a large fleet and handle errors.
+
+            >>> from rapyuta_io import Client
+            >>> client = Client(auth_token='auth_token', project='project_guid')
+            >>> devices = client.get_all_devices()
+            >>> for result in client.iter_apply_parameters([device.uuid for device in devices], batch_size=25):
+            ...     if not result['success']:
+            ...         print(result['device_id'], result['error'])
+
+        """
+        return self._dmClient.iter_apply_parameters(device_list, tree_names, retry_limit, batch_size, max_workers,
+                                                    retries)
+
+    def iter_apply_parameters_async(self, device_list, tree_names=None, retry_limit=0, batch_size=50, max_workers=4,
+                                    retries=1):
+        """
+        Asynchronous generator version of :py:meth:`iter_apply_parameters`, for use in asyncio applications. The API
+        calls run in a thread pool and do not block the event loop.
+
+        >>> async for result in client.iter_apply_parameters_async(device_ids):
+        ...     print(result['device_id'], result['success'])
+        """
+        return self._dmClient.iter_apply_parameters_async(device_list, tree_names, retry_limit, batch_size,
+                                                          max_workers, retries)
+
+    def rollout_configurations(self, rootdir, device_list, tree_names=None, delete_existing_trees=False,
+                               as_folder=False, wave_size=50, batch_size=25, max_workers=4, retries=1, verify=None,
+                               max_failures=None):
+        """
+        Uploads configurations, applies them to the devices and verifies the devices, as a pipeline.
+
+        The trees are uploaded like :py:meth:`upload_configurations` does, then applied to the devices in waves of
+        ``wave_size`` devices like :py:meth:`iter_apply_parameters` does, as soon as the upload is committed. Every
+        device is verified once its parameters are applied, while the following devices are being applied.
+
+        :param rootdir: Directory of the configurations, None to apply the trees already uploaded.
+        :type rootdir: str
+        :param device_list: List of device IDs
+        :type device_list: list[str]
+        :param tree_names: Configuration trees to upload and apply, all of them by default.
+        :type tree_names: list[str]
+        :param delete_existing_trees: Whether the uploaded trees replace the existing ones.
+        :type delete_existing_trees: bool
+        :param as_folder: Whether the trees are uploaded as folders, see :py:meth:`upload_configurations`.
+        :type as_folder: bool
+        :param wave_size: Number of devices per wave.
+        :type wave_size: int
+        :param batch_size: Maximum number of devices per apply call.
+        :type batch_size: int
+        :param max_workers: Maximum number of apply calls, and of verifications, in parallel.
+        :type max_workers: int
+        :param retries: Number of times the devices that failed to apply are applied again.
+        :type retries: int
+        :param verify: Check of a device, either a :py:class:`~rapyuta_io.clients.model.Command` executed on it or a
+            callable taking its id. The command must not run in the background, its output is the result of the
+            verification event. The device fails the verification if the command or the callable raises, if the
+            command returns no output for the device, or if the callable returns False.
+        :type verify: :py:class:`~rapyuta_io.clients.model.Command` or callable
+        :param max_failures: Number of failed devices above which no further waves are started.
+        :type max_failures: int
+        :return: Generator of :py:class:`~rapyuta_io.clients.model.RolloutEvent`, ending with a `rollout` event
+            summarizing the rollout and the time spent in each stage.
+        :rtype: generator(:py:class:`~rapyuta_io.clients.model.RolloutEvent`)
+
+        Following example demonstrates how to roll a configuration out to a fleet, one wave of 100 devices at a time.
+
+            >>> from rapyuta_io import Client, Command
+            >>> client = Client(auth_token='auth_token', project='project_guid')
+            >>> devices = [device.uuid for device in client.get_all_devices(online_device=True)]
+            >>> events = client.rollout_configurations('path/to/configs', devices, tree_names=['robot'],
+            ...                                        wave_size=100, verify=Command('systemctl is-active robot'),
+            ...                                        max_failures=10)
+            >>> for event in events:
+            ...     if not event.ok:
+            ...         print(event.stage, event.device_id, event.error)
+            >>> print(event.result['timings'])
+
+        """
+        from rapyuta_io.clients.rollout import rollout_configurations
+        return rollout_configurations(self._paramserver_client, self._dmClient, rootdir, device_list, tree_names,
+                                      delete_existing_trees, as_folder, wave_size, batch_size, max_workers, retries,
+                                      verify, max_failures)
+
     def query_metrics(self, query_metrics_request):
         """
         Query and fetch metrics
@@ -422,13 +847,14 @@ class Client(object):
             >>> print(df.head())
 
         """
+        from rapyuta_io.clients.metrics import QueryMetricsRequest, QueryMetricsResponse
         if not isinstance(query_metrics_request, QueryMetricsRequest):
             raise InvalidParameterException('metrics_query_request must be '
                                             'of type rapyuta_io.clients.metrics.MetricsQueryRequest')
 
         default_tags = {}
         if not query_metrics_request.tags.get(query_metrics_request.TENANT_ID_TAG):
-            project = self._core_api_client._project
+            project = resolve_project(self._core_api_client._project)
             if not project:
                 raise InvalidParameterException('Either set project on client using client.set_project(), or '
                                                 'set {} in tags'.format(query_metrics_request.TENANT_ID_TAG))
@@ -438,8 +864,9 @@ class Client(object):
             }
 
         if not query_metrics_request.tags.get(query_metrics_request.ORGANIZATION_ID_TAG):
-            user = self._core_api_client.get_user()
-            organization_guid = user.organization.guid
+            organization_guid = get_request_context().organization
+            if organization_guid is None:
+                organization_guid = self._core_api_client.get_user().organization.guid
             default_tags[query_metrics_request.ORGANIZATION_ID_TAG] = {
                 "operator": "eq",
                 "value": organization_guid
@@ -472,6 +899,7 @@ class Client(object):
             ...    print(metric.metric_group, metric.metric_names)
 
         """
+        from rapyuta_io.clients.metrics import ListMetricsRequest, Metric
         if not isinstance(list_metrics_request, ListMetricsRequest):
             raise InvalidParameterException('metrics_query_request must be of type '
                                             'rapyuta_io.clients.metrics.ListMetricsRequest')
@@ -501,6 +929,7 @@ class Client(object):
             ...     print(tag.metric_group, tag.tags)
 
         """
+        from rapyuta_io.clients.metrics import ListTagKeysRequest, Tags
         if not isinstance(list_tag_keys_request, ListTagKeysRequest):
             raise InvalidParameterException('metrics_query_request must be of '
                                             'type rapyuta_io.clients.metrics.ListTagKeysRequest')
@@ -530,6 +959,7 @@ class Client(object):
             ...     print(tag_value)
 
         """
+        from rapyuta_io.clients.metrics import ListTagValuesRequest
         if not isinstance(list_tag_values_request, ListTagValuesRequest):
             raise InvalidParameterException('metrics_query_request must be of '
                                             'type rapyuta_io.clients.metrics.ListTagValuesRequest')
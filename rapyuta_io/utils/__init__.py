@@ -1,5 +1,5 @@
 from .error import *
-from .objdict import ObjDict, ImmutableKeyDict
+from .objdict import ObjDict, ImmutableKeyDict, LazyObjDict
 from .objdict import to_objdict
 from .rest_client import RestClient
 from .utils import prepend_bearer_to_auth_token
@@ -0,0 +1,217 @@
+# encoding: utf-8
+"""
+Auth tokens that are renewed before they expire.
+
+A :py:class:`CredentialProvider` fetches a token, and fetches a new one once most of its lifetime has passed.
+:py:class:`CredentialTransport` puts the current token on the requests made with a token of the provider, and
+replays a request once with a new token if it is answered with ``401 Unauthorized``, so that long-running processes
+keep working across token expiry.
+"""
+from __future__ import absolute_import
+
+import threading
+import time
+import types
+
+import requests
+
+from rapyuta_io.utils.error import InvalidParameterException
+from rapyuta_io.utils.transport import TransportWrapper, get_default_transport, set_default_transport
+from rapyuta_io.utils.utils import prepend_bearer_to_auth_token
+
+# Part of the token lifetime, at the end of it, in which the token is renewed.
+DEFAULT_REFRESH_MARGIN = 0.1
+
+
+class CredentialProvider(object):
+    """
+    Base class of the providers, subclasses implement :py:meth:`_fetch_token`.
+
+    A token is renewed by the first thread needing it once ``refresh_margin`` of its lifetime is left, the other
+    threads keep using the current one meanwhile. Once it has expired, the threads wait for the one renewing it,
+    only one request for a new token is made at a time.
+
+    :param refresh_margin: Part of the token lifetime, between 0 and 1, left when the token is renewed.
+    :type refresh_margin: float
+    :param clock: Time source in seconds, :py:func:`time.monotonic` by default.
+    :type clock: callable
+    """
+
+    def __init__(self, refresh_margin=DEFAULT_REFRESH_MARGIN, clock=time.monotonic):
+        if not 0 <= refresh_margin < 1:
+            raise InvalidParameterException('refresh_margin must be between 0 and 1')
+        self._refresh_margin = refresh_margin
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._header = None
+        self._refresh_at = None
+        self._expires_at = None
+        # Authorization values of every token of the provider, the clients keep the one they were created with.
+        self._issued = set()
+        self.refresh_count = 0
+
+    def _fetch_token(self):
+        """
+        Returns a new token and its lifetime in seconds, None if it does not expire.
+        """
+        raise NotImplementedError
+
+    def auth_header(self):
+        """
+        Returns the ``Authorization`` header of the current token as a read-only mapping, shared by all the
+        requests until the token is renewed.
+        """
+        header = self._header
+        now = self._clock()
+        if header is None or (self._expires_at is not None and now >= self._expires_at):
+            return self.refresh(header['Authorization'] if header is not None else None)
+        if self._refresh_at is not None and now >= self._refresh_at and self._lock.acquire(blocking=False):
+            try:
+                if self._header is header:
+                    self._renew()
+            except Exception:
+                # The token is still valid, renewing it is attempted again by the next request.
+                pass
+            finally:
+                self._lock.release()
+        return self._header
+
+    def auth_token(self):
+        """Returns the current token, with the ``Bearer`` prefix."""
+        return self.auth_header()['Authorization']
+
+    def refresh(self, stale_token=None):
+        """
+        Renews the token, unless it has already been renewed since ``stale_token`` was read, and returns its
+        header.
+        """
+        with self._lock:
+            header = self._header
+            if header is None or header['Authorization'] == stale_token:
+                self._renew()
+            return self._header
+
+    def _renew(self):
+        token, lifetime = self._fetch_token()
+        authorization = prepend_bearer_to_auth_token(token)
+        now = self._clock()
+        if lifetime is None:
+            self._refresh_at = self._expires_at = None
+        else:
+            self._refresh_at = now + lifetime * (1 - self._refresh_margin)
+            self._expires_at = now + lifetime
+        self._issued.add(authorization)
+        self._header = types.MappingProxyType({'Authorization': authorization})
+        self.refresh_count += 1
+
+    def is_issued(self, authorization):
+        """True if ``authorization`` is the ``Authorization`` header of a token of the provider."""
+        return authorization in self._issued
+
+
+class TokenCredentials(CredentialProvider):
+    """
+    Provider calling ``fetch_token`` for new tokens.
+
+    :param fetch_token: Callable returning a new auth token.
+    :type fetch_token: callable
+    :param lifetime: Validity of the tokens in seconds, None if they do not expire.
+    :type lifetime: float
+    """
+
+    def __init__(self, fetch_token, lifetime=None, refresh_margin=DEFAULT_REFRESH_MARGIN, clock=time.monotonic):
+        super(TokenCredentials, self).__init__(refresh_margin, clock)
+        self._fetch = fetch_token
+        self._lifetime = lifetime
+
+    def _fetch_token(self):
+        return self._fetch(), self._lifetime
+
+
+class PasswordCredentials(CredentialProvider):
+    """
+    Provider logging in with an email and a password, see :py:meth:`~rapyuta_io.Client.get_auth_token`.
+
+    :param email: Email of the user account.
+    :type email: str
+    :param password: User password for the account.
+    :type password: str
+    :param token_level: Level of the tokens, which sets their validity.
+    :type token_level: :py:class:`~rapyuta_io.clients.rip_client.AuthTokenLevel`
+
+    Following example demonstrates how to keep a long-running client authenticated
+
+        >>> from rapyuta_io import Client
+        >>> from rapyuta_io.utils.credentials import PasswordCredentials
+        >>> credentials = PasswordCredentials('email@example.com', 'password')
+        >>> client = Client.from_credentials(credentials, 'project-id')
+    """
+
+    def __init__(self, email, password, token_level=None, refresh_margin=DEFAULT_REFRESH_MARGIN,
+                 clock=time.monotonic):
+        from rapyuta_io.clients.rip_client import AuthTokenLevel
+        super(PasswordCredentials, self).__init__(refresh_margin, clock)
+        self._email = email
+        self._password = password
+        self._token_level = token_level if token_level is not None else AuthTokenLevel.LOW
+
+    def _fetch_token(self):
+        from rapyuta_io.clients.rip_client import RIPClient, TOKEN_LIFETIMES
+        from rapyuta_io.utils.endpoint_config import get_endpoint_config
+        rip_client = RIPClient(rip_host=get_endpoint_config().rip_host)
+        token = rip_client.get_auth_token(self._email, self._password, self._token_level)
+        return token, TOKEN_LIFETIMES[self._token_level]
+
+
+def _is_replayable(kwargs):
+    # File bodies are consumed by the first attempt.
+    return not hasattr(kwargs.get('data'), 'read')
+
+
+class CredentialTransport(TransportWrapper):
+    """
+    Transport sending the requests made with a token of ``credentials`` with its current token instead. A request
+    answered with ``401 Unauthorized`` is sent once more with a new token. Other requests are forwarded unchanged.
+
+    :param credentials: Provider of the tokens
+    :type credentials: :py:class:`CredentialProvider`
+    :param transport: Transport the requests are forwarded to
+    :type transport: :py:class:`~rapyuta_io.utils.transport.Transport`
+    """
+
+    def __init__(self, credentials, transport=None):
+        super(CredentialTransport, self).__init__(transport)
+        self.credentials = credentials
+
+    def _send(self, kwargs, header):
+        # kwargs is the dict of this call, only its headers are copied, once, with the header of the token merged in.
+        kwargs['headers'] = dict(kwargs['headers'], **header)
+        return self._transport.send(**kwargs)
+
+    def send(self, **kwargs):
+        headers = kwargs.get('headers')
+        if not headers or not self.credentials.is_issued(headers.get('Authorization')):
+            return self._transport.send(**kwargs)
+        header = self.credentials.auth_header()
+        response = self._send(kwargs, header)
+        if response.status_code != requests.codes.UNAUTHORIZED or not _is_replayable(kwargs):
+            return response
+        return self._send(kwargs, self.credentials.refresh(header['Authorization']))
+
+
+def install_credentials(credentials):
+    """
+    Puts a :py:class:`CredentialTransport` for ``credentials`` in front of the current default transport, so that a
+    caching or coalescing default transport keeps being used. Nothing is done if it is already installed.
+
+    :param credentials: Provider of the tokens
+    :type credentials: :py:class:`CredentialProvider`
+    :return: The previous default transport
+    """
+    transport = get_default_transport()
+    installed = transport
+    while isinstance(installed, TransportWrapper):
+        if isinstance(installed, CredentialTransport) and installed.credentials is credentials:
+            return transport
+        installed = installed._transport
+    return set_default_transport(CredentialTransport(credentials, transport))
@@ -0,0 +1,156 @@
+# encoding: utf-8
+"""
+API endpoints the clients talk to.
+
+The endpoints are read once from the JSON file named by the ``RIO_CONFIG`` environment variable, hosts missing from
+the file keep their default from :py:data:`~rapyuta_io.utils.settings.default_host_config`. The resolved
+configuration is shared by every :py:class:`~rapyuta_io.Client`, and can be replaced with
+:py:func:`set_endpoint_config`.
+"""
+from __future__ import absolute_import
+
+import json
+import os
+import threading
+
+from six.moves.urllib.parse import urlparse
+
+from rapyuta_io.utils.error import InvalidParameterException
+from rapyuta_io.utils.settings import default_host_config
+
+RIO_CONFIG_ENV = 'RIO_CONFIG'
+
+
+class EndpointConfig(object):
+    """
+    Immutable set of API hosts.
+
+    :param core_api_host: Host of the core API, also serving the device and paramserver APIs.
+    :param catalog_host: Host of the catalog API.
+    :param rip_host: Host of the authentication API.
+    :raises: :py:class:`~rapyuta_io.utils.error.InvalidParameterException`: If a host is not an http(s) URL.
+
+    Following example demonstrates how to point the clients to a staging environment
+
+        >>> from rapyuta_io.utils.endpoint_config import EndpointConfig, set_endpoint_config
+        >>> set_endpoint_config(EndpointConfig(core_api_host='https://api.staging.example.com'))
+
+    """
+    HOSTS = ('core_api_host', 'catalog_host', 'rip_host')
+    __slots__ = HOSTS
+
+    def __init__(self, core_api_host=None, catalog_host=None, rip_host=None):
+        for host_type, host in zip(self.HOSTS, (core_api_host, catalog_host, rip_host)):
+            if host is None:
+                host = default_host_config[host_type]
+            object.__setattr__(self, host_type, self._validate_host(host_type, host))
+
+    @staticmethod
+    def _validate_host(host_type, host):
+        if not isinstance(host, str):
+            raise InvalidParameterException('{} must be a string'.format(host_type))
+        parsed = urlparse(host)
+        if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+            raise InvalidParameterException('{} must be an http(s) URL, got {!r}'.format(host_type, host))
+        return host.rstrip('/')
+
+    @classmethod
+    def from_dict(cls, configuration):
+        """Reads the hosts of ``configuration``, other keys are ignored."""
+        if not isinstance(configuration, dict):
+            raise InvalidParameterException('endpoint configuration must be a JSON object')
+        return cls(**{host_type: configuration.get(host_type) for host_type in cls.HOSTS})
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        :raises: :py:class:`~rapyuta_io.utils.error.InvalidParameterException`: If the file cannot be read or is not
+            a valid configuration.
+        """
+        try:
+            with open(path, 'r') as f:
+                configuration = json.load(f)
+        except (IOError, OSError, ValueError) as err:
+            raise InvalidParameterException('invalid endpoint configuration {}: {}'.format(path, err))
+        return cls.from_dict(configuration)
+
+    @classmethod
+    def from_env(cls):
+        """Configuration of the ``RIO_CONFIG`` file, the default hosts if the variable is not set."""
+        path = os.environ.get(RIO_CONFIG_ENV)
+        if not path:
+            return cls()
+        return cls.from_file(path)
+
+    def get(self, host_type):
+        if host_type not in self.HOSTS:
+            raise InvalidParameterException('unknown host type {}'.format(host_type))
+        return getattr(self, host_type)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('EndpointConfig is read-only')
+
+    def __eq__(self, other):
+        if not isinstance(other, EndpointConfig):
+            return NotImplemented
+        return all(getattr(self, h) == getattr(other, h) for h in self.HOSTS)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, h) for h in self.HOSTS))
+
+    def __repr__(self):
+        return 'EndpointConfig({})'.format(', '.join('{}={!r}'.format(h, getattr(self, h)) for h in self.HOSTS))
+
+
+_lock = threading.Lock()
+_override = None
+# (RIO_CONFIG value, EndpointConfig) of the last resolution, the file is read again only if the variable changes.
+_resolved = (None, None)
+
+
+def get_endpoint_config():
+    """
+    Returns the configuration set with :py:func:`set_endpoint_config`, or else the one of the ``RIO_CONFIG`` file.
+
+    :raises: :py:class:`~rapyuta_io.utils.error.InvalidParameterException`: If the ``RIO_CONFIG`` file is invalid.
+    """
+    global _resolved
+    if _override is not None:
+        return _override
+    path = os.environ.get(RIO_CONFIG_ENV)
+    source, config = _resolved
+    if config is not None and source == path:
+        return config
+    with _lock:
+        source, config = _resolved
+        if config is None or source != path:
+            config = EndpointConfig.from_env()
+            _resolved = (path, config)
+        return config
+
+
+def set_endpoint_config(config):
+    """
+    Sets the configuration used by the clients created afterwards, None goes back to the ``RIO_CONFIG`` file.
+
+    :type config: :py:class:`EndpointConfig`
+    :return: The previous override.
+    """
+    global _override
+    if config is not None and not isinstance(config, EndpointConfig):
+        raise InvalidParameterException('config must be an instance of EndpointConfig')
+    with _lock:
+        previous, _override = _override, config
+    return previous
+
+
+def reload_endpoint_config():
+    """Reads the ``RIO_CONFIG`` file again, e.g. after it was modified."""
+    global _resolved
+    with _lock:
+        _resolved = (None, None)
+    return get_endpoint_config()
@@ -0,0 +1,184 @@
+# encoding: utf-8
+"""
+Pluggable JSON codec used by the transport for request payloads and API responses.
+
+Responses are decoded with the fastest codec available (``orjson``, then ``ujson``, then the standard library).
+Requests keep using the standard library encoder by default so that the bytes sent on the wire stay identical to
+previous releases. Call :py:func:`set_json_codec` to pick one codec for both directions.
+"""
+from __future__ import absolute_import
+
+import json
+import threading
+
+
+class JSONCodec(object):
+    """
+    Base class for JSON codecs.
+
+    :py:meth:`loads` must accept both ``bytes`` and ``str``, and :py:meth:`dumps` must return UTF-8 encoded ``bytes``.
+    """
+    name = None
+
+    def loads(self, data):
+        raise NotImplementedError
+
+    def dumps(self, obj):
+        raise NotImplementedError
+
+
+class StdlibJSONCodec(JSONCodec):
+    name = 'json'
+
+    def loads(self, data):
+        # json.loads detects UTF-8/16/32 on bytes input by itself.
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj)
+
+
+class UjsonCodec(JSONCodec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+    def dumps(self, obj):
+        return self._ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+_CODECS = (
+    ('orjson', OrjsonCodec),
+    ('ujson', UjsonCodec),
+    ('json', StdlibJSONCodec),
+)
+
+_stdlib_codec = StdlibJSONCodec()
+_lock = threading.Lock()
+_decoder = None
+_encoder = _stdlib_codec
+
+
+def available_json_codecs():
+    """
+    Names of the codecs that can be used in the current environment, fastest first.
+
+    :rtype: list(str)
+    """
+    names = []
+    for name, codec_cls in _CODECS:
+        try:
+            codec_cls()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def new_json_codec(name):
+    """
+    Creates a codec by name. Valid names are ``orjson``, ``ujson`` and ``json``.
+
+    :raises: :py:class:`ImportError`: If the library backing the codec is not installed.
+    :raises: :py:class:`ValueError`: If the name is unknown.
+    """
+    for codec_name, codec_cls in _CODECS:
+        if codec_name == name:
+            return codec_cls()
+    raise ValueError('unknown JSON codec: {}'.format(name))
+
+
+def _best_available_codec():
+    for _, codec_cls in _CODECS:
+        try:
+            return codec_cls()
+        except ImportError:
+            continue
+    return _stdlib_codec
+
+
+def set_json_codec(codec):
+    """
+    Sets the codec used to decode API responses and encode request payloads.
+
+    :param codec: A codec name (``orjson``, ``ujson`` or ``json``) or a :py:class:`JSONCodec` instance
+    :type codec: str or :py:class:`JSONCodec`
+    """
+    global _decoder, _encoder
+    if not isinstance(codec, JSONCodec):
+        codec = new_json_codec(codec)
+    with _lock:
+        _decoder = codec
+        _encoder = codec
+
+
+def get_json_decoder():
+    """
+    :rtype: :py:class:`JSONCodec`
+    """
+    global _decoder
+    if _decoder is None:
+        with _lock:
+            if _decoder is None:
+                _decoder = _best_available_codec()
+    return _decoder
+
+
+def get_json_encoder():
+    """
+    :rtype: :py:class:`JSONCodec`
+    """
+    return _encoder
+
+
+def is_stdlib_codec(codec):
+    return isinstance(codec, StdlibJSONCodec)
+
+
+def loads(data):
+    """
+    Decodes ``data`` (``bytes`` or ``str``) with the active decoder.
+
+    Third party codecs are stricter than the standard library for a few inputs (``NaN``, integers wider than 64
+    bits), so a failed decode is retried with the standard library before giving up.
+    """
+    decoder = get_json_decoder()
+    try:
+        return decoder.loads(data)
+    except ValueError:
+        if is_stdlib_codec(decoder):
+            raise
+        return _stdlib_codec.loads(data)
+
+
+def dumps(obj):
+    """
+    Encodes ``obj`` to UTF-8 ``bytes`` with the active encoder, falling back to the standard library for values the
+    codec does not support.
+    """
+    encoder = get_json_encoder()
+    try:
+        return encoder.dumps(obj)
+    except (TypeError, ValueError, OverflowError):
+        if is_stdlib_codec(encoder):
+            raise
+        return _stdlib_codec.dumps(obj)
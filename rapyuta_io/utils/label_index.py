@@ -0,0 +1,173 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import threading
+
+import six
+
+
+class LabelIndex(object):
+    """
+    Inverted index of devices by label, mapping every label key and value to the uuids of the devices having it.
+    Used by :py:meth:`~rapyuta_io.Client.find_devices` and
+    :py:meth:`~rapyuta_io.utils.query_builder.DeviceSelection.select` to look up the matching devices without
+    scanning the inventory.
+
+    The index can be shared between threads. It is pickleable, and :py:meth:`to_dict`/:py:meth:`from_dict` convert
+    it to plain data, e.g. to persist it between processes. Neither keeps the auth token, project and host of the
+    devices, :py:meth:`~rapyuta_io.clients.device_manager.DeviceManagerClient.load_inventory` binds the devices of a
+    loaded index to a client again.
+
+    :param devices: Devices to index, :py:class:`~rapyuta_io.clients.device.Device` or
+        :py:class:`~rapyuta_io.clients.compact.CompactDevice`.
+    """
+
+    def __init__(self, devices=()):
+        self._lock = threading.RLock()
+        self._devices = {}
+        # Labels each device was indexed with, devices can be modified after they have been added.
+        self._device_labels = {}
+        self._index = {}
+        for device in devices:
+            self.add_device(device)
+
+    def __getstate__(self):
+        # Devices are pickled as plain data, without the credentials and host of the client that fetched them.
+        with self._lock:
+            devices = list(self._devices.values())
+        return {'devices': [(type(device), _plain_device(device)) for device in devices]}
+
+    def __setstate__(self, state):
+        self.__init__(_load_device(cls, data) for cls, data in state['devices'])
+
+    @staticmethod
+    def _labels(device):
+        # Labels of dictionary based devices are read as stored, without hydrating them.
+        if isinstance(device, dict):
+            return frozenset((label['key'], str(label['value'])) for label in dict.get(device, 'labels') or ())
+        return frozenset((label.key, str(label.value)) for label in getattr(device, 'labels', None) or ())
+
+    def add_device(self, device):
+        """Adds ``device`` to the index, replacing the indexed device with the same uuid."""
+        labels = self._labels(device)
+        with self._lock:
+            self._remove_device(device.uuid)
+            self._devices[device.uuid] = device
+            self._device_labels[device.uuid] = labels
+            for label in labels:
+                self._index.setdefault(label, set()).add(device.uuid)
+
+    def update_device(self, device):
+        """Re-indexes ``device`` if a device with the same uuid is indexed, other devices are not added."""
+        with self._lock:
+            if device.uuid in self._devices:
+                self.add_device(device)
+
+    def remove_device(self, uuid):
+        with self._lock:
+            self._remove_device(uuid)
+
+    def _remove_device(self, uuid):
+        if self._devices.pop(uuid, None) is None:
+            return
+        for label in self._device_labels.pop(uuid):
+            uuids = self._index.get(label)
+            if uuids is not None:
+                uuids.discard(uuid)
+                if not uuids:
+                    del self._index[label]
+
+    def replace(self, devices):
+        """Replaces the indexed devices with ``devices``, e.g. after listing the whole inventory."""
+        devices = list(devices)
+        uuids = {device.uuid for device in devices}
+        with self._lock:
+            for uuid in [uuid for uuid in self._devices if uuid not in uuids]:
+                self._remove_device(uuid)
+            for device in devices:
+                self.add_device(device)
+
+    def clear(self):
+        with self._lock:
+            self._devices.clear()
+            self._device_labels.clear()
+            self._index.clear()
+
+    def lookup(self, key, value):
+        """Returns the uuids of the devices having the label ``key`` set to ``value``."""
+        with self._lock:
+            return frozenset(self._index.get((key, str(value)), ()))
+
+    def query(self, labels, match_all=True):
+        """
+        Returns the uuids of the devices matching ``labels``.
+
+        :param labels: Label keys mapped to a value, or to a list of values any of which matches.
+        :type labels: dict
+        :param match_all: Whether a device must match every key of ``labels``, or at least one of them.
+        :type match_all: bool
+        :rtype: frozenset
+        """
+        with self._lock:
+            matches = []
+            for key, values in six.iteritems(labels):
+                if not isinstance(values, (list, tuple, set, frozenset)):
+                    values = (values,)
+                matched = set()
+                for value in values:
+                    matched.update(self._index.get((key, str(value)), ()))
+                matches.append(matched)
+        if not matches:
+            return frozenset()
+        if not match_all:
+            return frozenset().union(*matches)
+        matches.sort(key=len)
+        return frozenset(matches[0].intersection(*matches[1:]))
+
+    def find(self, labels, match_all=True):
+        """Same as :py:meth:`query`, but returns the devices, sorted by uuid."""
+        uuids = self.query(labels, match_all)
+        with self._lock:
+            return [self._devices[uuid] for uuid in sorted(uuids) if uuid in self._devices]
+
+    def get(self, uuid):
+        return self._devices.get(uuid)
+
+    def to_dict(self):
+        """
+        Returns the indexed devices as plain dictionaries, keys starting with an underscore (credentials, internal
+        state) are left out.
+        """
+        with self._lock:
+            devices = list(self._devices.values())
+        return {'devices': [_plain_device(device) for device in devices]}
+
+    @classmethod
+    def from_dict(cls, data, load):
+        """
+        Builds an index from the output of :py:meth:`to_dict`.
+
+        :param load: Callable converting a plain device dictionary into a device, e.g.
+            :py:meth:`~rapyuta_io.clients.compact.CompactDevice.from_dict`.
+        """
+        return cls(load(device) for device in data['devices'])
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._devices.values()))
+
+    def __contains__(self, uuid):
+        return uuid in self._devices
+
+
+def _plain_device(device):
+    return {k: v for k, v in six.iteritems(device.to_dict()) if not k.startswith('_')}
+
+
+def _load_device(cls, data):
+    # Device has no from_dict, it is built from the API representation.
+    load = getattr(cls, '_deserialize', None) or cls.from_dict
+    return load(data)
@@ -5,51 +5,64 @@ from rapyuta_io.utils.error import OperationNotAllowedError
 import six
 
 
+_MISSING = object()
+
+
+def _is_class_attribute(cls, k):
+    # getattr with a default does not raise internally for type objects, which keeps the common case (k is a
+    # plain key) exception free. The MRO scan excludes attributes of the metaclass such as ``mro``.
+    if getattr(cls, k, _MISSING) is _MISSING:
+        return False
+    for klass in cls.__mro__:
+        if k in klass.__dict__:
+            return True
+    return False
+
+
 class ObjDict(dict):
+    """
+    Dictionary whose keys can also be read and written as attributes.
+
+    Attributes defined on the class (methods, properties) or already set on the instance take precedence, every
+    other attribute is stored as a key.
+    """
+
     def __contains__(self, k):
+        if dict.__contains__(self, k):
+            return True
         try:
-            return hasattr(self, k) or dict.__contains__(self, k)
+            return hasattr(self, k)
         except:  # Not tested: in which situations can this happen?
             return False
 
     # only called if k not found in normal places
     def __getattr__(self, k):
-        try:
-            # Throws exception if not in prototype chain
-            return object.__getattribute__(self, k)
-        except AttributeError:
-            try:
-                return self[k]
-            except KeyError:
-                raise AttributeError(k)
+        value = dict.get(self, k, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(k)
+        return value
 
     def __setattr__(self, k, v):
-        try:
-            # Throws exception if not in prototype chain
-            object.__getattribute__(self, k)
-        except AttributeError:
-            try:
-                self[k] = v
-            except OperationNotAllowedError:
-                raise OperationNotAllowedError
-            except:  # Not tested: in which situations can this happen?
-                raise AttributeError(k)
-        else:  # Not tested: in which situations can this happen?
+        if k in self.__dict__ or _is_class_attribute(type(self), k):
             object.__setattr__(self, k, v)
+            return
+        try:
+            self[k] = v
+        except OperationNotAllowedError:
+            raise OperationNotAllowedError
+        except:  # Not tested: in which situations can this happen?
+            raise AttributeError(k)
 
     def __delattr__(self, k):
-        try:
-            # Throws exception if not in prototype chain
-            object.__getattribute__(self, k)
-        except AttributeError:
-            try:
-                del self[k]
-            except KeyError:
-                raise AttributeError(k)
-            except OperationNotAllowedError:
-                raise OperationNotAllowedError
-        else:  # Not tested: in which situations can this happen?
+        if k in self.__dict__ or _is_class_attribute(type(self), k):
             object.__delattr__(self, k)
+            return
+        try:
+            del self[k]
+        except KeyError:
+            raise AttributeError(k)
+        except OperationNotAllowedError:
+            raise OperationNotAllowedError
 
     def to_dict(self):
         return to_dict(self)
@@ -69,7 +82,123 @@ class ImmutableKeyDict(ObjDict):
         raise OperationNotAllowedError
 
 
-def to_objdict(x):
+class LazyObjDict(ObjDict):
+    """
+    ObjDict that converts nested dictionaries and lists only when they are first read.
+
+    The instance keeps a reference to the dictionary it was built from. As long as neither the instance nor any of
+    the values converted so far have been modified, :func:`to_dict` returns that dictionary instead of a copy.
+    """
+    _source = None
+    _dirty = False
+    _converted = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        super(LazyObjDict, self).__init__(*args, **kwargs)
+        if len(args) == 1 and not kwargs and type(args[0]) is dict:
+            self._source = args[0]
+
+    def _convert(self, k, value):
+        if k in self._converted or not _needs_conversion(value):
+            return value
+        value = to_objdict(value, lazy=True)
+        dict.__setitem__(self, k, value)
+        if not self._converted:
+            self._converted = set()
+        self._converted.add(k)
+        return value
+
+    def _is_pristine(self):
+        if self._source is None or self._dirty:
+            return False
+        for k in self._converted:
+            if not _is_pristine_value(dict.__getitem__(self, k), self._source[k]):
+                return False
+        return True
+
+    def __getitem__(self, k):
+        return self._convert(k, dict.__getitem__(self, k))
+
+    def __getattr__(self, k):
+        value = dict.get(self, k, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(k)
+        return self._convert(k, value)
+
+    def get(self, k, default=None):
+        if not dict.__contains__(self, k):
+            return default
+        return self[k]
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def __setitem__(self, k, v):
+        self._dirty = True
+        super(LazyObjDict, self).__setitem__(k, v)
+
+    def __delitem__(self, k):
+        self._dirty = True
+        super(LazyObjDict, self).__delitem__(k)
+
+    def pop(self, k, *default):
+        self._dirty = True
+        if dict.__contains__(self, k):
+            value = self[k]
+            dict.__delitem__(self, k)
+            return value
+        return dict.pop(self, k, *default)
+
+    def popitem(self):
+        self._dirty = True
+        k = next(reversed(self))
+        return k, self.pop(k)
+
+    def setdefault(self, k, default=None):
+        if dict.__contains__(self, k):
+            return self[k]
+        self[k] = default
+        return default
+
+    def update(self, *args, **kwargs):
+        self._dirty = True
+        super(LazyObjDict, self).update(*args, **kwargs)
+
+    def clear(self):
+        self._dirty = True
+        super(LazyObjDict, self).clear()
+
+
+def _needs_conversion(value):
+    return isinstance(value, (list, tuple)) or (isinstance(value, dict) and not isinstance(value, ObjDict))
+
+
+def _is_pristine_value(value, source):
+    if isinstance(value, LazyObjDict):
+        return value._source is source and value._is_pristine()
+    if isinstance(value, (list, tuple)):
+        return len(value) == len(source) and all(_is_pristine_value(v, s) for v, s in zip(value, source))
+    return value is source
+
+
+def to_objdict(x, lazy=False):
+    """
+    Converts dictionaries in ``x`` (recursively) to :class:`ObjDict`.
+
+    :param lazy: When True, dictionaries are wrapped in a :class:`LazyObjDict` which converts nested values on
+        first access instead of copying the whole structure upfront.
+    """
+    if lazy:
+        if isinstance(x, LazyObjDict):
+            return x
+        if isinstance(x, dict):
+            return LazyObjDict(x)
+        if isinstance(x, (list, tuple)):
+            return type(x)(to_objdict(v, lazy=True) for v in x)
+        return x
     if isinstance(x, dict):
         return ObjDict((k, to_objdict(v)) for k, v in six.iteritems(x))
     elif isinstance(x, (list, tuple)):
@@ -79,6 +208,14 @@ def to_objdict(x):
 
 
 def to_dict(x):
+    """
+    Converts ``x`` (recursively) back to plain dictionaries.
+
+    Unmodified :class:`LazyObjDict` instances return the dictionary they were created from without copying it, so
+    the result must be treated as read-only.
+    """
+    if isinstance(x, LazyObjDict) and x._is_pristine():
+        return x._source
     if isinstance(x, dict):
         return dict((k, to_dict(v)) for k, v in six.iteritems(x))
     elif isinstance(x, (list, tuple)):
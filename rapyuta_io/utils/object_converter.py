@@ -1,10 +1,98 @@
 from __future__ import absolute_import
 from abc import ABCMeta, abstractmethod
 import enum
+import keyword
 import six
 
+# Compiled (de)serializers keyed by class, the serializers along with the map they were compiled from. Serializers of
+# maps depending on the instance state are keyed by the class and the map contents instead.
+_serializers = {}
+_deserializers = {}
+
+
+def _serialize_value(attr_val):
+    if isinstance(attr_val, ObjBase):
+        return attr_val.serialize()
+    elif isinstance(attr_val, list) and all(isinstance(x, ObjBase) for x in attr_val):
+        return [v.serialize() for v in attr_val]
+    elif isinstance(attr_val, enum.Enum):
+        return attr_val.value
+    return attr_val
+
+
+_PLAIN_TYPES = frozenset([str, int, float, bool, dict])
+
+
+def _attr_expr(attr_name):
+    if isinstance(attr_name, str) and attr_name.isidentifier() and not keyword.iskeyword(attr_name):
+        return 'obj.' + attr_name
+    return None
+
+
+def _compile(name, lines, namespace):
+    source = '\n'.join(lines)
+    code = compile(source, '<ObjBase {}>'.format(name), 'exec')
+    six.exec_(code, namespace)
+    return namespace[name]
+
+
+def _compile_serializer(serialization_map):
+    """
+    Generates a function equivalent to the generic loop over ``serialization_map``, with one code path per field.
+    Values of plain JSON types are stored directly, everything else goes through :func:`_serialize_value`.
+    """
+    namespace = {'_serialize_value': _serialize_value, '_PLAIN_TYPES': _PLAIN_TYPES, '_getattr': getattr}
+    lines = ['def serialize(obj):', '    res = {}']
+    for i, (api_field, attr_name) in enumerate(serialization_map.items()):
+        namespace['_api_field_{}'.format(i)] = api_field
+        namespace['_attr_name_{}'.format(i)] = attr_name
+        expr = _attr_expr(attr_name) or '_getattr(obj, _attr_name_{})'.format(i)
+        lines.extend([
+            '    v = {}'.format(expr),
+            '    if v is not None:',
+            '        res[_api_field_{0}] = v if type(v) in _PLAIN_TYPES else _serialize_value(v)'.format(i),
+        ])
+    lines.append('    return res')
+    return _compile('serialize', lines, namespace)
+
+
+def _compile_deserializer(deserialization_map):
+    """
+    Generates a function equivalent to the generic loop over ``deserialization_map``, with one assignment per field.
+    """
+    namespace = {'_setattr': setattr}
+    lines = ['def deserialize(obj, data):', '    get = data.get']
+    for i, (attr_name, val) in enumerate(deserialization_map.items()):
+        namespace['_attr_name_{}'.format(i)] = attr_name
+        if isinstance(val, tuple):
+            api_field, callable_ = val
+            namespace['_callable_{}'.format(i)] = callable_
+            value = '_callable_{0}(get(_api_field_{0}))'.format(i)
+        else:
+            api_field = val
+            value = 'get(_api_field_{})'.format(i)
+        namespace['_api_field_{}'.format(i)] = api_field
+        expr = _attr_expr(attr_name)
+        if expr:
+            lines.append('    {} = {}'.format(expr, value))
+        else:
+            lines.append('    _setattr(obj, _attr_name_{}, {})'.format(i, value))
+    lines.append('    return obj')
+    return _compile('deserialize', lines, namespace)
+
 
 class ObjBase(six.with_metaclass(ABCMeta)):
+    """
+    Base of the objects converted from and to API payloads with :py:meth:`get_deserialize_map` and
+    :py:meth:`get_serialize_map`.
+
+    The (de)serializers are compiled from the maps on first use and cached per class. Subclasses whose
+    ``get_serialize_map`` depends on the instance state set ``_dynamic_serialize_map`` to True, their serializers are
+    cached per map contents. A map differing from the one the serializer of the class was compiled from is detected
+    and handled the same way, the flag only saves comparing the maps.
+    """
+    _dynamic_serialize_map = False
+
     @abstractmethod
     def get_serialize_map(self):
         """
@@ -24,31 +112,38 @@ class ObjBase(six.with_metaclass(ABCMeta)):
         """
 
     def serialize(self):
-        res = {}
+        cls = type(self)
         serialization_map = self.get_serialize_map()
-        for api_field, attr_name in serialization_map.items():
-            attr_val = getattr(self, attr_name)
-            if attr_val is None:
-                continue
-            if isinstance(attr_val, ObjBase):
-                res[api_field] = attr_val.serialize()
-            elif isinstance(attr_val, list) and all([isinstance(x, ObjBase) for x in attr_val]):
-                res[api_field] = [v.serialize() for v in attr_val]
-            elif isinstance(attr_val, enum.Enum):
-                res[api_field] = attr_val.value
-            else:
-                res[api_field] = attr_val
-        return res
+        if not cls._dynamic_serialize_map:
+            compiled = _serializers.get(cls)
+            if compiled is None:
+                compiled = _serializers[cls] = (serialization_map, _compile_serializer(serialization_map))
+            if compiled[0] == serialization_map:
+                return compiled[1](self)
+        key = (cls, tuple(serialization_map.items()))
+        serializer = _serializers.get(key)
+        if serializer is None:
+            serializer = _serializers[key] = _compile_serializer(serialization_map)
+        return serializer(self)
 
     @classmethod
     def deserialize(cls, data, obj=None, only=None):
         if not obj:
             obj = cls.__new__(cls)
-        if only and (not isinstance(only, list) or any([x for x in only if not isinstance(x, str)])):
+        if only and (not isinstance(only, list) or any(not isinstance(x, str) for x in only)):
             raise Exception('only should be a list of string')
+        if only:
+            return cls._deserialize_fields(data, obj, only)
+        deserializer = _deserializers.get(type(obj))
+        if deserializer is None:
+            deserializer = _deserializers[type(obj)] = _compile_deserializer(obj.get_deserialize_map())
+        return deserializer(obj, data)
+
+    @staticmethod
+    def _deserialize_fields(data, obj, only):
         deserialization_map = obj.get_deserialize_map()
         for attr_name, val in deserialization_map.items():
-            if only and attr_name not in only:
+            if attr_name not in only:
                 continue
             if isinstance(val, tuple):
                 api_field, callable_ = val
@@ -81,8 +176,10 @@ def enum_field(api_field, cls):
     if not issubclass(cls, enum.Enum):
         raise Exception('{} should be a subclass of Enum'.format(cls.__name__))
 
+    members = tuple(cls.__members__.values())
+
     def deserialize(data):
-        if data not in list(cls.__members__.values()):
+        if data not in members:
             return data
         return cls(data)
 
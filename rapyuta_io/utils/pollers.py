@@ -2,13 +2,24 @@ from abc import abstractmethod
 import time
 
 from rapyuta_io.utils import RetriesExhausted
+from rapyuta_io.utils.request_context import ContextThreadPoolExecutor
 
 
 class RefreshPollerMixin(object):
     """
     Mixin to be used for API resource objects that have `refresh()` method (see utils.partials.PartialMixin.refresh()).
     This refresh method is used to update object after polling the API resource.
+
+    Classes can set `_refresh_many` to a classmethod that refreshes a list of objects with a single (list) API call,
+    which :py:func:`poll_till_ready_many` uses instead of calling `refresh()` on each object. It returns a dict of
+    the exceptions of the objects that could not be refreshed, keyed by `id(object)`. `_refresh_many_size` returns
+    the number of objects the call lists for the given objects, None while it is unknown.
     """
+    _refresh_many = None
+
+    @classmethod
+    def _refresh_many_size(cls, objects):
+        return None
 
     @abstractmethod
     def refresh(self):
@@ -39,3 +50,122 @@ class RefreshPollerMixin(object):
             time.sleep(sleep_interval)
         msg = 'Retries exhausted: Tried {} times with {}s interval.'.format(retry_count, sleep_interval)
         raise RetriesExhausted(msg)
+
+
+def _use_refresh_many(cls, group, batch_threshold, batch_ratio):
+    if cls._refresh_many is None or len(group) < batch_threshold:
+        return False
+    # Listing a large inventory for a few objects costs more than refreshing them one by one.
+    size = cls._refresh_many_size(group)
+    return size is None or len(group) >= size * batch_ratio
+
+
+def _refresh_objects(objects, executor, batch_threshold, batch_ratio):
+    """
+    Refreshes ``objects``, returns the exceptions of the ones that failed keyed by ``id(object)``.
+    """
+    errors = {}
+    by_class = {}
+    for obj in objects:
+        by_class.setdefault(type(obj), []).append(obj)
+    single = []
+    for cls, group in by_class.items():
+        if not _use_refresh_many(cls, group, batch_threshold, batch_ratio):
+            single.extend(group)
+            continue
+        try:
+            errors.update(cls._refresh_many(group))
+        except Exception as err:
+            errors.update((id(obj), err) for obj in group)
+
+    def refresh(obj):
+        try:
+            obj.refresh()
+        except Exception as err:
+            return err
+
+    for obj, err in zip(single, executor.map(refresh, single)):
+        if err is not None:
+            errors[id(obj)] = err
+    return errors
+
+
+def poll_till_ready_many(objects, timeout, sleep_interval=1, max_interval=30, backoff=2, max_workers=15,
+                         batch_threshold=5, batch_ratio=0.1):
+    """
+    Polls many :py:class:`RefreshPollerMixin` objects concurrently and yields them as they become ready.
+
+    Every round refreshes the pending objects, in a thread pool or with one `_refresh_many` call per class when at
+    least `batch_threshold` objects of the class are pending, and at least `batch_ratio` of the objects the call
+    lists. The first round uses `_refresh_many` as soon as `batch_threshold` is reached, the number of objects it
+    lists is not known before. The interval grows by `backoff` after every round in
+    which no object became ready, up to `max_interval`, and goes back to `sleep_interval` otherwise. Refresh errors
+    are retried until the deadline.
+
+    :param objects: Objects to poll.
+    :type objects: list
+    :param timeout: Seconds after which polling stops, shared by all the objects.
+    :type timeout: float
+    :param sleep_interval: Initial sleep seconds between rounds.
+    :type sleep_interval: float
+    :param max_interval: Maximum sleep seconds between rounds.
+    :type max_interval: float
+    :param backoff: Factor the interval grows by after a round without progress.
+    :type backoff: float
+    :param max_workers: Maximum number of objects refreshed in parallel.
+    :type max_workers: int
+    :param batch_threshold: Minimum number of pending objects of a class for which `_refresh_many` is used.
+    :type batch_threshold: int
+    :param batch_ratio: Minimum part of the objects listed by `_refresh_many`, e.g. the devices of the project, that
+        must be pending for it to be used.
+    :type batch_ratio: float
+    :return: Generator of `(object, error)` tuples, `error` is None if the object is ready, or the exception raised
+        by its `is_ready()`.
+    :raises: :py:class:`RetriesExhausted`: If objects are still not ready at the deadline. They are listed in its
+        `pending` attribute.
+
+    Following example demonstrates how to wait for a fleet to come online
+
+        >>> from rapyuta_io import Client
+        >>> from rapyuta_io.utils.pollers import poll_till_ready_many
+        >>> client = Client(auth_token='auth_token', project='project_guid')
+        >>> devices = client.get_all_devices()
+        >>> for device, error in poll_till_ready_many(devices, timeout=600):
+        >>>     print(device.name, 'is online')
+    """
+    pending = list(objects)
+    deadline = time.monotonic() + timeout
+    interval = sleep_interval
+    errors = {}
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending:
+            errors = _refresh_objects(pending, executor, batch_threshold, batch_ratio)
+            not_ready = []
+            for obj in pending:
+                if id(obj) in errors:
+                    not_ready.append(obj)
+                    continue
+                try:
+                    ready = obj.is_ready()
+                except Exception as err:
+                    yield obj, err
+                    continue
+                if ready:
+                    yield obj, None
+                else:
+                    not_ready.append(obj)
+            progressed = len(not_ready) < len(pending)
+            pending = not_ready
+            if not pending:
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            interval = sleep_interval if progressed else min(interval * backoff, max_interval)
+            time.sleep(min(interval, remaining))
+    msg = 'Timed out after {}s: {} object(s) not ready.'.format(timeout, len(pending))
+    if errors:
+        msg += ' Last refresh error: {}'.format(next(iter(errors.values())))
+    exc = RetriesExhausted(msg)
+    exc.pending = pending
+    raise exc
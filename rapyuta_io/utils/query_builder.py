@@ -1,66 +1,201 @@
 from __future__ import absolute_import
+import copy
+import functools
 import re
+from collections import namedtuple
 
 from rapyuta_io.utils.settings import LABEL_FORMAT
 from rapyuta_io.utils.settings import MEASUREMENT_FORMAT
 from six.moves import map
 
-label_regex = 'label\.\w+[=]\w+'
+label_regex = r'label\.\w+[=]\w+'
 # should we change for this: label\.\w+=(true|false) ? Or True|False
-measurement_regex = 'measurement\.\w+\.\w+[=><][0-9]+'
+measurement_regex = r'measurement\.\w+\.\w+[=><][0-9]+'
 # measurement\.\w+\.\w+[=><][-+]?[0-9]*\.?[0-9]+ allows for floats (even written without
 # integer part) and negative numbers.
 # measurement\.\w+\.\w+([=><]|[><]=)[-+]?[0-9]*\.?[0-9]+ allows for the previous and
 # having >= or <=.
+status_regex = r'status=\w+$'
 
 __all__ = (
     'build_device_selection_payload',
+    'compile_device_selection',
     'create_label_criteria',
-    'create_measurement_criteria'
+    'create_measurement_criteria',
+    'DeviceSelection',
+    'LabelCriterion',
+    'MeasurementCriterion',
+    'StatusCriterion',
 )
 
 
-def build_device_selection_payload(query):
-    criteria_list = list(map(str.strip, query.split(',')))
-    selection_criteria = list()
-    for criteria in criteria_list:
-        if 'label' in criteria:
-            selection_criteria.append(create_label_criteria(criteria))
-        else:
-            selection_criteria.append(create_measurement_criteria(criteria))
-    return {"clause": "AND", "selection_criteria": selection_criteria}
+class LabelCriterion(namedtuple('LabelCriterion', 'key value')):
+    """Matches the devices having the label ``key`` set to ``value``."""
+    __slots__ = ()
 
+    def payload(self):
+        label = copy.deepcopy(LABEL_FORMAT)
+        field = label['labels']['select_criteria']['fields'][0]
+        field['operator'] = '='
+        field['field'] = self.key
+        field['values']['max_value'] = self.value
+        return label
 
-def create_label_criteria(criteria):
+    def matches(self, device):
+        for label in getattr(device, 'labels', None) or ():
+            if label.key == self.key and str(label.value) == self.value:
+                return True
+        return False
+
+
+class MeasurementCriterion(namedtuple('MeasurementCriterion', 'measurement field operator value')):
+    """Compares a telemetry ``measurement.field`` with ``value``, only the server can evaluate it."""
+    __slots__ = ()
+
+    def payload(self):
+        measurement = copy.deepcopy(MEASUREMENT_FORMAT)
+        measurement['measurements']['measurement'] = self.measurement
+        field = measurement['measurements']['select_criteria']['fields'][0]
+        field['operator'] = self.operator
+        field['field'] = self.field
+        field['values']['max_value'] = self.value
+        return measurement
+
+
+class StatusCriterion(namedtuple('StatusCriterion', 'status')):
+    """Matches the devices in ``status``, e.g. ``status=ONLINE``. It can only be evaluated locally."""
+    __slots__ = ()
+
+    def matches(self, device):
+        return getattr(device, 'status', None) == self.status
+
+
+class DeviceSelection(object):
+    """
+    Parsed device selection query, see :py:func:`compile_device_selection`. Selections are immutable and can be
+    shared between threads.
+
+    :ivar query: The query the selection was compiled from.
+    :ivar criteria: Tuple of :py:class:`LabelCriterion`, :py:class:`MeasurementCriterion` and
+        :py:class:`StatusCriterion`, all of which must match.
+    """
+    __slots__ = ('query', 'criteria')
+
+    def __init__(self, query, criteria):
+        object.__setattr__(self, 'query', query)
+        object.__setattr__(self, 'criteria', tuple(criteria))
+
+    def __setattr__(self, key, value):
+        raise AttributeError('DeviceSelection is read-only')
+
+    def __repr__(self):
+        return 'DeviceSelection({!r})'.format(self.query)
+
+    @property
+    def is_local(self):
+        """True if the selection can be evaluated without the server, i.e. has no measurement criteria."""
+        return not any(isinstance(criterion, MeasurementCriterion) for criterion in self.criteria)
+
+    def payload(self):
+        """
+        Returns a new device selection API payload.
+
+        :raises: ValueError: If the selection has status criteria, which the API does not support.
+        """
+        selection_criteria = []
+        for criterion in self.criteria:
+            if isinstance(criterion, StatusCriterion):
+                raise ValueError('status criteria can only be evaluated locally: %s' % self.query)
+            selection_criteria.append(criterion.payload())
+        return {"clause": "AND", "selection_criteria": selection_criteria}
+
+    def _check_local(self):
+        if not self.is_local:
+            raise ValueError('measurement criteria can only be evaluated by the server: %s' % self.query)
+
+    def matches(self, device):
+        """
+        Evaluates the label and status criteria on ``device``.
+
+        :raises: ValueError: If the selection has measurement criteria.
+        """
+        self._check_local()
+        return all(criterion.matches(device) for criterion in self.criteria)
+
+    def select(self, devices=None, index=None):
+        """
+        Returns the matching devices of ``devices``, or of ``index``. With an index, only the devices having all
+        the selected labels are looked at, sorted by uuid.
+
+        :param devices: Devices to filter, e.g. from :py:meth:`~rapyuta_io.Client.get_all_devices`.
+        :param index: :py:class:`~rapyuta_io.utils.label_index.LabelIndex` of the devices.
+        :raises: ValueError: If the selection has measurement criteria.
+        """
+        self._check_local()
+        labels = [c for c in self.criteria if isinstance(c, LabelCriterion)]
+        if index is None or not labels:
+            if devices is None:
+                devices = index if index is not None else ()
+            return [device for device in devices if self.matches(device)]
+        uuids = sorted((index.lookup(c.key, c.value) for c in labels), key=len)
+        matched = uuids[0].intersection(*uuids[1:])
+        others = [c for c in self.criteria if not isinstance(c, LabelCriterion)]
+        selected = []
+        for uuid in sorted(matched):
+            device = index.get(uuid)
+            if all(criterion.matches(device) for criterion in others):
+                selected.append(device)
+        return selected
+
+
+def _parse_label_criteria(criteria):
     if not bool(re.match(label_regex, criteria)):
         raise ValueError(
             "The query %s does not match the required pattern" % criteria)
-    operator = '='
     temp = criteria.split('=')
-    key = temp[0].split('.')[1]
-    value = temp[1]
-    label = LABEL_FORMAT
-    label['labels']['select_criteria']['fields'][0]['operator'] = operator
-    label['labels']['select_criteria']['fields'][0]['field'] = key
-    label['labels']['select_criteria']['fields'][0]['values'][
-        'max_value'] = value
-    return label
+    return LabelCriterion(temp[0].split('.')[1], temp[1])
 
 
-def create_measurement_criteria(criteria):
+def _parse_measurement_criteria(criteria):
     if not bool(re.match(measurement_regex, criteria)):
         raise ValueError(
             "The query %s does not match the required pattern" % criteria)
-    operator = '>' if '>' in criteria else '<'
-    temp = re.split(r'[><]', criteria)
-    telemetry = temp[0].split('.')[1]
-    field = temp[0].split('.')[2]
-    value = temp[1]
-    measurement = MEASUREMENT_FORMAT
-    measurement['measurements']['measurement'] = telemetry
-    measurement['measurements']['select_criteria']['fields'][0][
-        'operator'] = operator
-    measurement['measurements']['select_criteria']['fields'][0]['field'] = field
-    measurement['measurements']['select_criteria']['fields'][0]['values'][
-        'max_value'] = value
-    return measurement
+    operator = re.search(r'[=><]', criteria).group()
+    temp = re.split(r'[=><]', criteria)
+    return MeasurementCriterion(temp[0].split('.')[1], temp[0].split('.')[2], operator, temp[1])
+
+
+def _parse_criteria(criteria):
+    if criteria.startswith('label.'):
+        return _parse_label_criteria(criteria)
+    if criteria.startswith('status='):
+        if not re.match(status_regex, criteria):
+            raise ValueError(
+                "The query %s does not match the required pattern" % criteria)
+        return StatusCriterion(criteria.split('=')[1])
+    return _parse_measurement_criteria(criteria)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_device_selection(query):
+    """
+    Parses a device selection query once, e.g. ``label.zone=a, measurement.battery.value>20, status=ONLINE``.
+
+    Criteria are separated by commas and must all match. The result is cached per query.
+
+    :rtype: :py:class:`DeviceSelection`
+    :raises: ValueError: If a criteria does not match the grammar.
+    """
+    return DeviceSelection(query, [_parse_criteria(criteria) for criteria in map(str.strip, query.split(','))])
+
+
+def build_device_selection_payload(query):
+    return compile_device_selection(query).payload()
+
+
+def create_label_criteria(criteria):
+    return _parse_label_criteria(criteria).payload()
+
+
+def create_measurement_criteria(criteria):
+    return _parse_measurement_criteria(criteria).payload()
@@ -0,0 +1,230 @@
+# encoding: utf-8
+"""
+Record and replay HTTP traffic in the HAR 1.2 format.
+
+:py:class:`RecordingTransport` captures every request/response pair sent through it. :py:class:`ReplayTransport`
+answers requests from a recording without touching the network, which makes SDK workflows reproducible offline for
+tests and benchmarks. ``Authorization`` headers are never written to a recording.
+"""
+from __future__ import absolute_import
+
+import base64
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from six.moves.urllib.parse import urlencode
+
+import rapyuta_io
+from rapyuta_io.utils.error import APIError
+from rapyuta_io.utils.transport import TransportWrapper
+
+REDACTED = 'REDACTED'
+_REDACTED_HEADERS = ('authorization',)
+
+
+def _name_values(mapping):
+    return [{'name': str(k), 'value': str(v)} for k, v in (mapping or {}).items()]
+
+
+def _request_body(kwargs):
+    if kwargs.get('json') is not None:
+        return 'application/json', json.dumps(kwargs['json'])
+    data = kwargs.get('data')
+    if data is None:
+        return None, None
+    if isinstance(data, bytes):
+        return 'application/octet-stream', base64.b64encode(data).decode('ascii')
+    if isinstance(data, str):
+        return 'text/plain', data
+    # File objects and generators are streamed and cannot be recorded.
+    return 'application/octet-stream', None
+
+
+def _entry_key(method, url, params):
+    return method, url, urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+
+def _har_entry_key(entry):
+    request = entry['request']
+    params = dict((item['name'], item['value']) for item in request.get('queryString', []))
+    return _entry_key(request['method'], request['url'], params)
+
+
+class RecordingTransport(TransportWrapper):
+    """
+    Transport that records each request and its response as a HAR entry.
+
+    :param transport: Transport the requests are forwarded to
+    :type transport: :py:class:`~rapyuta_io.utils.transport.Transport`
+
+    Following example records the requests made by a script and saves them
+
+        >>> from rapyuta_io import Client
+        >>> from rapyuta_io.utils.recording import RecordingTransport
+        >>> from rapyuta_io.utils.transport import set_default_transport
+        >>> recorder = RecordingTransport()
+        >>> set_default_transport(recorder)
+        >>> Client('auth_token', 'project_guid').get_all_devices()
+        >>> recorder.save('devices.har')
+    """
+
+    def __init__(self, transport=None):
+        super(RecordingTransport, self).__init__(transport)
+        self._entries = []
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self):
+        with self._lock:
+            return list(self._entries)
+
+    def send(self, **kwargs):
+        started = datetime.now(timezone.utc)
+        start = time.time()
+        response = self._transport.send(**kwargs)
+        elapsed_ms = (time.time() - start) * 1000.0
+        entry = {
+            'startedDateTime': started.isoformat(),
+            'time': round(elapsed_ms, 3),
+            'request': self._har_request(kwargs),
+            'response': self._har_response(response),
+            'cache': {},
+            'timings': {'send': 0, 'wait': round(elapsed_ms, 3), 'receive': 0},
+        }
+        with self._lock:
+            self._entries.append(entry)
+        return response
+
+    @staticmethod
+    def _har_request(kwargs):
+        headers = {}
+        for name, value in (kwargs.get('headers') or {}).items():
+            headers[name] = REDACTED if name.lower() in _REDACTED_HEADERS else value
+        request = {
+            'method': kwargs.get('method'),
+            'url': kwargs.get('url'),
+            'httpVersion': 'HTTP/1.1',
+            'headers': _name_values(headers),
+            'queryString': _name_values(kwargs.get('params')),
+            'cookies': [],
+            'headersSize': -1,
+            'bodySize': -1,
+        }
+        mime_type, text = _request_body(kwargs)
+        if mime_type is not None:
+            request['postData'] = {'mimeType': mime_type, 'text': text}
+        return request
+
+    @staticmethod
+    def _har_response(response):
+        headers = getattr(response, 'headers', None)
+        headers = dict(headers) if isinstance(headers, Mapping) else {}
+        content = response.content
+        if not isinstance(content, bytes):
+            content = (response.text or '').encode('utf-8')
+        body = {'size': len(content), 'mimeType': headers.get('Content-Type', '')}
+        try:
+            body['text'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            body['text'] = base64.b64encode(content).decode('ascii')
+            body['encoding'] = 'base64'
+        return {
+            'status': response.status_code,
+            'statusText': getattr(response, 'reason', None) or '',
+            'httpVersion': 'HTTP/1.1',
+            'headers': _name_values(headers),
+            'cookies': [],
+            'content': body,
+            'redirectURL': '',
+            'headersSize': -1,
+            'bodySize': len(content),
+        }
+
+    def to_har(self):
+        """
+        :rtype: dict
+        """
+        return {'log': {
+            'version': '1.2',
+            'creator': {'name': 'rapyuta_io', 'version': rapyuta_io.__version__},
+            'entries': self.entries,
+        }}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_har(), f, indent=1)
+
+
+def load_har(path):
+    """
+    Reads the entries of a HAR file.
+
+    :rtype: list(dict)
+    """
+    with open(path, 'r') as f:
+        return json.load(f)['log']['entries']
+
+
+def response_from_har(entry):
+    """
+    Builds a :py:class:`requests.Response` from the response of a HAR entry.
+    """
+    har_response = entry['response']
+    content = har_response.get('content', {})
+    text = content.get('text') or ''
+    response = requests.Response()
+    response.status_code = har_response['status']
+    response.reason = har_response.get('statusText', '')
+    response.url = entry['request']['url']
+    response.headers = CaseInsensitiveDict((item['name'], item['value']) for item in har_response.get('headers', []))
+    response.encoding = 'utf-8'
+    if content.get('encoding') == 'base64':
+        response._content = base64.b64decode(text)
+    else:
+        response._content = text.encode('utf-8')
+    return response
+
+
+class ReplayTransport(TransportWrapper):
+    """
+    Transport that answers requests from recorded HAR entries.
+
+    Requests are matched on method, URL and query parameters. When a request was recorded several times, the
+    responses are replayed in the recorded order and the last one is repeated once they run out.
+
+    :param entries: HAR entries or the path of a HAR file
+    :type entries: list(dict) or str
+    :param transport: If set, requests without a recording are forwarded to this transport instead of failing
+    :type transport: :py:class:`~rapyuta_io.utils.transport.Transport`
+    :raises: :py:class:`~rapyuta_io.utils.error.APIError`: If a request has no recording and no fallback transport
+        is set.
+    """
+
+    def __init__(self, entries, transport=None):
+        self._fallback = transport
+        if isinstance(entries, str):
+            entries = load_har(entries)
+        self._responses = defaultdict(deque)
+        for entry in entries:
+            self._responses[_har_entry_key(entry)].append(entry)
+        self._lock = threading.Lock()
+        super(ReplayTransport, self).__init__(transport)
+
+    def send(self, **kwargs):
+        key = _entry_key(kwargs.get('method'), kwargs.get('url'), kwargs.get('params'))
+        with self._lock:
+            recorded = self._responses.get(key)
+            entry = None
+            if recorded:
+                entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        if entry is not None:
+            return response_from_har(entry)
+        if self._fallback is not None:
+            return self._fallback.send(**kwargs)
+        raise APIError('no recorded response for {} {}'.format(kwargs.get('method'), kwargs.get('url')))
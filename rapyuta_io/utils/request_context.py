@@ -0,0 +1,129 @@
+# encoding: utf-8
+"""
+Per-call project, organization and auth token.
+
+The clients keep the project and token they were created with. :py:func:`request_context` overrides them for the
+requests made in a block of code, without changing the client, so that one client can serve threads and asyncio
+tasks working on different projects at the same time. The context follows asyncio tasks and the worker threads of
+the SDK, see :py:class:`ContextThreadPoolExecutor`. Objects returned by the clients, e.g. devices, keep the project
+and token they were fetched with.
+"""
+from __future__ import absolute_import
+
+import contextlib
+import contextvars
+from concurrent import futures
+
+import six
+
+from rapyuta_io.utils.error import InvalidParameterException
+
+
+class RequestContext(object):
+    """
+    Immutable overrides of the requests made in a :py:func:`request_context` block, None keeps the value of the
+    client.
+
+    :ivar project: GUID of the project.
+    :ivar organization: GUID of the organization.
+    :ivar auth_token: Authentication token, with the ``Bearer`` prefix.
+    """
+    FIELDS = ('project', 'organization', 'auth_token')
+    __slots__ = FIELDS
+
+    def __init__(self, project=None, organization=None, auth_token=None):
+        for name, value in zip(self.FIELDS, (project, organization, auth_token)):
+            if value is not None and (not isinstance(value, six.string_types) or not value):
+                raise InvalidParameterException('{} must be a non-empty string'.format(name))
+            object.__setattr__(self, name, value)
+
+    def merge(self, project=None, organization=None, auth_token=None):
+        """Returns a context with the given values, and the ones of this context for the others."""
+        return RequestContext(project if project is not None else self.project,
+                              organization if organization is not None else self.organization,
+                              auth_token if auth_token is not None else self.auth_token)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('RequestContext is read-only')
+
+    def __eq__(self, other):
+        if not isinstance(other, RequestContext):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, f) for f in self.FIELDS))
+
+    def __repr__(self):
+        # The token is left out, contexts end up in logs.
+        return 'RequestContext(project={!r}, organization={!r})'.format(self.project, self.organization)
+
+
+_EMPTY = RequestContext()
+_current = contextvars.ContextVar('rapyuta_io_request_context', default=_EMPTY)
+
+
+def get_request_context():
+    """
+    :rtype: :py:class:`RequestContext`
+    """
+    return _current.get()
+
+
+@contextlib.contextmanager
+def request_context(project=None, organization=None, auth_token=None):
+    """
+    Makes the requests of the block use ``project``, ``organization`` and ``auth_token`` instead of the values of
+    the client. Nested blocks override the values they are given and keep the others.
+
+    :param project: GUID of the project
+    :type project: str
+    :param organization: GUID of the organization
+    :type organization: str
+    :param auth_token: Authentication token
+    :type auth_token: str
+    :raises: :py:class:`~rapyuta_io.utils.error.InvalidParameterException`: If a value is not a non-empty string.
+
+    Following example demonstrates how to share one client between threads working on different projects
+
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> from rapyuta_io.utils.request_context import request_context
+        >>> def count_devices(project):
+        ...     with request_context(project=project):
+        ...         return len(client.get_all_devices())
+        >>> with ThreadPoolExecutor() as executor:
+        ...     counts = list(executor.map(count_devices, ['project-1', 'project-2']))
+    """
+    if auth_token is not None:
+        from rapyuta_io.utils.utils import prepend_bearer_to_auth_token
+        auth_token = prepend_bearer_to_auth_token(auth_token)
+    context = _current.get().merge(project, organization, auth_token)
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def resolve_project(project):
+    """Returns the project of the current context, ``project`` if it has none."""
+    return _current.get().project or project
+
+
+def resolve_auth_token(auth_token):
+    """Returns the auth token of the current context, ``auth_token`` if it has none."""
+    return _current.get().auth_token or auth_token
+
+
+class ContextThreadPoolExecutor(futures.ThreadPoolExecutor):
+    """
+    Thread pool running every call in a copy of the context it was submitted from, so that
+    :py:func:`request_context` and :py:func:`~rapyuta_io.utils.transport.use_transport` apply to the workers.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super(ContextThreadPoolExecutor, self).submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,357 @@
+# encoding: utf-8
+"""
+HTTP response cache with conditional GET revalidation.
+
+:py:class:`CachingTransport` stores successful GET responses that carry a validator (``ETag`` or ``Last-Modified``)
+in a :py:class:`ResponseCache`. The next identical GET is sent with ``If-None-Match``/``If-Modified-Since`` and a
+``304 Not Modified`` answer is served from the cache without downloading the body again.
+
+Cache keys include the URL, the query parameters and the ``Authorization``, ``project`` and ``organization``
+headers, so entries are never shared between users, projects or organizations.
+"""
+from __future__ import absolute_import
+
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from rapyuta_io.utils.transport import TransportWrapper, is_safe_request, request_key
+
+DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_CACHE_MAX_ENTRIES = 4096
+
+# Response headers kept with an entry and restored on cached responses.
+_STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class CacheEntry(object):
+    """
+    A cached response body and its validators.
+    """
+    __slots__ = ('url', 'content', 'headers', 'etag', 'last_modified')
+
+    def __init__(self, url, content, headers):
+        self.url = url
+        self.content = content
+        self.headers = dict(headers)
+        self.etag = self.headers.get('ETag')
+        self.last_modified = self.headers.get('Last-Modified')
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    def to_response(self):
+        response = CachedResponse()
+        response.status_code = requests.codes.OK
+        response.reason = 'OK'
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = 'utf-8'
+        response._content = self.content
+        return response
+
+
+class CachedResponse(requests.Response):
+    """
+    Response served from a :py:class:`ResponseCache`.
+    """
+    from_cache = True
+
+
+class ResponseCache(object):
+    """
+    Thread safe LRU of responses bounded by the total size of the response bodies, with an optional disk tier.
+
+    :param max_bytes: Total body size kept in memory
+    :type max_bytes: int
+    :param max_entries: Number of entries kept in memory
+    :type max_entries: int
+    :param disk_dir: If set, entries are also written to this directory and looked up there on a memory miss, so
+        that they survive restarts. The directory is created with ``0700`` permissions.
+    :type disk_dir: str
+    :param max_disk_bytes: Total size of the files kept in ``disk_dir``. The least recently written files are
+        removed first.
+    :type max_disk_bytes: int
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES, max_entries=DEFAULT_CACHE_MAX_ENTRIES, disk_dir=None,
+                 max_disk_bytes=None):
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self._disk = _DiskTier(disk_dir, max_disk_bytes) if disk_dir else None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, key):
+        """
+        :rtype: :py:class:`CacheEntry` or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self._disk is None:
+            return None
+        entry = self._disk.get(key)
+        if entry is not None:
+            self._put_memory(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self._put_memory(key, entry)
+        if self._disk is not None:
+            self._disk.put(key, entry)
+
+    def _put_memory(self, key, entry):
+        if entry.size > self._max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self._max_bytes or len(self._entries) > self._max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def invalidate(self, url):
+        """
+        Removes the entries a write to ``url`` can change, whatever their query parameters or credentials: the
+        entries of ``url``, of the URLs under its path and of its parent collection.
+        """
+        matches = _invalidated(url)
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if matches(entry.url)]
+            for key in keys:
+                self._size -= self._entries.pop(key).size
+        if self._disk is not None:
+            self._disk.invalidate(matches)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def record(self, hit):
+        """Counts a request answered from the cache, or a miss."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class _DiskTier(object):
+    """
+    One file per entry: a JSON header line with the URL and stored headers, followed by the raw body.
+
+    The URL and size of every file are kept in an index, read from the directory on first use, so that writes and
+    invalidations do not list or read the other files.
+    """
+    _suffix = '.rioc'
+
+    def __init__(self, path, max_bytes=None):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Key of every file mapped to its URL and size, least recently written first.
+        self._index = None
+        self._total = 0
+        if not os.path.isdir(path):
+            os.makedirs(path, mode=0o700)
+
+    def _file(self, key):
+        return os.path.join(self._path, key + self._suffix)
+
+    def _files(self):
+        return [os.path.join(self._path, name) for name in os.listdir(self._path) if name.endswith(self._suffix)]
+
+    @staticmethod
+    def _read_header(f):
+        return json.loads(f.readline().decode('utf-8'))
+
+    @classmethod
+    def _read(cls, path):
+        with open(path, 'rb') as f:
+            header = cls._read_header(f)
+            return CacheEntry(header['url'], f.read(), header['headers'])
+
+    def _keys(self):
+        # Called with the lock held.
+        if self._index is None:
+            files = []
+            for path in self._files():
+                try:
+                    stat = os.stat(path)
+                    with open(path, 'rb') as f:
+                        url = self._read_header(f)['url']
+                except (IOError, OSError, ValueError, KeyError):
+                    continue
+                key = os.path.basename(path)[:-len(self._suffix)]
+                files.append((stat.st_mtime, key, url, stat.st_size))
+            self._index = OrderedDict()
+            self._total = 0
+            for _, key, url, size in sorted(files):
+                self._index[key] = (url, size)
+                self._total += size
+        return self._index
+
+    def _discard(self, key):
+        # Called with the lock held.
+        _, size = self._keys().pop(key, (None, 0))
+        self._total -= size
+        self._remove(self._file(key))
+
+    def get(self, key):
+        try:
+            return self._read(self._file(key))
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, entry):
+        header = json.dumps({'url': entry.url, 'headers': entry.headers}).encode('utf-8') + b'\n'
+        fd, tmp = tempfile.mkstemp(dir=self._path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(entry.content)
+            os.replace(tmp, self._file(key))
+        except (IOError, OSError):
+            self._remove(tmp)
+            return
+        with self._lock:
+            index = self._keys()
+            _, size = index.pop(key, (None, 0))
+            index[key] = (entry.url, len(header) + entry.size)
+            self._total += len(header) + entry.size - size
+            if self._max_bytes is not None:
+                while self._total > self._max_bytes and index:
+                    self._discard(next(iter(index)))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def invalidate(self, matches):
+        with self._lock:
+            for key in [key for key, (url, _) in self._keys().items() if matches(url)]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            for path in self._files():
+                self._remove(path)
+            self._index = OrderedDict()
+            self._total = 0
+
+
+def _path(url):
+    return url.split('?', 1)[0].rstrip('/')
+
+
+def _invalidated(url):
+    """
+    Returns a predicate matching the URLs a write to ``url`` can change: ``url``, the URLs under its path and its
+    parent collection.
+    """
+    path = _path(url)
+    parent = path.rpartition('/')[0]
+
+    def matches(other):
+        other = _path(other)
+        return other == path or other == parent or other.startswith(path + '/')
+
+    return matches
+
+
+def _validator(response, name):
+    headers = getattr(response, 'headers', None)
+    if not isinstance(headers, Mapping):
+        return None
+    value = headers.get(name)
+    return value if isinstance(value, str) and value else None
+
+
+class CachingTransport(TransportWrapper):
+    """
+    Transport that revalidates GET requests against a :py:class:`ResponseCache`.
+
+    Only ``200 OK`` responses with an ``ETag`` or ``Last-Modified`` header and without ``Cache-Control: no-store``
+    are stored. A successful request with any other method invalidates the cached entries of its URL, of the URLs under
+    it and of its parent collection.
+
+    :param cache: Cache to use. Defaults to an in-memory :py:class:`ResponseCache`.
+    :type cache: :py:class:`ResponseCache`
+    :param transport: Transport the requests are forwarded to
+    :type transport: :py:class:`~rapyuta_io.utils.transport.Transport`
+    """
+
+    def __init__(self, cache=None, transport=None):
+        super(CachingTransport, self).__init__(transport)
+        self.cache = cache if cache is not None else ResponseCache()
+
+    def send(self, **kwargs):
+        if not is_safe_request(kwargs):
+            response = self._transport.send(**kwargs)
+            if 200 <= response.status_code <= 299:
+                self.cache.invalidate(kwargs.get('url'))
+            return response
+
+        url = kwargs.get('url')
+        key = request_key(kwargs.get('method'), url, kwargs.get('params'), kwargs.get('headers'))
+        entry = self.cache.get(key)
+        if entry is not None:
+            headers = dict(kwargs.get('headers') or {})
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+            kwargs['headers'] = headers
+
+        response = self._transport.send(**kwargs)
+        if response.status_code == requests.codes.NOT_MODIFIED and entry is not None:
+            self.cache.record(True)
+            return entry.to_response()
+        self.cache.record(False)
+        if response.status_code == requests.codes.OK:
+            self._store(key, url, response)
+        return response
+
+    def _store(self, key, url, response):
+        if not (_validator(response, 'ETag') or _validator(response, 'Last-Modified')):
+            return
+        if 'no-store' in (_validator(response, 'Cache-Control') or ''):
+            return
+        content = response.content
+        if not isinstance(content, bytes):
+            return
+        headers = {}
+        for name in _STORED_HEADERS:
+            value = _validator(response, name)
+            if value:
+                headers[name] = value
+        self.cache.put(key, CacheEntry(url, content, headers))
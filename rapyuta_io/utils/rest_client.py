@@ -2,21 +2,24 @@
 from __future__ import absolute_import
 
 import enum
-from platform import python_implementation, python_version
+import gzip
+import threading
+import zlib
 from time import sleep
 
 import requests
 from requests.exceptions import RequestException
+from six.moves.urllib.parse import urlparse
 
-import rapyuta_io
-from rapyuta_io.utils import APIError
+from rapyuta_io.utils import APIError, json_codec
+from rapyuta_io.utils.transport import get_transport
 
 DEFAULT_RETRY_COUNT = 4
 WAIT_TIME_IN_SEC = 1
 
-
-requests.utils.default_user_agent = lambda: 'rapyuta_io/{} {}/{} python-requests/{}'.format(
-    rapyuta_io.__version__, python_implementation(), python_version(), requests.__version__)
+# Bodies smaller than this are sent as-is, the gzip framing and CPU time are not worth it.
+DEFAULT_COMPRESS_MIN_SIZE = 4 * 1024
+DEFAULT_COMPRESS_LEVEL = 6
 
 
 class HttpMethod(str, enum.Enum):
@@ -32,6 +35,68 @@ class HttpMethod(str, enum.Enum):
     OPTIONS = 'OPTIONS'
 
 
+class ContentEncoding(str, enum.Enum):
+
+    def __str__(self):
+        return str(self.value)
+
+    GZIP = 'gzip'
+    DEFLATE = 'deflate'
+
+
+def compress_body(body, encoding=ContentEncoding.GZIP, level=DEFAULT_COMPRESS_LEVEL):
+    """
+    Compresses a request body for the given ``Content-Encoding``.
+
+    :param body: Encoded request body
+    :type body: bytes
+    :param encoding: Content encoding to use
+    :type encoding: :py:class:`ContentEncoding`
+    :param level: Compression level, 1 (fastest) to 9 (smallest)
+    :type level: int
+    :rtype: bytes
+    """
+    if encoding == ContentEncoding.GZIP:
+        # mtime is fixed so that the same payload always compresses to the same bytes.
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == ContentEncoding.DEFLATE:
+        return zlib.compress(body, level)
+    raise ValueError('unsupported content encoding: {}'.format(encoding))
+
+
+# Hosts that rejected compressed requests, with 415 Unsupported Media Type or with 400 Bad Request while the same
+# request uncompressed was accepted. Requests to these hosts are sent uncompressed for the rest of the process.
+_compression_rejected_hosts = set()
+_compression_lock = threading.Lock()
+_COMPRESSION_REJECTED = (requests.codes.UNSUPPORTED_MEDIA_TYPE, requests.codes.BAD_REQUEST)
+
+# Encoding of the large request bodies of the SDK (parameters, configurations), None to send them uncompressed.
+_request_compression = None
+
+
+def set_request_compression(encoding=ContentEncoding.GZIP):
+    """
+    Compresses the large request bodies of the SDK, e.g. when applying parameters or uploading configurations, with
+    ``encoding``. Requests are not compressed by default, as not every API server accepts compressed bodies.
+
+    :param encoding: Content encoding to use, None to stop compressing requests
+    :type encoding: :py:class:`ContentEncoding`
+    """
+    global _request_compression
+    _request_compression = ContentEncoding(encoding) if encoding is not None else None
+
+
+def get_request_compression():
+    """
+    Returns the encoding set with :py:func:`set_request_compression`, None if requests are not compressed.
+    """
+    return _request_compression
+
+
+def _host(url):
+    return urlparse(url).netloc
+
+
 class RestClient:
     def __init__(self, url):
         self._url = url
@@ -40,6 +105,9 @@ class RestClient:
         self._method = HttpMethod.GET.value
         self._headers = {}
         self._query_params = {}
+        self._compress_encoding = None
+        self._compress_min_size = DEFAULT_COMPRESS_MIN_SIZE
+        self._transport = None
 
     def url(self, url):
         self._url = url
@@ -62,14 +130,75 @@ class RestClient:
         self._query_params = query_param
         return self
 
+    def transport(self, transport):
+        """
+        Sends the request through ``transport`` instead of the one of the context or the process-wide default, see
+        :py:func:`~rapyuta_io.utils.transport.use_transport`.
+        """
+        self._transport = transport
+        return self
+
+    def _send(self, **kwargs):
+        transport = self._transport if self._transport is not None else get_transport()
+        return transport.send(**kwargs)
+
+    def compress(self, encoding=ContentEncoding.GZIP, min_size=DEFAULT_COMPRESS_MIN_SIZE):
+        """
+        Compresses JSON payloads of at least ``min_size`` bytes with ``encoding``, None leaves them uncompressed. If
+        the server answers with 415 Unsupported Media Type or 400 Bad Request, the request is retried uncompressed
+        and, unless the uncompressed request is rejected as well, later requests to the same host are not compressed.
+        """
+        self._compress_encoding = ContentEncoding(encoding) if encoding is not None else None
+        self._compress_min_size = min_size
+        return self
+
+    def _should_compress(self, payload, raw):
+        if self._compress_encoding is None or payload is None or raw:
+            return False
+        return _host(self._url) not in _compression_rejected_hosts
+
+    def _compressed_request(self, payload, kwargs):
+        body = json_codec.dumps(payload)
+        if len(body) < self._compress_min_size:
+            return None
+        headers = dict(self._headers)
+        headers.update({'Content-Type': 'application/json',
+                        'Content-Encoding': str(self._compress_encoding)})
+        response = self._send(data=compress_body(body, self._compress_encoding),
+                              **dict(kwargs, headers=headers))
+        return response
+
+    def _reject_compression(self):
+        with _compression_lock:
+            _compression_rejected_hosts.add(_host(self._url))
+
     def _request(self, payload, raw=False):
         kwargs = {'method': self._method, 'url': self._url,
                   'headers': self._headers, 'params': self._query_params,
                   'timeout': (30, 150) } # Configures ConnectTimeout(30sec) and ReadTimeout(150sec)
         if raw:
-            response = requests.request(data=payload, **kwargs)
+            response = self._send(data=payload, **kwargs)
+            return response
+        compressed = None
+        if self._should_compress(payload, raw):
+            compressed = self._compressed_request(payload, kwargs)
+            if compressed is not None and compressed.status_code not in _COMPRESSION_REJECTED:
+                return compressed
+        response = self._uncompressed_request(payload, kwargs)
+        # A Bad Request for the uncompressed body as well is about the payload, not the encoding.
+        if compressed is not None and (compressed.status_code == requests.codes.UNSUPPORTED_MEDIA_TYPE or
+                                       response.status_code != requests.codes.BAD_REQUEST):
+            self._reject_compression()
+        return response
+
+    def _uncompressed_request(self, payload, kwargs):
+        encoder = json_codec.get_json_encoder()
+        if payload is None or json_codec.is_stdlib_codec(encoder):
+            # requests serializes with the stdlib json module itself.
+            response = self._send(json=payload, **kwargs)
             return response
-        response = requests.request(json=payload, **kwargs)
+        kwargs['headers'] = dict(self._headers, **{'Content-Type': 'application/json'})
+        response = self._send(data=json_codec.dumps(payload), **kwargs)
         return response
 
     def execute(self, payload=None, raw=False):
@@ -0,0 +1,246 @@
+# encoding: utf-8
+"""
+Transports send the HTTP requests built by :py:class:`~rapyuta_io.utils.rest_client.RestClient`.
+
+A transport receives the keyword arguments of :py:func:`requests.request` and returns a
+:py:class:`requests.Response`. Wrappers add behaviour around another transport and can be stacked, e.g.
+``CachingTransport(ResponseCache(), transport=Transport())``. The process-wide default is set with
+:py:func:`set_default_transport`, and can be overridden for a block of code with :py:func:`use_transport`.
+"""
+from __future__ import absolute_import
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import threading
+from platform import python_implementation, python_version
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+
+_user_agent_installed = False
+
+
+def install_user_agent():
+    """
+    Makes requests identify itself as the SDK. Done before the first request rather than at import time, so that
+    importing the package does not change requests for the rest of the process until the SDK is used.
+    """
+    global _user_agent_installed
+    if _user_agent_installed:
+        return
+    import rapyuta_io
+    requests.utils.default_user_agent = lambda: 'rapyuta_io/{} {}/{} python-requests/{}'.format(
+        rapyuta_io.__version__, python_implementation(), python_version(), requests.__version__)
+    _user_agent_installed = True
+
+
+class Transport(object):
+    """
+    Sends requests with :py:func:`requests.request`.
+    """
+
+    def send(self, **kwargs):
+        install_user_agent()
+        return requests.request(**kwargs)
+
+
+class SessionTransport(Transport):
+    """
+    Sends requests through a :py:class:`requests.Session`, so that connections are kept alive and reused.
+
+    :param pool_maxsize: Connections kept open per host, should match the number of threads sending requests.
+    :type pool_maxsize: int
+    :param session: Session to use instead of a new one
+    :type session: :py:class:`requests.Session`
+    """
+
+    def __init__(self, pool_maxsize=10, session=None):
+        if session is None:
+            # The session copies the user agent when it is created.
+            install_user_agent()
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self._session = session
+
+    def send(self, **kwargs):
+        return self._session.request(**kwargs)
+
+    def close(self):
+        self._session.close()
+
+
+class TransportWrapper(Transport):
+    """
+    Base class for transports that delegate to another transport.
+
+    :param transport: Transport the requests are forwarded to. Defaults to :py:class:`Transport`.
+    :type transport: :py:class:`Transport`
+    """
+
+    def __init__(self, transport=None):
+        self._transport = transport if transport is not None else Transport()
+
+    def send(self, **kwargs):
+        return self._transport.send(**kwargs)
+
+
+def is_safe_request(kwargs):
+    """
+    True for GET requests without a body, the only requests transports may serve from a cache or share.
+    """
+    return kwargs.get('method') == 'GET' and kwargs.get('json') is None and \
+        kwargs.get('data') is None
+
+
+# Headers telling whose data a request reads: the auth token, and the project and organization that
+# create_auth_header and the request context set.
+IDENTITY_HEADERS = ('Authorization', 'project', 'organization')
+
+
+def request_key(method, url, params=None, headers=None):
+    """
+    Identity of a request for caching and coalescing: a SHA-256 over the method, URL, sorted query parameters and
+    the :py:data:`IDENTITY_HEADERS`.
+
+    :rtype: str
+    """
+    headers = CaseInsensitiveDict(headers or {})
+    params = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    parts = [method, url, json.dumps(params)] + [headers.get(name) or '' for name in IDENTITY_HEADERS]
+    return hashlib.sha256(u'\x00'.join(parts).encode('utf-8')).hexdigest()
+
+
+class _InFlight(object):
+    __slots__ = ('done', 'response', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.waiters = 0
+
+
+class CoalescingTransport(TransportWrapper):
+    """
+    Transport that merges identical concurrent GET requests into one (single-flight).
+
+    The first caller sends the request. Callers arriving while it is in flight, with the same method, URL, query
+    parameters and :py:data:`IDENTITY_HEADERS`, wait for it and receive the same response, or the same
+    exception. Requests with any other method are always sent.
+
+    :param transport: Transport the requests are forwarded to
+    :type transport: :py:class:`Transport`
+    """
+
+    def __init__(self, transport=None):
+        super(CoalescingTransport, self).__init__(transport)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def send(self, **kwargs):
+        if not is_safe_request(kwargs):
+            return self._transport.send(**kwargs)
+
+        key = request_key(kwargs.get('method'), kwargs.get('url'), kwargs.get('params'), kwargs.get('headers'))
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _InFlight()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            response = self._transport.send(**kwargs)
+            if isinstance(response, requests.Response):
+                # Read the body before sharing the response, so that followers never race on the stream.
+                response.content
+            call.response = response
+            return response
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+
+_default_transport = Transport()
+_default_transport_lock = threading.Lock()
+_context_transport = contextvars.ContextVar('rapyuta_io_transport', default=None)
+
+
+def get_default_transport():
+    """
+    :rtype: :py:class:`Transport`
+    """
+    return _default_transport
+
+
+def set_default_transport(transport):
+    """
+    Sets the transport used by every :py:class:`~rapyuta_io.utils.rest_client.RestClient` that has not been
+    given one explicitly, and returns the previous one.
+
+    :param transport: The new default transport, ``None`` restores :py:class:`Transport`
+    :type transport: :py:class:`Transport`
+    :rtype: :py:class:`Transport`
+
+    Following example enables the response cache for the whole process
+
+        >>> from rapyuta_io.utils.response_cache import ResponseCache, CachingTransport
+        >>> from rapyuta_io.utils.transport import set_default_transport
+        >>> set_default_transport(CachingTransport(ResponseCache(max_bytes=64 * 1024 * 1024)))
+    """
+    global _default_transport
+    with _default_transport_lock:
+        previous = _default_transport
+        _default_transport = transport if transport is not None else Transport()
+    return previous
+
+
+def get_transport():
+    """
+    Returns the transport set with :py:func:`use_transport` in the current context, or else the default one.
+
+    :rtype: :py:class:`Transport`
+    """
+    transport = _context_transport.get()
+    return transport if transport is not None else _default_transport
+
+
+@contextlib.contextmanager
+def use_transport(transport):
+    """
+    Sends the requests made in the block through ``transport``, unless a request is given one explicitly. Unlike
+    :py:func:`set_default_transport`, other threads and asyncio tasks are not affected.
+
+    :param transport: Transport of the block
+    :type transport: :py:class:`Transport`
+
+    Following example lists the devices over kept-alive connections
+
+        >>> from rapyuta_io.utils.transport import SessionTransport, use_transport
+        >>> with use_transport(SessionTransport()):
+        ...     devices = client.get_all_devices()
+    """
+    token = _context_transport.set(transport)
+    try:
+        yield transport
+    finally:
+        _context_transport.reset(token)
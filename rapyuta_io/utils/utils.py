@@ -8,12 +8,13 @@ from functools import wraps
 
 import requests
 import six
-import yaml
 from six.moves import range
 
 from rapyuta_io.utils import APIError, ParameterMissingException, InvalidParameterException, \
     UnauthorizedError, ResourceNotFoundError, BadRequestError, InternalServerError, ConflictError, \
     ForbiddenError, InvalidJSONError, InvalidYAMLError
+from rapyuta_io.utils import json_codec
+from rapyuta_io.utils.request_context import get_request_context
 from rapyuta_io.utils.settings import EMPTY, DEFAULT_RANDOM_VALUE_LENGTH
 
 BEARER = "Bearer"
@@ -27,12 +28,16 @@ def prepend_bearer_to_auth_token(auth_token):
 
 
 def create_auth_header(auth_token, project):
-    return dict(Authorization=auth_token, project=project)
+    # The token and project are used as given, clients resolve their defaults against the request context.
+    organization = get_request_context().organization
+    if organization:
+        return {'Authorization': auth_token, 'project': project, 'organization': organization}
+    return {'Authorization': auth_token, 'project': project}
 
 
 def get_error(response_data):
     try:
-        err_response = json.loads(response_data)
+        err_response = json_codec.loads(response_data)
         error_msg = err_response.get('error', None)
         if error_msg:
             return error_msg
@@ -58,6 +63,17 @@ def validate_list_of_strings(obj, parameter_name):
                 parameter_name))
 
 
+def get_response_body(response):
+    """
+    Returns the raw body of the response, preferring the undecoded bytes so that the JSON codec can parse them
+    without the intermediate str copy made by ``response.text``.
+    """
+    content = response.content
+    if isinstance(content, (bytes, bytearray)):
+        return content
+    return response.text
+
+
 def get_api_response_data(response, parse_full=False, errors=None, return_value=None):
     common_errors = {requests.codes.BAD_REQUEST: BadRequestError,
                      requests.codes.UNAUTHORIZED: UnauthorizedError,
@@ -72,7 +88,7 @@ def get_api_response_data(response, parse_full=False, errors=None, return_value=
         if return_value:
             return return_value
         try:
-            response_data = json.loads(response.text)
+            response_data = json_codec.loads(get_response_body(response))
             if parse_full:
                 return response_data
             else:
@@ -80,9 +96,9 @@ def get_api_response_data(response, parse_full=False, errors=None, return_value=
         except Exception as err:
             raise APIError(err)
     elif status_code in common_errors:
-        raise common_errors[status_code](get_error(response.text))
+        raise common_errors[status_code](get_error(get_response_body(response)))
     else:
-        raise APIError(get_error(response.text))
+        raise APIError(get_error(get_response_body(response)))
 
 
 def response_validator(parse_full=False, errors=None, return_value=None):
@@ -161,6 +177,9 @@ def parse_json(filepath):
 
 def parse_yaml(filepath):
     """Parse the given file and checks if it is a valid YAML. If not, raises an error."""
+    # yaml is only needed to upload configurations, it is imported on first use.
+    import yaml
+
     try:
         with open(filepath, 'r') as f:
             data = f.read()
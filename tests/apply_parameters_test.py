@@ -0,0 +1,151 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import asyncio
+import threading
+import time
+import unittest
+
+from mock import patch
+
+from rapyuta_io.utils import InvalidParameterException
+from tests.utils.client import get_client
+from tests.utils.fake_api import FakeAPI, data_response, mock_response
+
+
+class _FakeParametersAPI(FakeAPI):
+    """
+    Applies the parameters to the devices, except to the ``flaky`` ones the first time and the ``broken`` ones
+    always. Calls including ``rejected`` fail as a whole.
+    """
+
+    def __init__(self, flaky=(), broken=(), rejected=None):
+        super(_FakeParametersAPI, self).__init__()
+        self.flaky = set(flaky)
+        self.broken = set(broken)
+        self.rejected = rejected
+
+    @property
+    def batches(self):
+        return [kwargs['json']['device_list'] for _, _, kwargs in self.calls]
+
+    def answer(self, method, url, json=None, **kwargs):
+        device_list = json['device_list']
+        with self.lock:
+            if self.rejected in device_list:
+                return mock_response('{"error": "tree not found"}', 400)
+            data = []
+            for device_id in device_list:
+                success = device_id not in self.flaky and device_id not in self.broken
+                self.flaky.discard(device_id)
+                data.append({'device_id': device_id, 'success': success})
+                if not success:
+                    data[-1]['error'] = 'device offline'
+        return data_response(data)
+
+
+class ApplyParametersTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = get_client()
+        self.devices = ['device-{}'.format(i) for i in range(10)]
+
+    def test_iter_apply_parameters(self):
+        api = _FakeParametersAPI(flaky=['device-2', 'device-7'], broken=['device-5'])
+        with patch('requests.Session.request', side_effect=api):
+            results = list(self.client.iter_apply_parameters(self.devices + ['device-1'], ['tree1'],
+                                                             batch_size=4, max_workers=2))
+
+        self.assertEqual(sorted(r['device_id'] for r in results), self.devices)
+        failed = [r for r in results if not r['success']]
+        self.assertEqual(failed, [{'device_id': 'device-5', 'success': False, 'error': 'device offline'}])
+        self.assertEqual(sorted(len(batch) for batch in api.batches[:3]), [2, 4, 4])
+        self.assertEqual(sorted(api.batches[3]), ['device-2', 'device-5', 'device-7'])
+        self.assertEqual(len(api.batches), 4)
+        self.assertIsNone(results[0]['error'])
+
+    def test_failed_batch(self):
+        api = _FakeParametersAPI(rejected='device-9')
+        with patch('requests.Session.request', side_effect=api):
+            results = list(self.client.iter_apply_parameters(self.devices, batch_size=5, retries=0))
+        failed = sorted(r['device_id'] for r in results if not r['success'])
+        self.assertEqual(failed, ['device-5', 'device-6', 'device-7', 'device-8', 'device-9'])
+        self.assertIn('tree not found', [r for r in results if not r['success']][0]['error'])
+        self.assertEqual(len(api.batches), 2)
+
+    def test_iter_apply_parameters_async(self):
+        api = _FakeParametersAPI(flaky=['device-3'])
+
+        async def collect():
+            return [r async for r in self.client.iter_apply_parameters_async(self.devices, batch_size=3)]
+
+        with patch('requests.Session.request', side_effect=api):
+            results = asyncio.run(collect())
+        self.assertEqual(sorted(r['device_id'] for r in results), self.devices)
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertEqual(api.batches[-1], ['device-3'])
+
+    def test_iter_apply_parameters_close(self):
+        api = _FakeParametersAPI()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        answered = []
+
+        def request(method, url, json=None, **kwargs):
+            # Only the first call is answered right away.
+            with api.lock:
+                answered.append(json['device_list'])
+                first = len(answered) == 1
+            if not first:
+                release.wait(5)
+            return api(method, url, json=json, **kwargs)
+
+        with patch('requests.Session.request', side_effect=request):
+            results = self.client.iter_apply_parameters(self.devices, batch_size=1, max_workers=2)
+            result = next(results)
+            start = time.monotonic()
+            # The requests still running are not waited for, the queued ones are cancelled.
+            results.close()
+            duration = time.monotonic() - start
+        self.assertEqual([result['device_id']], answered[0])
+        self.assertLess(duration, 1)
+        release.set()
+        time.sleep(0.1)
+        self.assertLess(len(answered), len(self.devices))
+
+    def test_iter_apply_parameters_async_close(self):
+        api = _FakeParametersAPI()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        answered = []
+
+        def request(method, url, json=None, **kwargs):
+            # Only the first call is answered right away.
+            with api.lock:
+                answered.append(json['device_list'])
+                first = len(answered) == 1
+            if not first:
+                release.wait(5)
+            return api(method, url, json=json, **kwargs)
+
+        async def first():
+            results = self.client.iter_apply_parameters_async(self.devices, batch_size=1, max_workers=2)
+            result = await results.__anext__()
+            start = time.monotonic()
+            # The requests still running are not waited for.
+            await results.aclose()
+            return result, time.monotonic() - start
+
+        with patch('requests.Session.request', side_effect=request):
+            result, duration = asyncio.run(first())
+        self.assertEqual([result['device_id']], answered[0])
+        self.assertLess(duration, 1)
+
+    def test_invalid_parameters(self):
+        for kwargs in ({'batch_size': 0}, {'max_workers': 0}, {'retries': -1}):
+            with self.assertRaises(InvalidParameterException):
+                self.client.iter_apply_parameters(self.devices, **kwargs)
+        with self.assertRaises(InvalidParameterException):
+            self.client.iter_apply_parameters_async([1, 2])
@@ -0,0 +1,117 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+import pickle
+import unittest
+
+import requests
+from mock import patch
+from requests import Response
+
+from rapyuta_io.clients.compact import CompactColumn, CompactDevice, CompactLabel, CompactMetric, CompactTags
+from rapyuta_io.clients.device import Device, DevicePythonVersion
+from rapyuta_io.clients.device_manager import DeviceArch
+from rapyuta_io.clients.metrics import Column, MetricFunction
+from rapyuta_io.clients.model import DeviceConfig, Label
+from tests.utils.client import get_client
+from tests.utils.device_respones import DEVICE_INFO, DEVICE_LIST, DEVICE_SELECTION
+
+
+class CompactModelTests(unittest.TestCase):
+
+    def setUp(self):
+        self.data = json.loads(DEVICE_INFO)['response']['data']
+        self.device = CompactDevice.from_dict(self.data, ('http://device-api', 'Bearer token', 'project-id'))
+
+    def test_fields(self):
+        self.assertEqual(self.device.uuid, 'test_device_id')
+        self.assertEqual(self.device.deviceId, 'test_device_id')
+        self.assertEqual(self.device.host, 'rapyuta-UP-CHT01')
+        self.assertEqual(self.device.remote_update_log, '')
+        self.assertTrue(self.device.is_online())
+        self.assertIsInstance(self.device.labels[0], CompactLabel)
+        self.assertEqual(self.device.labels[1].value, 'value2')
+        self.assertEqual(self.device.config_variables[0].key, 'runtime')
+        self.assertFalse(hasattr(self.device, 'error_code'))
+        self.assertFalse(hasattr(self.device, '__dict__'))
+
+    def test_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.device.name = 'new-name'
+        with self.assertRaises(AttributeError):
+            self.device.labels[0].value = 'new-value'
+        with self.assertRaises(AttributeError):
+            del self.device.uuid
+
+    def test_to_device(self):
+        device = self.device.to_device()
+        expected = Device._deserialize(json.loads(DEVICE_INFO)['response']['data'])
+        self.assertIsInstance(device, Device)
+        self.assertEqual({k: v for k, v in device.items() if not k.startswith('_')}, dict(expected))
+        self.assertIsInstance(device.labels[0], Label)
+        self.assertIsInstance(device.config_variables[0], DeviceConfig)
+        self.assertEqual(device._device_api_host, 'http://device-api')
+        self.assertEqual(device._auth_token, 'Bearer token')
+        self.assertEqual(device._project, 'project-id')
+
+    def test_to_dict_and_pickle(self):
+        expected = dict(self.data)
+        expected.pop('deployments')
+        self.assertEqual(self.device.to_dict(), expected)
+        self.assertEqual(pickle.loads(pickle.dumps(self.device)), self.device)
+
+    def test_python_version(self):
+        device = CompactDevice.from_dict(dict(self.data, device_version='3'))
+        self.assertEqual(device.python_version, DevicePythonVersion.PYTHON3)
+        with self.assertRaises(AttributeError):
+            self.device.python_version
+
+    def test_metric_models(self):
+        column = CompactColumn.from_dict({'name': 'cpu', 'function': 'avg', 'metric_group': 'system'})
+        self.assertEqual(column.function, MetricFunction.AVG)
+        self.assertIsInstance(column.to_column(), Column)
+        self.assertEqual(str(column), 'avg(system.cpu)')
+        self.assertEqual(CompactColumn.from_column(column.to_column()).to_dict(),
+                         dict(column.to_dict(), tag_names=None, tag_values=None))
+        self.assertEqual(CompactMetric.from_dict({'metric_group': 'cpu', 'metric_names': ['usage']})
+                         .to_metric().metric_names, ['usage'])
+        self.assertEqual(CompactTags.from_dict({'metric_group': 'cpu', 'tags': ['host']}).to_tags().tags, ['host'])
+
+
+class CompactDeviceListTests(unittest.TestCase):
+
+    @patch('requests.Response', spec=Response)
+    @patch('rapyuta_io.utils.rest_client.RestClient.execute')
+    def test_get_device_list_compact(self, mock_execute, get_device_response):
+        get_device_response.text = DEVICE_LIST
+        get_device_response.status_code = requests.codes.OK
+        mock_execute.return_value = get_device_response
+        client = get_client()
+        actual = client.get_all_devices(online_device=True, compact=True)
+        mock_execute.assert_called_once()
+        self.assertEqual(len(actual), 1)
+        self.assertIsInstance(actual[0], CompactDevice)
+        self.assertEqual(actual[0].uuid, '3747b7d7-ac60-4109-90a5-3dc4c8097384')
+        device = actual[0].to_device()
+        self.assertEqual(device._auth_token, 'Bearer test_auth_token')
+        self.assertTrue(device.is_partial)
+
+    @patch('requests.Response', spec=Response)
+    @patch('requests.Response', spec=Response)
+    @patch('rapyuta_io.utils.rest_client.RestClient.execute')
+    def test_iter_devices_filter_by_arch(self, mock_execute, get_device_response, device_selection_response):
+        device_selection_response.text = DEVICE_SELECTION
+        device_selection_response.status_code = requests.codes.OK
+        get_device_response.text = DEVICE_LIST
+        get_device_response.status_code = requests.codes.OK
+        mock_execute.side_effect = [device_selection_response, get_device_response]
+        client = get_client()
+        devices = client.iter_devices(arch_list=[DeviceArch.AMD64])
+        mock_execute.assert_not_called()
+        actual = list(devices)
+        self.assertEqual(mock_execute.call_count, 2)
+        self.assertEqual(len(actual), 1)
+        self.assertIsInstance(actual[0], Device)
+        self.assertEqual(actual[0].name, 'D239-Device')
+        self.assertEqual(actual[0]._project, 'test_project')
@@ -0,0 +1,175 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import io
+import json
+import threading
+import time
+import unittest
+
+from mock import Mock, patch
+from requests import Response
+
+from rapyuta_io import Client
+from rapyuta_io.clients.rip_client import AuthTokenLevel
+from rapyuta_io.utils import InvalidParameterException, UnauthorizedError
+from rapyuta_io.utils.credentials import CredentialTransport, PasswordCredentials, TokenCredentials, \
+    install_credentials
+from rapyuta_io.utils.transport import CoalescingTransport, get_default_transport, set_default_transport, \
+    use_transport
+from tests.utils.device_respones import DEVICE_LIST
+
+
+def _response(status_code, text):
+    response = Mock(spec=Response)
+    response.status_code = status_code
+    response.text = text
+    return response
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeAPI(object):
+    """Issues tokens ``token-1``, ``token-2``, ... on login and only accepts the ones in ``valid``."""
+
+    def __init__(self, login_delay=0):
+        self.login_delay = login_delay
+        self.logins = 0
+        self.valid = set()
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, headers=None, **kwargs):
+        if url.endswith('/user/login'):
+            time.sleep(self.login_delay)
+            with self.lock:
+                self.logins += 1
+                token = 'token-{}'.format(self.logins)
+                self.valid = {'Bearer ' + token}
+            return _response(200, json.dumps({'data': {'token': token}}))
+        with self.lock:
+            self.requests.append(headers['Authorization'])
+        if headers['Authorization'] not in self.valid:
+            return _response(401, json.dumps({'status': 'error', 'response': {'error': 'unauthorized'}}))
+        return _response(200, DEVICE_LIST)
+
+
+class CredentialProviderTests(unittest.TestCase):
+
+    def test_single_flight_login(self):
+        api = _FakeAPI(login_delay=0.05)
+        credentials = PasswordCredentials('email@example.com', 'password', AuthTokenLevel.MED)
+        headers = []
+        with patch('requests.request', side_effect=api):
+            threads = [threading.Thread(target=lambda: headers.append(credentials.auth_header()))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(api.logins, 1)
+        self.assertEqual({h['Authorization'] for h in headers}, {'Bearer token-1'})
+        self.assertTrue(all(h is headers[0] for h in headers))
+        with self.assertRaises(TypeError):
+            headers[0]['Authorization'] = 'Bearer other'
+
+    def test_refresh_before_expiry(self):
+        clock = _Clock()
+        tokens = iter(['token-1', 'token-2', 'token-3'])
+        credentials = TokenCredentials(lambda: next(tokens), lifetime=100, refresh_margin=0.2, clock=clock)
+        self.assertEqual(credentials.auth_token(), 'Bearer token-1')
+        clock.now += 79
+        self.assertEqual(credentials.auth_token(), 'Bearer token-1')
+        clock.now += 1
+        self.assertEqual(credentials.auth_token(), 'Bearer token-2')
+        clock.now += 200
+        self.assertEqual(credentials.auth_token(), 'Bearer token-3')
+        self.assertEqual(credentials.refresh('Bearer token-2'), {'Authorization': 'Bearer token-3'})
+        self.assertEqual(credentials.refresh_count, 3)
+        self.assertTrue(credentials.is_issued('Bearer token-1'))
+        self.assertFalse(credentials.is_issued('Bearer unknown'))
+
+    def test_failed_early_refresh_keeps_token(self):
+        clock = _Clock()
+        fetch = Mock(side_effect=['token-1', IOError('unavailable'), 'token-2'])
+        credentials = TokenCredentials(fetch, lifetime=100, clock=clock)
+        credentials.auth_token()
+        clock.now += 95
+        self.assertEqual(credentials.auth_token(), 'Bearer token-1')
+        self.assertEqual(credentials.auth_token(), 'Bearer token-2')
+
+    def test_invalid_refresh_margin(self):
+        with self.assertRaises(InvalidParameterException):
+            TokenCredentials(lambda: 'token', refresh_margin=1)
+
+
+class CredentialTransportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.api = _FakeAPI()
+        self.credentials = PasswordCredentials('email@example.com', 'password')
+        self.transport = CredentialTransport(self.credentials)
+        with patch('requests.request', side_effect=self.api):
+            self.client = Client(self.credentials.auth_token(), 'test_project')
+
+    def test_replay_after_unauthorized(self):
+        self.api.valid = set()
+        with patch('requests.request', side_effect=self.api), use_transport(self.transport):
+            devices = self.client.get_all_devices()
+            self.client.get_all_devices()
+        self.assertEqual(len(devices), 2)
+        self.assertEqual(self.api.requests, ['Bearer token-1', 'Bearer token-2', 'Bearer token-2'])
+        self.assertEqual(self.api.logins, 2)
+
+    def test_replayed_once(self):
+        with patch('requests.request', side_effect=self.api), use_transport(self.transport), \
+                patch.object(self.credentials, '_fetch_token', return_value=('revoked', None)):
+            self.api.valid = set()
+            with self.assertRaises(UnauthorizedError):
+                self.client.get_all_devices()
+        self.assertEqual(self.api.requests, ['Bearer token-1', 'Bearer revoked'])
+
+    def test_other_requests_unchanged(self):
+        self.api.valid = {'Bearer other-token'}
+        other = Client('other-token', 'test_project')
+        with patch('requests.request', side_effect=self.api), use_transport(self.transport):
+            other.get_all_devices()
+            response = self.transport.send(method='PUT', url='https://example.com/upload', headers={
+                'Authorization': 'Bearer token-1'}, data=io.BytesIO(b'body'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.api.requests, ['Bearer other-token', 'Bearer token-1'])
+        self.assertEqual(self.api.logins, 1)
+
+
+class InstallCredentialsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.default = set_default_transport(CoalescingTransport())
+        self.addCleanup(set_default_transport, self.default)
+
+    def test_composes_with_default_transport(self):
+        coalescing = get_default_transport()
+        credentials = TokenCredentials(lambda: 'token-1')
+        self.assertIs(install_credentials(credentials), coalescing)
+        installed = get_default_transport()
+        self.assertIsInstance(installed, CredentialTransport)
+        self.assertIs(installed._transport, coalescing)
+        self.assertIs(install_credentials(credentials), installed)
+        self.assertIs(get_default_transport(), installed)
+
+    def test_client_from_credentials(self):
+        api = _FakeAPI()
+        credentials = PasswordCredentials('email@example.com', 'password')
+        with patch('requests.request', side_effect=api):
+            client = Client.from_credentials(credentials, 'test_project')
+            api.valid = set()
+            devices = client.get_all_devices()
+        self.assertEqual(len(devices), 2)
+        self.assertEqual(api.requests, ['Bearer token-1', 'Bearer token-2'])
+        self.assertIsInstance(get_default_transport()._transport, CoalescingTransport)
@@ -0,0 +1,184 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import asyncio
+import copy
+import json
+import threading
+import time
+import unittest
+
+from mock import patch
+
+from rapyuta_io.clients.device import Device
+from rapyuta_io.clients.model import BulkItemResult, Label
+from rapyuta_io.utils import InvalidParameterException, LabelNotFoundException, OperationNotAllowedError, \
+    ResourceNotFoundError
+from rapyuta_io.utils.transport import set_default_transport, CoalescingTransport
+from tests.utils.client import get_client
+from tests.utils.device_respones import DEVICE_INFO
+from tests.utils.fake_api import FakeAPI, data_response, mock_response
+
+
+class _FakeDeviceAPI(FakeAPI):
+    """Answers the label and config variable APIs, failing label updates of the ids in ``missing_labels``."""
+
+    def __init__(self, missing_labels=()):
+        super(_FakeDeviceAPI, self).__init__()
+        self.missing_labels = set(missing_labels)
+
+    def answer(self, method, url, **kwargs):
+        path = url.split('/api/device-manager/v0/')[1]
+        if method == 'POST' and path.startswith('labels/'):
+            return data_response([{'id': 500 + i, 'key': k, 'value': v}
+                                  for i, (k, v) in enumerate(sorted(kwargs['json'].items()))])
+        if method == 'PUT' and path.startswith('labels/'):
+            label_id = int(path.split('/')[1])
+            return data_response({}, 404 if label_id in self.missing_labels else 200)
+        if method == 'POST' and path.startswith('config_variables/'):
+            return data_response(dict(kwargs['json'], id=900))
+        if method == 'PUT' and path.startswith('config_variables/'):
+            return data_response(kwargs['json'])
+        return data_response({})
+
+
+class DeviceBulkTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = get_client()
+        data = json.loads(DEVICE_INFO)['response']['data']
+        second = copy.deepcopy(data)
+        second['uuid'] = 'device-2'
+        for label in second['labels']:
+            label['id'] += 100
+        self.devices = [Device._deserialize(data), Device._deserialize(second)]
+        self.client._dmClient._add_auth_token_to_devices(self.devices)
+
+    def test_bulk_update_labels(self):
+        api = _FakeDeviceAPI(missing_labels=[201])
+        labels = {'label1': 'value1', 'label2': 'new-value', 'label3': 'value3', 'label4': None}
+        with patch('requests.request', side_effect=api):
+            results = self.client.bulk_update_labels(self.devices, labels, max_workers=2)
+
+        self.assertEqual([(r.device_id, r.key, r.operation) for r in results], [
+            ('test_device_id', 'label1', BulkItemResult.UNCHANGED),
+            ('test_device_id', 'label2', BulkItemResult.UPDATE),
+            ('test_device_id', 'label3', BulkItemResult.ADD),
+            ('test_device_id', 'label4', BulkItemResult.UNCHANGED),
+            ('device-2', 'label1', BulkItemResult.UNCHANGED),
+            ('device-2', 'label2', BulkItemResult.UPDATE),
+            ('device-2', 'label3', BulkItemResult.ADD),
+            ('device-2', 'label4', BulkItemResult.UNCHANGED),
+        ])
+        self.assertEqual([r.ok for r in results], [True, True, True, True, True, False, True, True])
+        self.assertIsInstance(results[5].error, LabelNotFoundException)
+        self.assertIsInstance(results[2].result, Label)
+
+        posts = [call for call in api.calls if call[0] == 'POST']
+        self.assertEqual(len(posts), 2)
+        self.assertEqual(posts[0][2]['json'], {'label3': 'value3'})
+        self.assertEqual({label.key: label.value for label in self.devices[0].labels},
+                         {'label1': 'value1', 'label2': 'new-value', 'label3': 'value3'})
+        self.assertEqual({label.key: label.value for label in self.devices[1].labels},
+                         {'label1': 'value1', 'label2': 'value2', 'label3': 'value3'})
+
+    def test_bulk_delete_label(self):
+        api = _FakeDeviceAPI()
+        with patch('requests.request', side_effect=api):
+            results = self.client.bulk_update_labels(self.devices[:1], {'label1': None})
+        self.assertEqual(results[0].operation, BulkItemResult.DELETE)
+        self.assertTrue(results[0].ok)
+        self.assertEqual(api.calls[0][:2], ('DELETE', self.devices[0]._device_api_host +
+                                            '/api/device-manager/v0/labels/100'))
+        self.assertEqual([label.key for label in self.devices[0].labels], ['label2'])
+
+    def test_bulk_set_config_variables(self):
+        api = _FakeDeviceAPI()
+        config_variables = {'config_value': 'new-value', 'new_key': 'value', 'runtime': 'dockercompose',
+                            'ros_distro': None}
+        with patch('requests.request', side_effect=api):
+            results = self.client.bulk_set_config_variables(self.devices, config_variables)
+
+        self.assertEqual(len(results), 8)
+        by_key = {r.key: r for r in results if r.device_id == 'device-2'}
+        self.assertEqual(by_key['config_value'].operation, BulkItemResult.UPDATE)
+        self.assertTrue(by_key['config_value'].ok)
+        self.assertEqual(by_key['new_key'].operation, BulkItemResult.ADD)
+        self.assertEqual(by_key['new_key'].result.id, 900)
+        self.assertIsInstance(by_key['runtime'].error, OperationNotAllowedError)
+        self.assertIsInstance(by_key['ros_distro'].error, OperationNotAllowedError)
+        config = {c.key: c.value for c in self.devices[1].config_variables}
+        self.assertEqual(config['config_value'], 'new-value')
+        self.assertEqual(config['new_key'], 'value')
+        self.assertEqual(config['runtime'], 'preinstalled')
+
+    def test_bulk_invalid_parameters(self):
+        with self.assertRaises(InvalidParameterException):
+            self.client.bulk_update_labels(['device-id'], {'zone': 'a'})
+        with self.assertRaises(InvalidParameterException):
+            self.client.bulk_update_labels(self.devices, {})
+        with self.assertRaises(InvalidParameterException):
+            self.client.bulk_set_config_variables(self.devices, {'key': 1})
+
+    def _refresh_api(self):
+        data = json.loads(DEVICE_INFO)['response']['data']
+
+        def request(method, url, **kwargs):
+            if url.endswith('/device-2'):
+                return mock_response(json.dumps({'status': 'error', 'response': {'error': 'device not found'}}), 404)
+            return data_response(dict(data, name='refreshed'))
+
+        return request
+
+    def test_refresh_devices(self):
+        partial = Device._deserialize({'uuid': 'test_device_id', 'name': 'D239-Device', 'status': 'ONLINE'})
+        devices = [partial, Device._deserialize({'uuid': 'device-2', 'name': 'gone', 'status': 'OFFLINE'})]
+        self.client._dmClient._add_auth_token_to_devices(devices)
+        with patch('requests.Session.request', side_effect=self._refresh_api()) as request:
+            results = self.client.refresh_devices(devices, max_workers=2)
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual([r.device_id for r in results], ['test_device_id', 'device-2'])
+        self.assertIs(results[0].result, partial)
+        self.assertFalse(partial.is_partial)
+        self.assertEqual(partial.name, 'refreshed')
+        self.assertEqual(partial.host, 'rapyuta-UP-CHT01')
+        self.assertIsInstance(partial.labels[0], Label)
+        self.assertFalse(results[1].ok)
+        self.assertIsInstance(results[1].error, ResourceNotFoundError)
+        self.assertTrue(devices[1].is_partial)
+
+    def test_refresh_devices_async_keeps_default_transport(self):
+        devices = self.devices[:1]
+        previous = set_default_transport(CoalescingTransport())
+        try:
+            with patch('requests.request', side_effect=self._refresh_api()) as request:
+                results = asyncio.run(self.client.refresh_devices_async(devices))
+        finally:
+            set_default_transport(previous)
+        self.assertEqual(request.call_count, 1)
+        self.assertTrue(results[0].ok)
+        self.assertEqual(devices[0].name, 'refreshed')
+
+    def test_refresh_devices_async_cancel_does_not_block(self):
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def request(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return data_response({})
+
+        async def main():
+            task = asyncio.ensure_future(self.client.refresh_devices_async(self.devices, max_workers=1))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            start = time.monotonic()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return time.monotonic() - start
+
+        with patch('requests.Session.request', side_effect=request):
+            # The request still running is not waited for.
+            self.assertLess(asyncio.run(main()), 1)
@@ -14,7 +14,7 @@ from requests import Response
 from rapyuta_io import ROSDistro
 from rapyuta_io.clients.device import Device, DeviceConfig, DevicePythonVersion
 from rapyuta_io.clients.device_manager import DeviceArch
-from rapyuta_io.clients.model import Command, SharedURL
+from rapyuta_io.clients.model import Command, SharedURL, Label
 from rapyuta_io.utils import DeviceNotFoundException, ParameterMissingException, \
     DeploymentRunningException, ResourceNotFoundError, BadRequestError, LogsUUIDNotFoundException, \
     InvalidParameterException, InternalServerError
@@ -50,6 +50,38 @@ class DeviceTests(unittest.TestCase):
         for device in actual:
             self.assertTrue(device.is_partial)
 
+    @patch('requests.Response', spec=Response)
+    @patch('rapyuta_io.utils.rest_client.RestClient.execute')
+    def test_get_device_list_hydrates_labels_on_access(self, mock_execute, get_device_response):
+        get_device_response.text = DEVICE_LIST
+        get_device_response.status_code = requests.codes.OK
+        mock_execute.return_value = get_device_response
+        client = get_client()
+        device = client.get_all_devices()[0]
+        self.assertIs(type(dict.__getitem__(device, 'labels')[0]), dict)
+        self.assertIsInstance(device.labels[0], Label)
+        self.assertIs(device.labels, device['labels'])
+        self.assertEqual(device.labels[0].key, 'label1')
+        self.assertIsInstance(device.get('config_variables')[0], DeviceConfig)
+
+    @patch('requests.Response', spec=Response)
+    @patch('rapyuta_io.utils.rest_client.RestClient.execute')
+    def test_get_device_list_fields(self, mock_execute, get_device_response):
+        get_device_response.text = DEVICE_LIST
+        get_device_response.status_code = requests.codes.OK
+        mock_execute.return_value = get_device_response
+        client = get_client()
+        actual = client.get_all_devices(fields=['name', 'labels'])
+        self.assertEqual(len(actual), 2)
+        self.assertEqual(set(k for k in actual[0] if not k.startswith('_')),
+                         {'uuid', 'deviceId', 'name', 'labels', 'deployments'})
+        self.assertEqual(actual[0].labels[0].key, 'label1')
+        actual = client.get_all_devices(online_device=True, fields=['name'])
+        self.assertEqual(len(actual), 1)
+        self.assertEqual(actual[0].status, 'ONLINE')
+        with self.assertRaises(InvalidParameterException):
+            client.get_all_devices(fields='name')
+
     @patch('requests.Response', spec=Response)
     @patch('rapyuta_io.utils.rest_client.RestClient.execute')
     def test_get_device_list_empty_list_test_case(self, mock_execute, get_device_response):
@@ -0,0 +1,109 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import asyncio
+import itertools
+import json
+import unittest
+
+from mock import Mock, patch
+from requests import Response
+
+from rapyuta_io.clients.compact import CompactDevice
+from rapyuta_io.clients.model import DeviceEvent
+from rapyuta_io.utils import InvalidParameterException
+from tests.utils.client import get_client
+
+
+def _device(uuid, status='ONLINE', labels=(), **kwargs):
+    data = {'uuid': uuid, 'name': uuid, 'status': status,
+            'labels': [{'id': i, 'key': k, 'value': v} for i, (k, v) in enumerate(labels)]}
+    data.update(kwargs)
+    return data
+
+
+def _list_response(devices):
+    response = Mock(spec=Response)
+    response.status_code = 200
+    response.text = json.dumps({'status': 'success', 'response': {'data': devices}})
+    return response
+
+
+POLLS = [
+    [_device('robot-1'), _device('robot-2', labels=[('zone', 'a')])],
+    [_device('robot-1'), _device('robot-2', labels=[('zone', 'a')])],
+    [_device('robot-1', status='OFFLINE', host='new-host'), _device('robot-3')],
+    [_device('robot-1', status='OFFLINE', host='new-host', labels=[('zone', 'b')]), _device('robot-3')],
+]
+
+
+class DeviceWatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = get_client()
+
+    def _events(self, events):
+        return [(e.type, e.device_id) for e in events]
+
+    @patch('time.sleep')
+    def test_watch_devices(self, sleep):
+        with patch('requests.Session.request', side_effect=[_list_response(p) for p in POLLS]) as request:
+            events = list(itertools.islice(self.client.watch_devices(interval=5, max_interval=8), 6))
+        self.assertEqual(self._events(events), [
+            (DeviceEvent.ADDED, 'robot-1'),
+            (DeviceEvent.ADDED, 'robot-2'),
+            (DeviceEvent.STATUS_CHANGED, 'robot-1'),
+            (DeviceEvent.ADDED, 'robot-3'),
+            (DeviceEvent.REMOVED, 'robot-2'),
+            (DeviceEvent.LABELS_CHANGED, 'robot-1'),
+        ])
+        self.assertEqual(request.call_count, 4)
+        status = events[2]
+        self.assertIsInstance(status.device, CompactDevice)
+        self.assertEqual((status.previous.status, status.device.status), ('ONLINE', 'OFFLINE'))
+        self.assertEqual(events[4].device.labels[0].value, 'a')
+        self.assertEqual(events[5].device.labels[0].value, 'b')
+        self.assertEqual(events[5].device.to_device()._project, 'test_project')
+        # The poll without changes backs off, the next ones go back to the interval.
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [5, 8, 5])
+
+    @patch('time.sleep')
+    def test_watch_devices_fields(self, sleep):
+        with patch('requests.Session.request', side_effect=[_list_response(p) for p in POLLS]):
+            events = list(itertools.islice(
+                self.client.watch_devices(fields=['host'], initial_events=False), 5))
+        self.assertEqual(self._events(events), [
+            (DeviceEvent.STATUS_CHANGED, 'robot-1'),
+            (DeviceEvent.UPDATED, 'robot-1'),
+            (DeviceEvent.ADDED, 'robot-3'),
+            (DeviceEvent.REMOVED, 'robot-2'),
+            (DeviceEvent.LABELS_CHANGED, 'robot-1'),
+        ])
+
+    def test_watch_devices_async(self):
+        async def collect():
+            events = []
+            async for event in self.client.watch_devices_async(initial_events=False):
+                events.append(event)
+                if len(events) == 3:
+                    return events
+
+        sleep = asyncio.sleep
+
+        async def skip_sleep(delay):
+            await sleep(0)
+
+        with patch('requests.Session.request', side_effect=[_list_response(p) for p in POLLS[1:]]), \
+                patch('asyncio.sleep', new=skip_sleep):
+            events = asyncio.run(collect())
+        self.assertEqual(self._events(events), [(DeviceEvent.STATUS_CHANGED, 'robot-1'),
+                                                (DeviceEvent.ADDED, 'robot-3'),
+                                                (DeviceEvent.REMOVED, 'robot-2')])
+
+    def test_watch_devices_invalid_parameters(self):
+        with self.assertRaises(InvalidParameterException):
+            self.client.watch_devices(interval=0)
+        with self.assertRaises(InvalidParameterException):
+            self.client.watch_devices(interval=10, max_interval=5)
+        with self.assertRaises(InvalidParameterException):
+            self.client.watch_devices_async(fields='host')
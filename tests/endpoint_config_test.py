@@ -0,0 +1,75 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from rapyuta_io import Client
+from rapyuta_io.utils import InvalidParameterException
+from rapyuta_io.utils.endpoint_config import EndpointConfig, get_endpoint_config, reload_endpoint_config, \
+    set_endpoint_config
+from rapyuta_io.utils.settings import default_host_config
+
+
+class EndpointConfigTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        # Cleanups run last in first out, the configuration is reloaded once RIO_CONFIG is restored.
+        self.addCleanup(reload_endpoint_config)
+        self.path = os.path.join(self.directory, 'config.json')
+        self._write({'core_api_host': 'https://api.staging.example.com/', 'auth_token': 'unrelated'})
+        env = patch.dict(os.environ, {'RIO_CONFIG': self.path})
+        env.start()
+        self.addCleanup(env.stop)
+        reload_endpoint_config()
+
+    def _write(self, configuration):
+        with open(self.path, 'w') as f:
+            f.write(configuration if isinstance(configuration, str) else json.dumps(configuration))
+
+    def test_read_once(self):
+        with patch('rapyuta_io.utils.endpoint_config.open', create=True, side_effect=open) as mock_open:
+            clients = [Client('auth_token', 'project-{}'.format(i)) for i in range(3)]
+            Client._get_api_endpoints('rip_host')
+        mock_open.assert_not_called()
+        self.assertEqual({c._dmClient._device_api_host for c in clients}, {'https://api.staging.example.com'})
+        self.assertEqual(get_endpoint_config().rip_host, default_host_config['rip_host'])
+
+        self._write({'core_api_host': 'http://localhost:8080'})
+        self.assertEqual(get_endpoint_config().core_api_host, 'https://api.staging.example.com')
+        self.assertEqual(reload_endpoint_config().core_api_host, 'http://localhost:8080')
+
+    def test_invalid_config(self):
+        for configuration in ('{not json', '[]', {'core_api_host': 'api.example.com'}, {'rip_host': 42}):
+            self._write(configuration)
+            with self.assertRaises(InvalidParameterException):
+                reload_endpoint_config()
+            with self.assertRaises(InvalidParameterException):
+                Client('auth_token')
+        with patch.dict(os.environ, {'RIO_CONFIG': os.path.join(self.directory, 'missing.json')}):
+            with self.assertRaises(InvalidParameterException):
+                Client('auth_token')
+
+    def test_override(self):
+        config = EndpointConfig(core_api_host='http://localhost:8080')
+        self.assertEqual(config, EndpointConfig.from_dict({'core_api_host': 'http://localhost:8080'}))
+        with self.assertRaises(AttributeError):
+            config.core_api_host = 'http://other'
+        previous = set_endpoint_config(config)
+        try:
+            self.assertEqual(Client('auth_token')._core_api_client._core_api_host, 'http://localhost:8080')
+        finally:
+            set_endpoint_config(previous)
+        client = Client('auth_token', endpoint_config=EndpointConfig(core_api_host='http://127.0.0.1'))
+        self.assertEqual(client._paramserver_client._core_api_host, 'http://127.0.0.1')
+        with self.assertRaises(InvalidParameterException):
+            Client('auth_token', endpoint_config={'core_api_host': 'http://127.0.0.1'})
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(reload_endpoint_config(), EndpointConfig())
@@ -0,0 +1,78 @@
+# encoding: utf-8
+from __future__ import absolute_import
+import json
+import unittest
+
+import requests
+from mock import patch, Mock
+
+from rapyuta_io.utils import json_codec
+from rapyuta_io.utils.rest_client import RestClient, HttpMethod
+from rapyuta_io.utils.utils import get_api_response_data, get_response_body
+
+
+class _UpperKeyCodec(json_codec.JSONCodec):
+    name = 'upper'
+
+    def loads(self, data):
+        return {k.upper(): v for k, v in json.loads(data).items()}
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+class JSONCodecTests(unittest.TestCase):
+    def setUp(self):
+        self._decoder = json_codec._decoder
+        self._encoder = json_codec._encoder
+
+    def tearDown(self):
+        json_codec._decoder = self._decoder
+        json_codec._encoder = self._encoder
+
+    def test_available_codecs_always_include_stdlib(self):
+        self.assertEqual(json_codec.available_json_codecs()[-1], 'json')
+
+    def test_loads_bytes_and_str(self):
+        for name in json_codec.available_json_codecs():
+            codec = json_codec.new_json_codec(name)
+            self.assertEqual(codec.loads(b'{"a": [1, "\xc3\xa9"]}'), {'a': [1, u'\xe9']})
+            self.assertEqual(codec.loads(u'{"a": [1, "\xe9"]}'), {'a': [1, u'\xe9']})
+            self.assertEqual(json.loads(codec.dumps({'a': [1, u'\xe9']})), {'a': [1, u'\xe9']})
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            json_codec.set_json_codec('simplejson2')
+
+    def test_loads_falls_back_to_stdlib(self):
+        strict = Mock(spec=json_codec.JSONCodec)
+        strict.loads.side_effect = ValueError('NaN is not JSON')
+        json_codec.set_json_codec(strict)
+        self.assertEqual(json_codec.loads(b'[1, 2]'), [1, 2])
+        strict.loads.assert_called_once_with(b'[1, 2]')
+
+    def test_default_encoder_is_stdlib(self):
+        self.assertTrue(json_codec.is_stdlib_codec(json_codec.get_json_encoder()))
+
+    def test_get_response_body_prefers_bytes(self):
+        response = Mock()
+        response.content = b'{"response": {"data": 1}}'
+        self.assertIs(get_response_body(response), response.content)
+        response = Mock()
+        response.text = '{"response": {"data": 1}}'
+        self.assertEqual(get_response_body(response), response.text)
+
+    def test_api_response_uses_active_codec(self):
+        json_codec.set_json_codec(_UpperKeyCodec())
+        response = Mock()
+        response.status_code = requests.codes.OK
+        response.content = b'{"response": {"data": []}}'
+        self.assertEqual(get_api_response_data(response, parse_full=True), {'RESPONSE': {'data': []}})
+
+    @patch('requests.request')
+    def test_request_encoded_with_active_codec(self, req_mock):
+        json_codec.set_json_codec(_UpperKeyCodec())
+        RestClient('request_url').method(HttpMethod.POST).headers({'project': 'p'}).execute({'a': 1})
+        req_mock.assert_called_once_with(method='POST', url='request_url', params={}, timeout=(30, 150),
+                                         headers={'project': 'p', 'Content-Type': 'application/json'},
+                                         data=b'{"a":1}')
@@ -0,0 +1,113 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+import pickle
+import threading
+import unittest
+
+from mock import patch
+
+from rapyuta_io.clients.device import Device
+from rapyuta_io.utils import InvalidParameterException
+from rapyuta_io.utils.label_index import LabelIndex
+from tests.utils.client import get_client
+from tests.utils.fake_api import data_response
+
+
+def _device(uuid, status='ONLINE', **labels):
+    return {'uuid': uuid, 'name': uuid, 'status': status,
+            'labels': [{'id': int(uuid[-1]) * 10 + i, 'key': k, 'value': v}
+                       for i, (k, v) in enumerate(sorted(labels.items()))]}
+
+
+INVENTORY = [
+    _device('robot-1', site='tokyo', zone='a'),
+    _device('robot-2', site='tokyo', zone='b'),
+    _device('robot-3', site='osaka', zone='a'),
+    _device('robot-4'),
+]
+
+
+class LabelIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = LabelIndex(Device._deserialize(d) for d in INVENTORY)
+
+    def _uuids(self, devices):
+        return [device.uuid for device in devices]
+
+    def test_query(self):
+        self.assertEqual(self.index.query({'site': 'tokyo', 'zone': 'a'}), frozenset(['robot-1']))
+        self.assertEqual(self.index.query({'site': 'tokyo', 'zone': 'a'}, match_all=False),
+                         frozenset(['robot-1', 'robot-2', 'robot-3']))
+        self.assertEqual(self.index.query({'zone': ['a', 'b'], 'site': 'osaka'}), frozenset(['robot-3']))
+        self.assertEqual(self.index.query({'site': 'kyoto'}), frozenset())
+        self.assertEqual(self._uuids(self.index.find({'zone': 'a'})), ['robot-1', 'robot-3'])
+
+    def test_serialize(self):
+        for index in (pickle.loads(pickle.dumps(self.index)),
+                      LabelIndex.from_dict(json.loads(json.dumps(self.index.to_dict())), Device._deserialize)):
+            self.assertEqual(len(index), 4)
+            self.assertEqual(index.query({'site': 'tokyo'}), frozenset(['robot-1', 'robot-2']))
+            self.assertEqual(index.get('robot-1').labels[0].value, 'tokyo')
+        self.assertNotIn('_auth_token', self.index.to_dict()['devices'][0])
+
+    def test_concurrent_updates(self):
+        def relabel(i):
+            device = Device._deserialize(_device('robot-{}'.format(i % 10), zone='z{}'.format(i % 3)))
+            self.index.add_device(device)
+            self.index.query({'zone': 'z1'})
+
+        threads = [threading.Thread(target=relabel, args=(i,)) for i in range(60)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.index), 10)
+        self.assertEqual(sum(len(self.index.lookup('zone', 'z{}'.format(i))) for i in range(3)), 10)
+
+
+class FindDevicesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = get_client()
+
+    def test_find_devices_lists_once(self):
+        with patch('requests.request', return_value=data_response(INVENTORY)) as request:
+            tokyo = self.client.find_devices({'site': 'tokyo'})
+            zone_a = self.client.find_devices({'zone': 'a'})
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual([d.uuid for d in tokyo], ['robot-1', 'robot-2'])
+        self.assertEqual([d.uuid for d in zone_a], ['robot-1', 'robot-3'])
+        self.assertEqual(tokyo[0]._auth_token, 'Bearer test_auth_token')
+        data = pickle.dumps(self.client._dmClient._label_index)
+        self.assertNotIn(b'test_auth_token', data)
+        self.assertNotIn(b'test_project', data)
+        self.assertNotIn('_auth_token', pickle.loads(data).get('robot-1'))
+        with self.assertRaises(InvalidParameterException):
+            self.client.find_devices({})
+
+    def test_index_follows_inventory_and_labels(self):
+        with patch('requests.request', return_value=data_response(INVENTORY)):
+            robot = self.client.find_devices({'site': 'osaka'})[0]
+        with patch('requests.request', side_effect=[
+                data_response([{'id': 99, 'key': 'site', 'value': 'tokyo'}]),
+                data_response({'status': 'success'}),
+                data_response(INVENTORY[:2])]):
+            robot.add_labels({'site': 'tokyo'})
+            self.assertEqual([d.uuid for d in self.client.find_devices({'site': 'tokyo'})],
+                             ['robot-1', 'robot-2', 'robot-3'])
+            robot.delete_label(99)
+            self.assertEqual([d.uuid for d in self.client.find_devices({'site': 'tokyo'})], ['robot-1', 'robot-2'])
+            # Refreshing the index drops the devices that are gone.
+            zone_a = self.client.find_devices({'zone': 'a'}, refresh=True)
+        self.assertEqual(zone_a, [self.client.find_devices({'site': 'tokyo'})[0]])
+
+    def test_listing_does_not_fill_index(self):
+        with patch('requests.request', return_value=data_response(INVENTORY)):
+            devices = self.client.get_all_devices()
+        self.assertEqual(len(self.client._dmClient._label_index), 0)
+        with patch('requests.request', return_value=data_response([{'id': 99, 'key': 'site', 'value': 'kyoto'}])):
+            devices[0].add_labels({'site': 'kyoto'})
+        self.assertEqual(len(self.client._dmClient._label_index), 0)
@@ -0,0 +1,57 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import importlib
+import subprocess
+import sys
+import unittest
+
+import rapyuta_io
+
+
+def _imported_modules(code):
+    script = code + '\nimport sys\nprint(" ".join(sorted(sys.modules)))'
+    return set(subprocess.check_output([sys.executable, '-c', script]).decode().split())
+
+
+class LazyImportTests(unittest.TestCase):
+
+    def test_import_package(self):
+        modules = _imported_modules('import rapyuta_io')
+        self.assertEqual({m for m in modules if m.startswith('rapyuta_io.')}, set())
+        self.assertNotIn('requests', modules)
+
+    def test_import_client_defers_heavy_modules(self):
+        modules = _imported_modules('from rapyuta_io import Client')
+        for module in ('yaml', 'pytz', 'dateutil', 'asyncio', 'rapyuta_io.clients.metrics'):
+            self.assertNotIn(module, modules)
+
+    def test_user_agent_installed_on_first_request(self):
+        self.assertIn('rapyuta_io', subprocess.check_output([sys.executable, '-c', '\n'.join([
+            'import requests',
+            'from rapyuta_io import Client',
+            'assert not requests.utils.default_user_agent().startswith("rapyuta_io")',
+            'from rapyuta_io.utils.transport import SessionTransport',
+            'print(SessionTransport()._session.headers["User-Agent"])',
+        ])]).decode())
+
+    def test_public_names(self):
+        self.assertIs(rapyuta_io.DeviceArch, importlib.import_module('rapyuta_io.clients.device_manager').DeviceArch)
+        self.assertIs(rapyuta_io.error, sys.modules['rapyuta_io.utils.error'])
+        self.assertIn('Client', dir(rapyuta_io))
+        from rapyuta_io.clients import LogsUploadRequest, Device
+        self.assertEqual(LogsUploadRequest.__module__, 'rapyuta_io.clients.model')
+        self.assertEqual(Device.__module__, 'rapyuta_io.clients.device')
+        with self.assertRaises(AttributeError):
+            rapyuta_io.missing
+
+    def test_submodules_are_attributes(self):
+        subprocess.check_call([sys.executable, '-c', '\n'.join([
+            'import rapyuta_io',
+            'assert rapyuta_io.utils.RestClient.__module__ == "rapyuta_io.utils.rest_client"',
+            'assert rapyuta_io.clients.device.Device is rapyuta_io.clients.Device',
+            'assert rapyuta_io.clients.model.Command is rapyuta_io.Command',
+            'assert rapyuta_io.clients.LogsUploadRequest.__module__ == "rapyuta_io.clients.model"',
+        ])])
+        with self.assertRaises(ImportError):
+            from rapyuta_io.clients import missing  # noqa: F401
@@ -0,0 +1,127 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+from datetime import datetime, timedelta
+import unittest
+
+from mock import patch
+
+from rapyuta_io import MultiProjectClient
+from rapyuta_io.clients.device import Device
+from rapyuta_io.clients.metrics import MetricFunction, MetricOperation, QueryMetricsRequest, StepInterval
+from rapyuta_io.clients.project import User
+from rapyuta_io.clients.user_group import UserGroup
+from rapyuta_io.utils import InvalidParameterException, ResourceNotFoundError
+from rapyuta_io.utils.request_context import request_context
+from rapyuta_io.utils.transport import CoalescingTransport, SessionTransport, set_default_transport
+from tests.utils.device_respones import DEVICE_LIST
+from tests.utils.fake_api import FakeAPI, mock_response
+from tests.utils.query_metrics_responses import QUERY_METRICS_SUCCESS
+from tests.utils.user_group_responses import USER_GROUP_LIST_SUCCESS
+from tests.utils.user_response import GET_USER_RESPONSE
+
+
+class _FakeAPI(FakeAPI):
+    """Answers the device, user and group APIs, failing the requests of the ``failing`` project."""
+
+    def __init__(self, failing=None):
+        super(_FakeAPI, self).__init__()
+        self.failing = failing
+
+    @property
+    def projects(self):
+        return [kwargs['headers']['project'] for _, _, kwargs in self.calls]
+
+    @property
+    def payloads(self):
+        return {kwargs['headers']['project']: kwargs.get('json') for _, _, kwargs in self.calls}
+
+    def answer(self, method, url, headers=None, **kwargs):
+        if headers['project'] == self.failing:
+            return mock_response(json.dumps({'status': 'error', 'response': {'error': 'project not found'}}), 404)
+        if '/api/user/me/get' in url:
+            return mock_response(GET_USER_RESPONSE)
+        if '/api/metrics/v0/query' in url:
+            return mock_response(QUERY_METRICS_SUCCESS)
+        if '/api/group/list' in url:
+            return mock_response(USER_GROUP_LIST_SUCCESS)
+        return mock_response(DEVICE_LIST)
+
+
+class MultiProjectClientTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MultiProjectClient('test_auth_token', ['project-1', 'project-2', 'project-3', 'project-1'],
+                                         max_workers=3)
+        self.addCleanup(self.client.close)
+
+    def test_get_all_devices(self):
+        api = _FakeAPI(failing='project-2')
+        with patch('requests.Session.request', side_effect=api), patch('requests.request') as plain:
+            results = self.client.get_all_devices(online_device=True)
+        plain.assert_not_called()
+        self.assertIsInstance(self.client._transport, SessionTransport)
+        self.assertEqual(list(results), ['project-1', 'project-2', 'project-3'])
+        self.assertTrue(results['project-1'].ok)
+        self.assertIsInstance(results['project-3'].result[0], Device)
+        self.assertEqual(results['project-3'].result[0]._project, 'project-3')
+        self.assertIsInstance(results['project-2'].error, ResourceNotFoundError)
+        self.assertEqual(sorted(api.projects), ['project-1', 'project-2', 'project-3'])
+        self.assertEqual({c._dmClient._project for c in self.client._clients.values()},
+                         {'project-1', 'project-2', 'project-3'})
+
+    def test_list_usergroups_subset(self):
+        api = _FakeAPI()
+        with patch('requests.Session.request', side_effect=api), request_context(project='project-1'):
+            results = self.client.list_usergroups('org-guid', projects=['project-3'])
+        self.assertEqual(list(results), ['project-3'])
+        self.assertIsInstance(results['project-3'].result[0], UserGroup)
+        self.assertEqual(api.projects, ['project-3'])
+
+    def test_authenticated_user_cached(self):
+        api = _FakeAPI()
+        with patch('requests.Session.request', side_effect=api):
+            user = self.client.get_authenticated_user()
+            self.assertIs(self.client.get_authenticated_user(), user)
+        self.assertIsInstance(user, User)
+        self.assertEqual(len(api.calls), 1)
+
+    def test_query_metrics_shares_user(self):
+        api = _FakeAPI()
+        request = QueryMetricsRequest(datetime.now() - timedelta(days=1), datetime.now(), StepInterval.ONE_MINUTE,
+                                      [MetricOperation(MetricFunction.COUNT, 'cpu.usage_idle')])
+        with patch('requests.Session.request', side_effect=api):
+            results = self.client.query_metrics(request)
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertEqual(len([url for _, url, _ in api.calls if '/api/user/me/get' in url]), 1)
+        organization = self.client.get_authenticated_user().organization.guid
+        for project in self.client.projects:
+            tags = api.payloads[project]['tags']
+            self.assertEqual(tags['tenant_id']['value'], project)
+            self.assertEqual(tags['organization_id']['value'], organization)
+        self.assertEqual(request.tags, {})
+
+    def test_configured_transport_kept(self):
+        transport = CoalescingTransport()
+        previous = set_default_transport(transport)
+        try:
+            client = MultiProjectClient('test_auth_token', ['project-1'])
+        finally:
+            set_default_transport(previous)
+        self.assertIs(client._transport, transport)
+        with patch('requests.request', side_effect=_FakeAPI()):
+            results = client.map(lambda c, name: c.get_all_devices(device_name=name), 'D239-Device')
+        self.assertTrue(results['project-1'].ok)
+
+    def test_invalid_parameters(self):
+        for projects in ('project-1', [], ['project-1', None]):
+            with self.assertRaises(InvalidParameterException):
+                MultiProjectClient('test_auth_token', projects)
+        with self.assertRaises(InvalidParameterException):
+            MultiProjectClient('test_auth_token', ['project-1'], max_workers=0)
+        with self.assertRaises(InvalidParameterException):
+            self.client.map('missing_operation')
+        for operation in ('set_project', 'delete_device', 'apply_parameters'):
+            with self.assertRaises(InvalidParameterException):
+                self.client.map(operation, 'project-4')
@@ -3,7 +3,8 @@ import unittest
 
 import enum
 
-from rapyuta_io.utils.object_converter import ObjBase, nested_field, enum_field, list_field
+from rapyuta_io.utils.object_converter import ObjBase, nested_field, enum_field, list_field, _serializers, \
+    _deserializers
 
 
 class SampleConverterClass(ObjBase):
@@ -51,6 +52,36 @@ class SampleConverterBase(ObjBase):
         }
 
 
+class UndeclaredDynamicMapClass(ObjBase):
+    def get_deserialize_map(self):
+        return {
+            'class': 'class',
+            'string_key': 'string-key',
+        }
+
+    def get_serialize_map(self):
+        serialization_map = {'string-key': 'string_key'}
+        if getattr(self, 'class', None) is not None:
+            serialization_map['class'] = 'class'
+        return serialization_map
+
+
+class DynamicMapClass(ObjBase):
+    _dynamic_serialize_map = True
+
+    def get_deserialize_map(self):
+        return {
+            'class': 'class',
+            'string_key': 'string-key',
+        }
+
+    def get_serialize_map(self):
+        serialization_map = {'string-key': 'string_key'}
+        if getattr(self, 'class', None) is not None:
+            serialization_map['class'] = 'class'
+        return serialization_map
+
+
 class ObjBaseTestCase(unittest.TestCase):
     def setUp(self):
         self.string_val = 'stringVal'
@@ -128,3 +159,42 @@ class ObjBaseTestCase(unittest.TestCase):
         with self.assertRaises(Exception) as e:
             SampleConverterBase.deserialize(self.base_data, only=['api_field', True])
         self.assertEqual(str(e.exception), 'only should be a list of string')
+
+    def test_compiled_serializers_are_cached(self):
+        self.assertEqual(self.base_obj.serialize(), self.base_data)
+        serializer = _serializers[SampleConverterBase]
+        SampleConverterBase.deserialize(self.base_data)
+        deserializer = _deserializers[SampleConverterBase]
+        self.assertEqual(self.create_base_obj().serialize(), self.base_data)
+        SampleConverterBase.deserialize(self.base_data)
+        self.assertIs(_serializers[SampleConverterBase], serializer)
+        self.assertIs(_deserializers[SampleConverterBase], deserializer)
+
+    def test_serialize_skips_none(self):
+        self.base_obj.int_key = None
+        self.base_obj.list_nested_key = []
+        data = self.base_obj.serialize()
+        self.assertNotIn('intKey', data)
+        self.assertEqual(data['listNestKey'], [])
+
+    def test_enum_field_unknown_value(self):
+        data = dict(self.base_data, enumKey='UNKNOWN')
+        obj = SampleConverterBase.deserialize(data)
+        self.assertEqual(obj.enum_key, 'UNKNOWN')
+        self.assertNotIsInstance(obj.enum_key, SampleEnumClass)
+
+    def test_dynamic_serialize_map(self):
+        obj = DynamicMapClass.deserialize({'string-key': 'value'})
+        self.assertEqual(obj.string_key, 'value')
+        self.assertIsNone(getattr(obj, 'class'))
+        self.assertEqual(obj.serialize(), {'string-key': 'value'})
+        obj = DynamicMapClass.deserialize({'string-key': 'value', 'class': 'klass'})
+        self.assertEqual(obj.serialize(), {'string-key': 'value', 'class': 'klass'})
+
+    def test_undeclared_dynamic_serialize_map(self):
+        obj = UndeclaredDynamicMapClass.deserialize({'string-key': 'value'})
+        self.assertEqual(obj.serialize(), {'string-key': 'value'})
+        obj = UndeclaredDynamicMapClass.deserialize({'string-key': 'value', 'class': 'klass'})
+        self.assertEqual(obj.serialize(), {'string-key': 'value', 'class': 'klass'})
+        obj = UndeclaredDynamicMapClass.deserialize({'string-key': 'other'})
+        self.assertEqual(obj.serialize(), {'string-key': 'other'})
@@ -3,7 +3,7 @@ from __future__ import absolute_import
 import unittest
 
 from rapyuta_io.utils.error import OperationNotAllowedError
-from rapyuta_io.utils.objdict import ObjDict, ImmutableKeyDict, to_objdict, to_dict
+from rapyuta_io.utils.objdict import ObjDict, ImmutableKeyDict, LazyObjDict, to_objdict, to_dict
 
 
 # TODO setattr and delattr cannot be further tested without weird hacks.
@@ -87,3 +87,74 @@ class ObjDictTests(unittest.TestCase):
         test_dict = ImmutableKeyDict(to_objdict(test_in))
         with self.assertRaises(OperationNotAllowedError):
             delattr(test_dict, 'key1')
+
+    def test_objdict_attribute_and_key_access(self):
+        objdict = ObjDict()
+        objdict.key1 = 'value1'
+        self.assertEqual(objdict['key1'], 'value1')
+        objdict['key2'] = 'value2'
+        self.assertEqual(objdict.key2, 'value2')
+        self.assertFalse(hasattr(objdict, 'key3'))
+        self.assertEqual(getattr(objdict, 'key3', 'default'), 'default')
+        # Names only defined on the metaclass are plain keys.
+        objdict.mro = 'value'
+        self.assertEqual(objdict['mro'], 'value')
+
+    def test_objdict_class_attributes_stay_attributes(self):
+        class _Resource(ObjDict):
+            kind = 'resource'
+
+            @property
+            def status(self):
+                return self.get('_status', 'unknown')
+
+            @status.setter
+            def status(self, value):
+                self['_status'] = value
+
+        resource = _Resource()
+        resource.kind = 'device'
+        self.assertEqual(resource.kind, 'device')
+        self.assertNotIn('kind', dict(resource))
+        resource.status = 'ONLINE'
+        self.assertEqual(dict(resource), {'_status': 'ONLINE'})
+        del resource.kind
+        self.assertEqual(resource.kind, 'resource')
+
+    def test_lazy_objdict_converts_on_access(self):
+        test_in = {'key1': 'value1', 'key2': [{'subkey1': 'subval1'}], 'key3': {'subkey2': {'leaf': 1}}}
+        objdict = to_objdict(test_in, lazy=True)
+        self.assertIsInstance(objdict, LazyObjDict)
+        self.assertIs(dict.__getitem__(objdict, 'key3'), test_in['key3'])
+        self.assertEqual(objdict.key3.subkey2.leaf, 1)
+        self.assertIs(objdict['key3'], objdict.key3)
+        self.assertIsInstance(objdict.key2[0], ObjDict)
+        self.assertEqual(objdict.key2[0].subkey1, 'subval1')
+        self.assertEqual(dict(objdict.items())['key3'].subkey2, {'leaf': 1})
+        self.assertEqual(objdict, test_in)
+
+    def test_lazy_objdict_to_dict_zero_copy(self):
+        test_in = {'key1': 'value1', 'key2': [{'subkey1': 'subval1'}], 'key3': {'subkey2': 1.2}}
+        objdict = to_objdict(test_in, lazy=True)
+        self.assertIs(to_dict(objdict), test_in)
+        objdict.key2[0].subkey1
+        objdict.key3.subkey2
+        self.assertIs(objdict.to_dict(), test_in)
+
+        objdict.key3.subkey2 = 2.4
+        test_out = to_dict(objdict)
+        self.assertIsNot(test_out, test_in)
+        self.assertEqual(test_out['key3'], {'subkey2': 2.4})
+        self.assertEqual(test_in['key3'], {'subkey2': 1.2})
+        self.assertIs(test_out['key2'][0], test_in['key2'][0])
+
+    def test_lazy_objdict_mutations(self):
+        test_in = {'key1': 'value1', 'key2': [{'subkey1': 'subval1'}]}
+        objdict = to_objdict(test_in, lazy=True)
+        objdict.key2.append({'subkey1': 'subval2'})
+        self.assertEqual(to_dict(objdict)['key2'][1], {'subkey1': 'subval2'})
+
+        objdict = to_objdict(test_in, lazy=True)
+        self.assertEqual(objdict.pop('key2')[0].subkey1, 'subval1')
+        self.assertEqual(to_dict(objdict), {'key1': 'value1'})
+        self.assertIn('key2', test_in)
@@ -0,0 +1,148 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+import unittest
+
+from mock import Mock, patch
+from requests import Response
+
+from rapyuta_io.clients.device import Device, _ListedCounts
+from rapyuta_io.utils import DeviceNotFoundException, RetriesExhausted
+from rapyuta_io.utils.pollers import RefreshPollerMixin, poll_till_ready_many
+from tests.utils.client import get_client
+
+
+class _Resource(RefreshPollerMixin):
+
+    def __init__(self, name, ready_after, error=None):
+        self.name = name
+        self.ready_after = ready_after
+        self.error = error
+        self.refreshes = 0
+
+    def refresh(self):
+        self.refreshes += 1
+
+    def is_ready(self):
+        if self.error is not None:
+            raise self.error
+        return self.refreshes >= self.ready_after
+
+
+class PollTillReadyManyTests(unittest.TestCase):
+
+    @patch('time.sleep')
+    def test_yields_as_ready(self, sleep):
+        first, second, failed = _Resource('first', 1), _Resource('second', 3), _Resource('failed', 1, ValueError())
+        results = list(poll_till_ready_many([second, first, failed], timeout=60, sleep_interval=1, backoff=2))
+        self.assertEqual([(obj.name, type(err)) for obj, err in results],
+                         [('first', type(None)), ('failed', ValueError), ('second', type(None))])
+        self.assertEqual(second.refreshes, 3)
+        self.assertEqual(first.refreshes, 1)
+        # Progress resets the interval, the round without progress doubles it.
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [1, 2])
+
+    @patch('time.sleep')
+    def test_shared_deadline(self, sleep):
+        ready, stuck = _Resource('ready', 1), _Resource('stuck', 100)
+        with patch('time.monotonic', side_effect=[0, 5, 11]):
+            results = poll_till_ready_many([ready, stuck], timeout=10, sleep_interval=4, max_interval=6)
+            self.assertIs(next(results)[0], ready)
+            with self.assertRaises(RetriesExhausted) as e:
+                next(results)
+        self.assertEqual(e.exception.pending, [stuck])
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [4])
+
+    @patch('time.sleep')
+    def test_refresh_errors_are_retried(self, sleep):
+        resource = _Resource('flaky', 1)
+        resource.refresh = Mock(side_effect=[IOError('connection reset'), None])
+        resource.is_ready = Mock(return_value=True)
+        self.assertEqual(list(poll_till_ready_many([resource], timeout=60)), [(resource, None)])
+        self.assertEqual(resource.refresh.call_count, 2)
+        self.assertEqual(resource.is_ready.call_count, 1)
+
+
+class DeviceRefreshManyTests(unittest.TestCase):
+
+    def _devices(self, count, client=None):
+        devices = [Device._deserialize({'uuid': 'device-{}'.format(i), 'name': 'device-{}'.format(i),
+                                        'status': 'OFFLINE'}) for i in range(count)]
+        (client or get_client())._dmClient._add_auth_token_to_devices(devices)
+        return devices
+
+    def _list_response(self, online):
+        response = Mock(spec=Response)
+        response.status_code = 200
+        response.text = json.dumps({'status': 'success', 'response': {'data': [
+            {'uuid': uuid, 'name': uuid, 'status': 'ONLINE'} for uuid in online]}})
+        return response
+
+    @patch('time.sleep')
+    def test_poll_devices_with_list_call(self, sleep):
+        devices = self._devices(6)
+        device = Mock(spec=Response)
+        device.status_code = 200
+        device.text = json.dumps({'status': 'success', 'response': {'data': {
+            'uuid': 'device-5', 'name': 'device-5', 'status': 'ONLINE', 'host': 'robot'}}})
+        responses = [self._list_response(['device-0', 'device-1', 'device-2', 'device-3', 'device-4']), device]
+        with patch('requests.request', side_effect=responses) as request:
+            results = list(poll_till_ready_many(devices, timeout=60, batch_threshold=5))
+        # One list call for the six devices, the last pending device is below the threshold and fetched alone.
+        self.assertEqual([c[1]['url'].rsplit('/v0/', 1)[1] for c in request.call_args_list], ['devices/', 'devices/device-5'])
+        self.assertEqual([device.uuid for device, _ in results], ['device-{}'.format(i) for i in range(6)])
+        self.assertTrue(all(device.is_online() and device.is_partial for device in devices[:5]))
+        self.assertFalse(devices[5].is_partial)
+
+    @patch('time.sleep')
+    def test_large_inventory_refreshed_one_by_one(self, sleep):
+        devices = self._devices(6)
+        inventory = self._list_response([])
+        inventory.text = json.dumps({'status': 'success', 'response': {'data': [
+            {'uuid': 'device-{}'.format(i), 'name': 'device-{}'.format(i), 'status': 'OFFLINE'} for i in range(100)]}})
+
+        def request(method, url, **kwargs):
+            if url.endswith('/devices/'):
+                return inventory
+            response = Mock(spec=Response)
+            response.status_code = 200
+            uuid = url.rsplit('/', 1)[1]
+            response.text = json.dumps({'status': 'success', 'response': {'data': {
+                'uuid': uuid, 'name': uuid, 'status': 'ONLINE'}}})
+            return response
+
+        with patch('requests.request', side_effect=request) as mock_request:
+            results = list(poll_till_ready_many(devices, timeout=60, batch_threshold=5))
+        # The first round lists the 100 devices of the project, 6 of them are then cheaper to fetch alone.
+        urls = [c[1]['url'].rsplit('/v0/', 1)[1] for c in mock_request.call_args_list]
+        self.assertEqual(urls[0], 'devices/')
+        self.assertEqual(sorted(urls[1:]), ['devices/device-{}'.format(i) for i in range(6)])
+        self.assertEqual(len(results), 6)
+
+    def test_refresh_many_missing_device(self):
+        devices = self._devices(2)
+        with patch('requests.request', return_value=self._list_response(['device-0'])):
+            errors = Device._refresh_many(devices)
+        self.assertEqual(list(errors), [id(devices[1])])
+        self.assertIsInstance(errors[id(devices[1])], DeviceNotFoundException)
+        self.assertTrue(devices[0].is_online())
+
+    def test_listed_counts_are_kept_per_client(self):
+        client = get_client()
+        devices = self._devices(2, client)
+        with patch('requests.request', return_value=self._list_response(['device-0', 'device-1', 'device-2'])):
+            Device._refresh_many(devices)
+        self.assertEqual(Device._refresh_many_size(devices), 3)
+        self.assertEqual(Device._refresh_many_size(self._devices(2, client)), 3)
+        self.assertIsNone(Device._refresh_many_size(self._devices(2)))
+        self.assertNotIn('_listed_counts', devices[0].__getstate__())
+
+    def test_listed_counts_are_bounded(self):
+        listed_counts = _ListedCounts(max_entries=2)
+        listed_counts.set('a', 1)
+        listed_counts.set('b', 2)
+        self.assertEqual(listed_counts.get('a'), 1)
+        listed_counts.set('c', 3)
+        self.assertIsNone(listed_counts.get('b'))
+        self.assertEqual((listed_counts.get('a'), listed_counts.get('c')), (1, 3))
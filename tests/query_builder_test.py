@@ -0,0 +1,91 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import unittest
+from concurrent import futures
+
+from rapyuta_io.clients.compact import CompactDevice
+from rapyuta_io.utils.label_index import LabelIndex
+from rapyuta_io.utils.query_builder import build_device_selection_payload, compile_device_selection, \
+    LabelCriterion, MeasurementCriterion, StatusCriterion
+from rapyuta_io.utils.settings import LABEL_FORMAT, MEASUREMENT_FORMAT
+from tests.utils.payloads import PAYLOAD1, PAYLOAD2
+
+
+def _device(uuid, status, **labels):
+    return CompactDevice.from_dict({'uuid': uuid, 'status': status,
+                                    'labels': [{'id': i, 'key': k, 'value': v}
+                                               for i, (k, v) in enumerate(sorted(labels.items()))]})
+
+
+class QueryBuilderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.devices = [
+            _device('robot-1', 'ONLINE', zone='a', site='tokyo'),
+            _device('robot-2', 'OFFLINE', zone='a', site='tokyo'),
+            _device('robot-3', 'ONLINE', zone='b', site='tokyo'),
+            _device('robot-4', 'ONLINE'),
+        ]
+
+    def test_compile(self):
+        selection = compile_device_selection('label.zone=a, measurement.battery.value>20, status=ONLINE')
+        self.assertEqual(selection.criteria, (LabelCriterion('zone', 'a'),
+                                              MeasurementCriterion('battery', 'value', '>', '20'),
+                                              StatusCriterion('ONLINE')))
+        self.assertIs(compile_device_selection('label.zone=a, measurement.battery.value>20, status=ONLINE'),
+                      selection)
+        self.assertFalse(selection.is_local)
+        with self.assertRaises(AttributeError):
+            selection.criteria = ()
+        with self.assertRaises(ValueError):
+            compile_device_selection('label.zone')
+        with self.assertRaises(ValueError):
+            compile_device_selection('status=')
+
+    def test_payloads(self):
+        self.assertEqual(build_device_selection_payload('measurement.battery.value>20'), PAYLOAD1)
+        self.assertEqual(build_device_selection_payload('label.test_label=true'), PAYLOAD2)
+        payload = build_device_selection_payload('label.zone=a, label.site=tokyo, measurement.cpu.usage<90')
+        fields = [c['labels']['select_criteria']['fields'][0]['field'] for c in payload['selection_criteria'][:2]]
+        self.assertEqual(fields, ['zone', 'site'])
+        self.assertEqual(payload['selection_criteria'][2]['measurements']['measurement'], 'cpu')
+        # The templates are left untouched.
+        self.assertEqual(LABEL_FORMAT['labels']['select_criteria']['fields'][0]['field'], '')
+        self.assertEqual(MEASUREMENT_FORMAT['measurements']['measurement'], 'topicInt')
+        with self.assertRaises(ValueError):
+            build_device_selection_payload('label.zone=a, status=ONLINE')
+
+    def test_concurrent_payloads(self):
+        def build(i):
+            return build_device_selection_payload('label.zone{}=a{}'.format(i, i))
+
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            payloads = list(executor.map(build, range(200)))
+        for i, payload in enumerate(payloads):
+            field = payload['selection_criteria'][0]['labels']['select_criteria']['fields'][0]
+            self.assertEqual((field['field'], field['values']['max_value']), ('zone{}'.format(i), 'a{}'.format(i)))
+
+    def test_select(self):
+        selection = compile_device_selection('label.zone=a, status=ONLINE')
+        self.assertTrue(selection.is_local)
+        self.assertEqual([d.uuid for d in selection.select(self.devices)], ['robot-1'])
+        index = LabelIndex(self.devices)
+        self.assertEqual([d.uuid for d in selection.select(index=index)], ['robot-1'])
+        self.assertEqual([d.uuid for d in compile_device_selection('label.site=tokyo').select(index=index)],
+                         ['robot-1', 'robot-2', 'robot-3'])
+        self.assertEqual([d.uuid for d in compile_device_selection('status=ONLINE').select(index=index)],
+                         ['robot-1', 'robot-3', 'robot-4'])
+        self.assertEqual(compile_device_selection('label.zone=c').select(index=index), [])
+        with self.assertRaises(ValueError):
+            compile_device_selection('measurement.cpu.usage>1').select(self.devices)
+
+    def test_label_index(self):
+        index = LabelIndex(self.devices)
+        self.assertEqual(index.lookup('zone', 'a'), frozenset(['robot-1', 'robot-2']))
+        index.add_device(_device('robot-1', 'ONLINE', zone='b'))
+        index.remove_device('robot-3')
+        self.assertEqual(index.lookup('zone', 'a'), frozenset(['robot-2']))
+        self.assertEqual(index.lookup('zone', 'b'), frozenset(['robot-1']))
+        self.assertEqual(len(index), 3)
+        self.assertNotIn('robot-3', index)
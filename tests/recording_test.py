@@ -0,0 +1,89 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+from requests import Response
+
+from rapyuta_io.utils import APIError
+from rapyuta_io.utils.recording import RecordingTransport, ReplayTransport, REDACTED
+from rapyuta_io.utils.rest_client import RestClient, HttpMethod
+from rapyuta_io.utils.transport import Transport
+from rapyuta_io.utils.utils import get_api_response_data
+
+URL = 'https://gaapiserver.apps.okd4v2.prod.rapyuta.io/api/device-manager/v0/devices/'
+HEADERS = {'Authorization': 'Bearer secret-token', 'project': 'project-id'}
+
+
+def _response(status_code, content):
+    response = Response()
+    response.status_code = status_code
+    response.reason = 'OK'
+    response._content = content
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+class RecordingTransportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.inner = Mock(spec=Transport)
+        self.inner.send.side_effect = [
+            _response(200, b'{"response": {"data": [{"uuid": "device-1"}]}}'),
+            _response(200, b'{"response": {"data": [{"uuid": "device-2"}]}}'),
+            _response(200, b'{"response": {"data": {"uuid": "device-1"}}}'),
+            _response(201, b'{"response": {"data": {}}}'),
+        ]
+        self.recorder = RecordingTransport(self.inner)
+
+    def _record(self):
+        for _ in range(2):
+            RestClient(URL).headers(HEADERS).transport(self.recorder).execute()
+        RestClient(URL).headers(HEADERS).query_param({'name': 'device-1'}).transport(self.recorder).execute()
+        RestClient(URL).method(HttpMethod.POST).headers(HEADERS).transport(self.recorder).execute({'name': 'd'})
+
+    def test_har_entries(self):
+        self._record()
+        har = self.recorder.to_har()
+        self.assertEqual(har['log']['version'], '1.2')
+        entries = har['log']['entries']
+        self.assertEqual(len(entries), 4)
+        self.assertEqual(entries[2]['request']['queryString'], [{'name': 'name', 'value': 'device-1'}])
+        self.assertEqual(entries[3]['request']['postData'], {'mimeType': 'application/json',
+                                                             'text': '{"name": "d"}'})
+        self.assertEqual(entries[3]['response']['status'], 201)
+        self.assertIn({'name': 'Authorization', 'value': REDACTED}, entries[0]['request']['headers'])
+        self.assertNotIn('secret-token', json.dumps(har))
+
+    def test_replay_from_file(self):
+        self._record()
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'devices.har')
+        self.recorder.save(path)
+
+        replay = ReplayTransport(path)
+
+        def get(query=None):
+            response = RestClient(URL).headers(HEADERS).query_param(query or {}).transport(replay).execute()
+            return get_api_response_data(response)
+
+        self.assertEqual(get(), [{'uuid': 'device-1'}])
+        self.assertEqual(get({'name': 'device-1'}), {'uuid': 'device-1'})
+        self.assertEqual(get(), [{'uuid': 'device-2'}])
+        # The last recorded response is repeated.
+        self.assertEqual(get(), [{'uuid': 'device-2'}])
+
+    def test_replay_without_recording(self):
+        replay = ReplayTransport([])
+        with self.assertRaises(APIError):
+            RestClient(URL).transport(replay).execute()
+
+        fallback = Mock(spec=Transport)
+        RestClient(URL).transport(ReplayTransport([], transport=fallback)).execute()
+        self.assertEqual(fallback.send.call_count, 1)
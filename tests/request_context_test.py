@@ -0,0 +1,125 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import asyncio
+import json
+import threading
+import unittest
+
+from mock import Mock, patch
+from requests import Response
+
+from rapyuta_io.clients.device import Device
+from rapyuta_io.utils import InvalidParameterException
+from rapyuta_io.utils.request_context import ContextThreadPoolExecutor, RequestContext, get_request_context, \
+    request_context
+from rapyuta_io.utils.utils import create_auth_header
+from tests.utils.client import get_client
+from tests.utils.device_respones import DEVICE_INFO, DEVICE_LIST
+
+
+class _RecordingAPI(object):
+
+    def __init__(self, text=DEVICE_LIST):
+        self.text = text
+        self.headers = []
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, headers=None, **kwargs):
+        with self.lock:
+            self.headers.append(headers)
+        response = Mock(spec=Response)
+        response.status_code = 200
+        response.text = self.text
+        return response
+
+
+class RequestContextTests(unittest.TestCase):
+
+    def test_nested_contexts(self):
+        self.assertEqual(get_request_context(), RequestContext())
+        with request_context(project='project-1', organization='org-1'):
+            with request_context(project='project-2', auth_token='other-token') as context:
+                self.assertEqual(context, RequestContext('project-2', 'org-1', 'Bearer other-token'))
+                # Explicit values are kept, only the organization comes from the context.
+                self.assertEqual(create_auth_header('Bearer token', 'project'), {
+                    'Authorization': 'Bearer token', 'project': 'project', 'organization': 'org-1'})
+            self.assertEqual(get_request_context().project, 'project-1')
+        self.assertEqual(create_auth_header('Bearer token', 'project'),
+                         {'Authorization': 'Bearer token', 'project': 'project'})
+        with self.assertRaises(AttributeError):
+            context.project = 'project-3'
+        self.assertNotIn('other-token', repr(context))
+        with self.assertRaises(InvalidParameterException):
+            with request_context(project=''):
+                pass
+
+    def test_context_executor(self):
+        with request_context(project='project-1'), ContextThreadPoolExecutor(max_workers=2) as executor:
+            projects = list(executor.map(lambda _: get_request_context().project, range(4)))
+        self.assertEqual(projects, ['project-1'] * 4)
+
+    def test_shared_client_in_threads(self):
+        client = get_client()
+        api = _RecordingAPI()
+        barrier = threading.Barrier(2)
+        devices = {}
+
+        def list_devices(project):
+            with request_context(project=project):
+                barrier.wait(5)
+                devices[project] = client.get_all_devices()
+
+        with patch('requests.request', side_effect=api):
+            threads = [threading.Thread(target=list_devices, args=(p,)) for p in ('project-1', 'project-2')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(h['project'] for h in api.headers), ['project-1', 'project-2'])
+        self.assertEqual(devices['project-2'][0]._project, 'project-2')
+        self.assertIsNone(devices['project-2'][0]._label_index)
+        self.assertEqual(len(client._dmClient._label_index), 0)
+        self.assertEqual(client._dmClient._project, 'test_project')
+        with patch('requests.request', side_effect=api):
+            devices['project-2'][0].get_labels()
+        self.assertEqual(api.headers[-1]['project'], 'project-2')
+
+    def test_device_keeps_its_project(self):
+        client = get_client()
+        api = _RecordingAPI(DEVICE_INFO)
+        with patch('requests.request', side_effect=api):
+            device = client.get_device('test_device_id')
+            with request_context(project='project-2', auth_token='other-token'):
+                device.refresh()
+                client.get_device('test_device_id')
+        self.assertEqual(api.headers[1]['project'], 'test_project')
+        self.assertEqual(api.headers[1]['Authorization'], 'Bearer test_auth_token')
+        self.assertEqual(api.headers[2]['project'], 'project-2')
+        self.assertEqual(api.headers[2]['Authorization'], 'Bearer other-token')
+
+    def test_shared_client_in_tasks(self):
+        client = get_client()
+        api = _RecordingAPI(DEVICE_INFO)
+        data = json.loads(DEVICE_INFO)['response']['data']
+
+        async def refresh(project):
+            with request_context(project=project):
+                device = Device._deserialize(dict(data))
+                client._dmClient._add_auth_token_to_devices([device])
+                return await client.refresh_devices_async([device])
+
+        async def main():
+            return await asyncio.gather(refresh('project-1'), refresh('project-2'))
+
+        with patch('requests.Session.request', side_effect=api):
+            results = asyncio.run(main())
+        self.assertTrue(all(r[0].ok for r in results))
+        self.assertEqual(sorted(h['project'] for h in api.headers), ['project-1', 'project-2'])
+
+    def test_paramserver_headers(self):
+        client = get_client()
+        with request_context(project='project-1'):
+            self.assertEqual(client._paramserver_client._headers['project'], 'project-1')
+        self.assertEqual(client._paramserver_client._headers['project'], 'test_project')
@@ -0,0 +1,153 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+from mock import Mock, patch
+from requests import Response
+
+from rapyuta_io.utils.response_cache import CachingTransport, ResponseCache, CacheEntry, _DiskTier
+from rapyuta_io.utils.rest_client import RestClient, HttpMethod
+from rapyuta_io.utils.transport import Transport
+from rapyuta_io.utils.utils import get_api_response_data
+
+URL = 'https://gaapiserver.apps.okd4v2.prod.rapyuta.io/api/device-manager/v0/devices/device-id'
+HEADERS = {'Authorization': 'Bearer token', 'project': 'project-id'}
+BODY = b'{"response": {"data": {"uuid": "device-id", "labels": []}}}'
+
+
+def _response(status_code, content=b'', headers=None):
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {})
+    return response
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.inner = Mock(spec=Transport)
+        self.transport = CachingTransport(ResponseCache(), transport=self.inner)
+
+    def _get(self, headers=HEADERS, params=None):
+        response = RestClient(URL).headers(headers).query_param(params or {}).transport(self.transport).execute()
+        return get_api_response_data(response)
+
+    def test_not_modified_served_from_cache(self):
+        self.inner.send.side_effect = [_response(200, BODY, {'ETag': '"v1"'}), _response(304)]
+        first = self._get()
+        second = self._get()
+        self.assertEqual(first, second)
+        self.assertEqual(self.inner.send.call_count, 2)
+        self.assertNotIn('If-None-Match', self.inner.send.call_args_list[0][1]['headers'])
+        self.assertEqual(self.inner.send.call_args_list[1][1]['headers'],
+                         dict(HEADERS, **{'If-None-Match': '"v1"'}))
+        self.assertEqual(self.transport.cache.hits, 1)
+
+    def test_cached_data_is_copied(self):
+        self.inner.send.side_effect = [_response(200, BODY, {'ETag': '"v1"'}), _response(304), _response(304)]
+        self._get()
+        self._get()['labels'].append('mutated')
+        self.assertEqual(self._get()['labels'], [])
+
+    def test_last_modified_validator(self):
+        last_modified = 'Wed, 21 Oct 2025 07:28:00 GMT'
+        self.inner.send.side_effect = [_response(200, BODY, {'Last-Modified': last_modified}), _response(304)]
+        self._get()
+        self._get()
+        self.assertEqual(self.inner.send.call_args[1]['headers']['If-Modified-Since'], last_modified)
+
+    def test_modified_response_replaces_entry(self):
+        new_body = b'{"response": {"data": {"uuid": "device-id", "labels": [1]}}}'
+        self.inner.send.side_effect = [_response(200, BODY, {'ETag': '"v1"'}),
+                                       _response(200, new_body, {'ETag': '"v2"'}), _response(304)]
+        self._get()
+        self.assertEqual(self._get()['labels'], [1])
+        self.assertEqual(self._get()['labels'], [1])
+        self.assertEqual(self.inner.send.call_args[1]['headers']['If-None-Match'], '"v2"')
+
+    def test_keys_include_project_and_credentials(self):
+        self.inner.send.side_effect = [_response(200, BODY, {'ETag': '"v1"'}) for _ in range(3)]
+        self._get()
+        self._get(headers=dict(HEADERS, project='other-project'))
+        self._get(headers=dict(HEADERS, Authorization='Bearer other'))
+        for call_args in self.inner.send.call_args_list:
+            self.assertNotIn('If-None-Match', call_args[1]['headers'])
+
+    def test_not_stored_without_validator_or_with_no_store(self):
+        self.inner.send.side_effect = [_response(200, BODY),
+                                       _response(200, BODY, {'ETag': '"v1"', 'Cache-Control': 'no-store'}),
+                                       _response(200, BODY)]
+        self._get()
+        self._get()
+        self._get()
+        self.assertEqual(len(self.transport.cache), 0)
+
+    def test_write_invalidates_url(self):
+        self.inner.send.side_effect = [_response(200, BODY, {'ETag': '"v1"'}), _response(200, b'{}'),
+                                       _response(200, BODY, {'ETag': '"v2"'})]
+        self._get()
+        RestClient(URL).method(HttpMethod.PATCH).headers(HEADERS).transport(self.transport).execute({'name': 'n'})
+        self._get()
+        self.assertNotIn('If-None-Match', self.inner.send.call_args[1]['headers'])
+
+    def test_write_invalidates_path_prefix(self):
+        cache = ResponseCache()
+        collection = URL.rpartition('/')[0] + '/'
+        for key, url in (('device', URL), ('labels', URL + '/labels'), ('list', collection),
+                         ('other', URL + '-2'), ('config', collection.rstrip('/') + '-config/1')):
+            cache.put(key, CacheEntry(url, BODY, {'ETag': '"v1"'}))
+        cache.invalidate(URL + '?force=true')
+        self.assertEqual([key for key in ('device', 'labels', 'list', 'other', 'config') if cache.get(key)],
+                         ['other', 'config'])
+
+    def test_disk_tier_index(self):
+        disk_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, disk_dir)
+        cache = ResponseCache(disk_dir=disk_dir, max_disk_bytes=500)
+        for i in range(4):
+            cache.put(str(i), CacheEntry('{}/{}'.format(URL, i), b'x' * 100, {'ETag': '"v1"'}))
+        self.assertEqual(sorted(os.listdir(disk_dir)), ['2.rioc', '3.rioc'])
+
+        # A new process indexes the files already there.
+        cache = ResponseCache(disk_dir=disk_dir, max_disk_bytes=500)
+        with patch.object(_DiskTier, '_read', side_effect=AssertionError('file read')):
+            cache.invalidate(URL + '/2')
+            cache.put('4', CacheEntry(URL + '/4', b'x' * 100, {'ETag': '"v1"'}))
+        self.assertEqual(sorted(os.listdir(disk_dir)), ['3.rioc', '4.rioc'])
+
+    def test_lru_bounded_by_size(self):
+        cache = ResponseCache(max_bytes=100)
+        for i in range(5):
+            cache.put(str(i), CacheEntry(URL, b'x' * 40, {'ETag': '"{}"'.format(i)}))
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.size, 100)
+        self.assertIsNone(cache.get('0'))
+        self.assertIsNotNone(cache.get('4'))
+
+    def test_disk_tier(self):
+        disk_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, disk_dir)
+        self.inner.send.side_effect = [_response(200, BODY, {'ETag': '"v1"'}), _response(304)]
+        self.transport.cache = ResponseCache(disk_dir=disk_dir)
+        self._get()
+
+        # A new process starts with an empty memory tier.
+        self.transport.cache = ResponseCache(disk_dir=disk_dir)
+        self.assertEqual(self._get()['uuid'], 'device-id')
+        self.assertEqual(self.inner.send.call_args[1]['headers']['If-None-Match'], '"v1"')
+
+    @patch('requests.request')
+    def test_mock_responses_pass_through(self, mock_request):
+        response = Mock(spec=Response)
+        response.status_code = requests.codes.OK
+        response.text = BODY.decode('utf-8')
+        mock_request.return_value = response
+        transport = CachingTransport()
+        self.assertIs(RestClient(URL).headers(HEADERS).transport(transport).execute(), response)
+        self.assertEqual(len(transport.cache), 0)
@@ -1,13 +1,19 @@
 # encoding: utf-8
 from __future__ import absolute_import
+import gzip
+import io
+import json
 import requests
 import unittest
+import zlib
 
 from mock import call, patch, Mock
 from requests import Response
+from urllib3 import HTTPResponse
 
+from rapyuta_io.utils import rest_client
 from rapyuta_io.utils.error import APIError
-from rapyuta_io.utils.rest_client import RestClient, HttpMethod
+from rapyuta_io.utils.rest_client import RestClient, HttpMethod, ContentEncoding
 from requests.exceptions import RequestException
 from six.moves import range
 
@@ -98,3 +104,102 @@ class RESTClientTests(unittest.TestCase):
         with self.assertRaises(APIError):
             c.execute()
         req_mock.assert_has_calls([self.CALL for _ in range(5)])
+
+
+class RESTClientCompressionTests(unittest.TestCase):
+    URL = 'https://paramserver.example.com/api/paramserver/v1/tree/t/a/file.yaml'
+    LARGE_PAYLOAD = {'type': 'FileNode', 'data': {'key{}'.format(i): 'value' * 4 for i in range(500)}}
+
+    def setUp(self):
+        rest_client._compression_rejected_hosts.clear()
+
+    def tearDown(self):
+        rest_client._compression_rejected_hosts.clear()
+
+    @staticmethod
+    def _response(status_code):
+        response = Mock(spec=Response)
+        response.status_code = status_code
+        return response
+
+    @patch('requests.request')
+    def test_large_payload_is_gzipped(self, req_mock):
+        req_mock.return_value = self._response(requests.codes.OK)
+        RestClient(self.URL).method(HttpMethod.PUT).headers({'project': 'p'}).compress().execute(self.LARGE_PAYLOAD)
+        self.assertEqual(req_mock.call_count, 1)
+        kwargs = req_mock.call_args[1]
+        self.assertEqual(kwargs['headers'], {'project': 'p', 'Content-Type': 'application/json',
+                                             'Content-Encoding': 'gzip'})
+        self.assertNotIn('json', kwargs)
+        self.assertEqual(json.loads(gzip.decompress(kwargs['data'])), self.LARGE_PAYLOAD)
+        self.assertLess(len(kwargs['data']), len(json.dumps(self.LARGE_PAYLOAD)))
+
+    @patch('requests.request')
+    def test_deflate(self, req_mock):
+        req_mock.return_value = self._response(requests.codes.OK)
+        RestClient(self.URL).method(HttpMethod.PUT).compress(ContentEncoding.DEFLATE).execute(self.LARGE_PAYLOAD)
+        kwargs = req_mock.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'deflate')
+        self.assertEqual(json.loads(zlib.decompress(kwargs['data'])), self.LARGE_PAYLOAD)
+
+    @patch('requests.request')
+    def test_small_payload_is_not_compressed(self, req_mock):
+        req_mock.return_value = self._response(requests.codes.OK)
+        payload = {'type': 'FileNode', 'data': 'a: b'}
+        RestClient(self.URL).method(HttpMethod.PUT).headers({'project': 'p'}).compress().execute(payload)
+        req_mock.assert_called_once_with(method='PUT', url=self.URL, headers={'project': 'p'}, params={},
+                                         json=payload, timeout=(30, 150))
+
+    @patch('requests.request')
+    def test_unsupported_media_type_falls_back(self, req_mock):
+        req_mock.side_effect = [self._response(requests.codes.UNSUPPORTED_MEDIA_TYPE),
+                                self._response(requests.codes.OK), self._response(requests.codes.OK)]
+        RestClient(self.URL).method(HttpMethod.PUT).headers({'project': 'p'}).compress().execute(self.LARGE_PAYLOAD)
+        self.assertEqual(req_mock.call_count, 2)
+        self.assertEqual(req_mock.call_args_list[0][1]['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(req_mock.call_args_list[1], call(method='PUT', url=self.URL, headers={'project': 'p'},
+                                                          params={}, json=self.LARGE_PAYLOAD, timeout=(30, 150)))
+
+        # The host is remembered and not asked again.
+        RestClient(self.URL).method(HttpMethod.PUT).headers({'project': 'p'}).compress().execute(self.LARGE_PAYLOAD)
+        self.assertEqual(req_mock.call_count, 3)
+        self.assertEqual(req_mock.call_args_list[2], req_mock.call_args_list[1])
+
+    @patch('requests.request')
+    def test_bad_request_falls_back(self, req_mock):
+        req_mock.side_effect = [self._response(requests.codes.BAD_REQUEST), self._response(requests.codes.OK),
+                                self._response(requests.codes.OK)]
+        RestClient(self.URL).method(HttpMethod.PUT).headers({'project': 'p'}).compress().execute(self.LARGE_PAYLOAD)
+        self.assertEqual(req_mock.call_count, 2)
+        self.assertEqual(req_mock.call_args_list[1], call(method='PUT', url=self.URL, headers={'project': 'p'},
+                                                          params={}, json=self.LARGE_PAYLOAD, timeout=(30, 150)))
+        RestClient(self.URL).method(HttpMethod.PUT).headers({'project': 'p'}).compress().execute(self.LARGE_PAYLOAD)
+        self.assertEqual(req_mock.call_args_list[2], req_mock.call_args_list[1])
+
+    @patch('requests.request')
+    def test_bad_payload_keeps_compression(self, req_mock):
+        req_mock.return_value = self._response(requests.codes.BAD_REQUEST)
+        response = RestClient(self.URL).method(HttpMethod.PUT).compress().execute(self.LARGE_PAYLOAD)
+        self.assertEqual(response.status_code, requests.codes.BAD_REQUEST)
+        self.assertEqual(req_mock.call_count, 2)
+        self.assertEqual(rest_client._compression_rejected_hosts, set())
+
+    @patch('requests.request')
+    def test_request_compression_setting(self, req_mock):
+        req_mock.return_value = self._response(requests.codes.OK)
+        self.assertIsNone(rest_client.get_request_compression())
+        RestClient(self.URL).method(HttpMethod.PUT).compress(None).execute(self.LARGE_PAYLOAD)
+        self.assertNotIn('data', req_mock.call_args[1])
+        rest_client.set_request_compression(ContentEncoding.DEFLATE)
+        self.addCleanup(rest_client.set_request_compression, None)
+        RestClient(self.URL).method(HttpMethod.PUT).compress(rest_client.get_request_compression()) \
+            .execute(self.LARGE_PAYLOAD)
+        self.assertEqual(req_mock.call_args[1]['headers']['Content-Encoding'], 'deflate')
+
+    def test_gzip_response_is_decompressed(self):
+        body = json.dumps({'response': {'data': self.LARGE_PAYLOAD}}).encode('utf-8')
+        response = Response()
+        response.status_code = requests.codes.OK
+        response.raw = HTTPResponse(body=io.BytesIO(gzip.compress(body)), headers={'Content-Encoding': 'gzip'},
+                                    status=200, preload_content=False, decode_content=True)
+        self.assertEqual(response.content, body)
@@ -0,0 +1,129 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import threading
+import unittest
+
+from mock import patch
+
+from rapyuta_io import Command
+from rapyuta_io.clients.model import RolloutEvent
+from rapyuta_io.utils import BadRequestError, InvalidParameterException
+from tests.utils.client import get_client
+from tests.utils.fake_api import FakeAPI, data_response
+
+
+class _FakeAPI(FakeAPI):
+    """
+    Applies the parameters to every device except the ``broken`` ones, and answers the command API except for the
+    ``silent`` devices.
+    """
+
+    def __init__(self, broken=(), silent=()):
+        super(_FakeAPI, self).__init__()
+        self.broken = set(broken)
+        self.silent = set(silent)
+
+    @property
+    def applied(self):
+        return [kwargs['json']['device_list'] for _, url, kwargs in self.calls if url.endswith('/parameters/')]
+
+    @property
+    def commands(self):
+        return [kwargs['json']['device_ids'] for _, url, kwargs in self.calls if not url.endswith('/parameters/')]
+
+    def answer(self, method, url, **kwargs):
+        body = kwargs['json']
+        if url.endswith('/parameters/'):
+            return data_response([{'device_id': d, 'success': d not in self.broken} for d in body['device_list']])
+        return data_response({d: 'active' for d in body['device_ids'] if d not in self.silent})
+
+
+class RolloutTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = get_client()
+        self.devices = ['device-{}'.format(i) for i in range(6)]
+
+    def _rollout(self, api, **kwargs):
+        with patch('requests.Session.request', side_effect=api), patch('requests.request', side_effect=api), \
+                patch('rapyuta_io.clients.paramserver._ParamserverClient.upload_configurations') as upload:
+            events = list(self.client.rollout_configurations('/configs', self.devices, ['robot'], **kwargs))
+        return upload, events
+
+    def test_rollout(self):
+        api = _FakeAPI(broken=['device-4'])
+        upload, events = self._rollout(api, wave_size=3, batch_size=2, retries=0,
+                                       verify=Command('systemctl is-active robot'))
+
+        upload.assert_called_once_with('/configs', ['robot'], False, False)
+        self.assertEqual([(e.stage, e.status) for e in events[:2]],
+                         [(RolloutEvent.UPLOAD, RolloutEvent.STARTED), (RolloutEvent.UPLOAD, RolloutEvent.SUCCEEDED)])
+        waves = [(e.wave, e.status) for e in events if e.stage == RolloutEvent.APPLY and e.device_id is None]
+        self.assertEqual(waves, [(0, RolloutEvent.STARTED), (0, RolloutEvent.SUCCEEDED), (1, RolloutEvent.STARTED),
+                                 (1, RolloutEvent.FAILED)])
+        verified = sorted(e.device_id for e in events if e.stage == RolloutEvent.VERIFY and e.ok)
+        self.assertEqual(verified, ['device-0', 'device-1', 'device-2', 'device-3', 'device-5'])
+        self.assertEqual(sorted(api.commands), [[d] for d in verified])
+        self.assertEqual({e.result for e in events if e.stage == RolloutEvent.VERIFY}, {'active'})
+
+        summary = events[-1]
+        self.assertEqual((summary.stage, summary.status), (RolloutEvent.ROLLOUT, RolloutEvent.FAILED))
+        self.assertEqual(summary.result['failed'], ['device-4'])
+        self.assertEqual(sorted(summary.result['verified']), verified)
+        self.assertEqual(set(summary.result['timings']), {'upload', 'apply', 'verify', 'total'})
+
+    def test_command_without_output_fails(self):
+        api = _FakeAPI(silent=['device-1'])
+        _, events = self._rollout(api, retries=0, verify=Command('systemctl is-active robot'))
+        failed = [e for e in events if e.stage == RolloutEvent.VERIFY and not e.ok]
+        self.assertEqual([e.device_id for e in failed], ['device-1'])
+        self.assertEqual(events[-1].result['failed'], ['device-1'])
+
+    def test_verification_overlaps_next_wave(self):
+        api = _FakeAPI()
+        second_wave_applied = threading.Event()
+
+        def verify(device_id):
+            if device_id == 'device-0':
+                # Only returns once the next wave has been applied.
+                return second_wave_applied.wait(5)
+            if device_id == 'device-3':
+                second_wave_applied.set()
+            return device_id != 'device-5'
+
+        upload, events = self._rollout(api, wave_size=3, verify=verify)
+        self.assertTrue(second_wave_applied.is_set())
+        verify_events = {e.device_id: e for e in events if e.stage == RolloutEvent.VERIFY}
+        self.assertTrue(verify_events['device-0'].ok)
+        self.assertEqual(verify_events['device-5'].status, RolloutEvent.FAILED)
+        self.assertEqual(events[-1].result['failed'], ['device-5'])
+
+    def test_upload_failure(self):
+        api = _FakeAPI()
+        with patch('requests.Session.request', side_effect=api), \
+                patch('rapyuta_io.clients.paramserver._ParamserverClient.upload_configurations',
+                      side_effect=BadRequestError('invalid tree')):
+            events = list(self.client.rollout_configurations('/configs', self.devices))
+        self.assertEqual([(e.stage, e.status) for e in events], [
+            (RolloutEvent.UPLOAD, RolloutEvent.STARTED), (RolloutEvent.UPLOAD, RolloutEvent.FAILED),
+            (RolloutEvent.ROLLOUT, RolloutEvent.FAILED)])
+        self.assertEqual(api.applied, [])
+
+    def test_max_failures(self):
+        api = _FakeAPI(broken=['device-0', 'device-1'])
+        with patch('requests.Session.request', side_effect=api):
+            events = list(self.client.rollout_configurations(None, self.devices, wave_size=2, retries=0,
+                                                             max_failures=1))
+        self.assertEqual(api.applied, [['device-0', 'device-1']])
+        self.assertEqual((events[-1].status, events[-1].result['failed']),
+                         (RolloutEvent.ABORTED, ['device-0', 'device-1']))
+        self.assertFalse(events[-1].ok)
+
+    def test_invalid_parameters(self):
+        for kwargs in ({'wave_size': 0}, {'max_failures': -1}, {'verify': 'ls'}, {'batch_size': 0},
+                       {'verify': Command('systemctl is-active robot', bg=True)}):
+            with self.assertRaises(InvalidParameterException):
+                self.client.rollout_configurations(None, self.devices, **kwargs)
+        with self.assertRaises(InvalidParameterException):
+            self.client.rollout_configurations(1, self.devices)
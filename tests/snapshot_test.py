@@ -0,0 +1,94 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from rapyuta_io.clients.device import Device
+from rapyuta_io.clients.project import User
+from rapyuta_io.utils import InvalidParameterException
+from rapyuta_io.utils.request_context import request_context
+from tests.utils.client import get_client
+from tests.utils.device_respones import DEVICE_LIST
+from tests.utils.fake_api import mock_response
+from tests.utils.user_response import GET_USER_RESPONSE
+
+
+class SnapshotTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'inventory.snapshot')
+        with patch('requests.request', side_effect=[mock_response(GET_USER_RESPONSE), mock_response(DEVICE_LIST)]):
+            self.saved = get_client().save_snapshot(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_snapshot(self):
+        client = get_client()
+        with patch('requests.request') as request:
+            snapshot = client.load_snapshot(self.path, max_age=60, revalidate=False)
+        request.assert_not_called()
+        self.assertIsNone(snapshot.revalidation)
+        self.assertEqual(snapshot.created_at, self.saved.created_at)
+        self.assertIsInstance(snapshot.user, User)
+        self.assertEqual(snapshot.user.email_id, 'JohnDoe@rapyuta-robotics.com')
+        self.assertEqual([d.uuid for d in snapshot.devices], [d.uuid for d in self.saved.devices])
+        device = snapshot.devices[0]
+        self.assertIsInstance(device, Device)
+        self.assertEqual(device._auth_token, 'Bearer test_auth_token')
+        self.assertEqual(device.labels, self.saved.devices[0].labels)
+        with open(self.path, 'rb') as f:
+            self.assertNotIn(b'test_auth_token', f.read())
+
+    def test_revalidate(self):
+        client = get_client()
+        with patch('requests.request', side_effect=[mock_response(GET_USER_RESPONSE), mock_response(DEVICE_LIST)]):
+            snapshot = client.load_snapshot(self.path)
+            loaded_index = snapshot.devices[0]._label_index
+            fresh = snapshot.revalidation.result(timeout=10)
+        self.assertGreaterEqual(fresh.created_at, snapshot.created_at)
+        # The fresh devices were indexed aside, the index of the snapshot devices was left as it was.
+        self.assertIsNot(client._dmClient._label_index, loaded_index)
+        self.assertIs(client._dmClient._label_index.get(fresh.devices[0].uuid), fresh.devices[0])
+        self.assertIs(loaded_index.get(snapshot.devices[0].uuid), snapshot.devices[0])
+        self.assertEqual(get_client().load_snapshot(self.path, revalidate=False).created_at, fresh.created_at)
+
+    def test_snapshot_in_request_context(self):
+        client = get_client()
+        path = os.path.join(self.directory, 'other.snapshot')
+        requests = []
+
+        def request(method, url, headers=None, **kwargs):
+            requests.append(headers['project'])
+            return mock_response(GET_USER_RESPONSE if '/user/' in url else DEVICE_LIST)
+
+        with patch('requests.request', side_effect=request):
+            with request_context(project='other_project'):
+                client.save_snapshot(path)
+                snapshot = client.load_snapshot(path)
+                snapshot.revalidation.result(timeout=10)
+            self.assertEqual(len(client._dmClient._label_index), 0)
+            with self.assertRaises(InvalidParameterException):
+                client.load_snapshot(path, revalidate=False)
+        # The revalidation thread kept the project of the context.
+        self.assertEqual(set(requests), {'other_project'})
+        self.assertEqual(snapshot.devices[0]._project, 'other_project')
+
+    def test_invalid_snapshots(self):
+        with self.assertRaises(InvalidParameterException):
+            get_client().load_snapshot(self.path, max_age=-1, revalidate=False)
+        other = get_client()
+        other.set_project('other_project')
+        with self.assertRaises(InvalidParameterException):
+            other.load_snapshot(self.path, revalidate=False)
+        with open(self.path, 'r+b') as f:
+            f.seek(20)
+            f.write(b'garbage')
+        with self.assertRaises(InvalidParameterException):
+            get_client().load_snapshot(self.path, revalidate=False)
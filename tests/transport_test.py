@@ -0,0 +1,142 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import threading
+import time
+import unittest
+
+from mock import Mock, patch
+from requests import Response
+
+from rapyuta_io.utils import APIError
+from rapyuta_io.utils.rest_client import RestClient, HttpMethod
+from rapyuta_io.utils.transport import CoalescingTransport, SessionTransport, Transport, \
+    get_default_transport, get_transport, request_key, set_default_transport, use_transport
+
+URL = 'https://gaapiserver.apps.okd4v2.prod.rapyuta.io/api/device-manager/v0/devices/device-id'
+HEADERS = {'Authorization': 'Bearer token', 'project': 'project-id'}
+
+
+class _BlockingTransport(Transport):
+    def __init__(self, result):
+        self.result = result
+        self.release = threading.Event()
+        self.calls = []
+
+    def send(self, **kwargs):
+        self.calls.append(kwargs)
+        self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class TransportTests(unittest.TestCase):
+
+    @patch('requests.request')
+    def test_default_transport_uses_requests(self, mock_request):
+        RestClient(URL).headers(HEADERS).execute()
+        mock_request.assert_called_once_with(method='GET', url=URL, headers=HEADERS, params={}, json=None,
+                                             timeout=(30, 150))
+
+    @patch('requests.Session.request')
+    def test_session_transport(self, mock_request):
+        transport = SessionTransport(pool_maxsize=4)
+        RestClient(URL).headers(HEADERS).transport(transport).execute()
+        RestClient(URL).headers(HEADERS).transport(transport).execute()
+        self.assertEqual(mock_request.call_count, 2)
+        mock_request.assert_called_with(method='GET', url=URL, headers=HEADERS, params={}, json=None,
+                                        timeout=(30, 150))
+        self.assertEqual(transport._session.get_adapter(URL)._pool_maxsize, 4)
+        transport.close()
+
+    def test_set_default_transport(self):
+        transport = Mock(spec=Transport)
+        previous = set_default_transport(transport)
+        try:
+            RestClient(URL).headers(HEADERS).execute()
+        finally:
+            set_default_transport(previous)
+        transport.send.assert_called_once_with(method='GET', url=URL, headers=HEADERS, params={}, json=None,
+                                               timeout=(30, 150))
+        self.assertIs(get_default_transport(), previous)
+
+    def test_use_transport(self):
+        transport = Mock(spec=Transport)
+        explicit = Mock(spec=Transport)
+        seen = []
+        with use_transport(transport):
+            RestClient(URL).headers(HEADERS).execute()
+            RestClient(URL).headers(HEADERS).transport(explicit).execute()
+            thread = threading.Thread(target=lambda: seen.append(get_transport()))
+            thread.start()
+            thread.join()
+        self.assertEqual(transport.send.call_count, 1)
+        self.assertEqual(explicit.send.call_count, 1)
+        self.assertEqual(seen, [get_default_transport()])
+        self.assertIs(get_transport(), get_default_transport())
+
+
+class CoalescingTransportTests(unittest.TestCase):
+
+    def _run_concurrently(self, transport, inner, count, headers=lambda i: HEADERS):
+        results = [None] * count
+
+        def get(i):
+            try:
+                results[i] = RestClient(URL).headers(headers(i)).retry(0).transport(transport).execute()
+            except Exception as err:
+                results[i] = err
+
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while transport.coalesced + len(inner.calls) < count and time.time() < deadline:
+            time.sleep(0.001)
+        inner.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_gets_are_coalesced(self):
+        response = Mock(spec=Response)
+        response.status_code = 200
+        inner = _BlockingTransport(response)
+        transport = CoalescingTransport(inner)
+        results = self._run_concurrently(transport, inner, 8)
+        self.assertEqual(len(inner.calls), 1)
+        self.assertEqual(transport.coalesced, 7)
+        for result in results:
+            self.assertIs(result, response)
+
+    def test_error_is_shared(self):
+        inner = _BlockingTransport(APIError('boom'))
+        transport = CoalescingTransport(inner)
+        results = self._run_concurrently(transport, inner, 4)
+        self.assertEqual(len(inner.calls), 1)
+        for result in results:
+            self.assertIsInstance(result, APIError)
+
+    def test_different_projects_are_not_coalesced(self):
+        inner = _BlockingTransport(Mock(spec=Response, status_code=200))
+        transport = CoalescingTransport(inner)
+        self._run_concurrently(transport, inner, 3, headers=lambda i: dict(HEADERS, project='project-{}'.format(i)))
+        self.assertEqual(len(inner.calls), 3)
+        self.assertEqual(transport.coalesced, 0)
+
+    def test_different_organizations_are_not_coalesced(self):
+        inner = _BlockingTransport(Mock(spec=Response, status_code=200))
+        transport = CoalescingTransport(inner)
+        self._run_concurrently(transport, inner, 2, headers=lambda i: dict(HEADERS, organization='org-{}'.format(i)))
+        self.assertEqual(len(inner.calls), 2)
+        self.assertEqual(transport.coalesced, 0)
+        self.assertNotEqual(request_key('GET', URL, headers=dict(HEADERS, organization='org-a')),
+                            request_key('GET', URL, headers=dict(HEADERS, organization='org-b')))
+
+    def test_writes_are_not_coalesced(self):
+        inner = Mock(spec=Transport)
+        transport = CoalescingTransport(inner)
+        for _ in range(2):
+            RestClient(URL).method(HttpMethod.POST).headers(HEADERS).transport(transport).execute({'a': 1})
+        self.assertEqual(inner.send.call_count, 2)
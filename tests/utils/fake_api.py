@@ -0,0 +1,38 @@
+# encoding: utf-8
+from __future__ import absolute_import
+
+import json
+import threading
+
+from mock import Mock
+from requests import Response
+
+
+def mock_response(text, status_code=200):
+    response = Mock(spec=Response)
+    response.status_code = status_code
+    response.text = text
+    return response
+
+
+def data_response(data, status_code=200):
+    return mock_response(json.dumps({'status': 'success', 'response': {'data': data}}), status_code)
+
+
+class FakeAPI(object):
+    """
+    Patched in for ``requests.request`` or ``requests.Session.request``. Every call is recorded in ``calls`` as
+    ``(method, url, kwargs)`` and answered by :py:meth:`answer`, subclasses use ``lock`` for their own state.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, **kwargs):
+        with self.lock:
+            self.calls.append((method, url, kwargs))
+        return self.answer(method, url, **kwargs)
+
+    def answer(self, method, url, **kwargs):
+        raise NotImplementedError